@@ -0,0 +1,123 @@
+"""bench_framePacket.py
+
+Compares encoding a frame into a FramePacket (and decoding it back) across codecs.
+
+Measured, per resolution:
+    listJpeg: jpeg, with the payload converted through a python list of ints on both ends
+        (what FramePacket used to do with its List(UInt8) payload).
+    jpeg: jpeg straight into the Data blob.
+    png: lossless png, fast compression level.
+    raw: the pixels as they are, no compression.
+
+Each codec reports encode (createPacket + serialize) and decode (parse + getFrame) times, and the serialized size.
+Everything is printed as json (and optionally written to a file), so runs can be diffed.
+
+Usage:
+    python bench_framePacket.py --iterations 100 --output results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import time
+from typing import Any, Callable, Dict, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from Alt.Cameras.Proto.FramePacket import FramePacket
+
+RESOLUTIONS: Sequence[Tuple[int, int]] = ((640, 480), (1280, 720), (1920, 1080))
+
+
+def _timeMs(func: Callable[[], Any], iterations: int) -> Dict[str, float]:
+    func()  # warmup
+    samplesMs = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samplesMs.append((time.perf_counter() - start) * 1000)
+    p50, p99 = np.percentile(samplesMs, [50, 99])
+    return {"p50Ms": round(float(p50), 4), "p99Ms": round(float(p99), 4)}
+
+
+def _makeFrame(width: int, height: int) -> np.ndarray:
+    # noise compresses unrealistically badly, so blur it into something closer to a camera image
+    frame = np.random.randint(0, 255, (height, width, 3), dtype=np.uint8)
+    return cv2.GaussianBlur(frame, (15, 15), 0)
+
+
+def _encodeList(frame: np.ndarray) -> bytes:
+    _, compressed = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), FramePacket.DEFAULTJPEGQUALITY])
+    packet = FramePacket.createPacket(0, "Frame", frame[:1, :1])
+    packet.frame.width = frame.shape[1]
+    packet.frame.height = frame.shape[0]
+    # every byte through a python int and back, like filling and reading a List(UInt8)
+    packet.frame.data = bytes(compressed.tolist())
+    return FramePacket.toBytes(packet)
+
+
+def _decodeList(data: bytes) -> np.ndarray:
+    packet = FramePacket.fromBytes(data)
+    compressed = np.array(list(packet.frame.data), dtype=np.uint8)
+    return cv2.imdecode(compressed, cv2.IMREAD_COLOR)
+
+
+def _benchCodec(
+    encode: Callable[[], bytes], decode: Callable[[bytes], np.ndarray], iterations: int
+) -> Dict[str, Any]:
+    data = encode()
+    return {
+        "encode": _timeMs(encode, iterations),
+        "decode": _timeMs(lambda: decode(data), iterations),
+        "bytes": len(data),
+    }
+
+
+def benchResolution(width: int, height: int, iterations: int) -> Dict[str, Any]:
+    frame = _makeFrame(width, height)
+
+    def decode(data: bytes) -> np.ndarray:
+        return FramePacket.getFrame(FramePacket.fromBytes(data))
+
+    def encoder(codec: str) -> Callable[[], bytes]:
+        return lambda: FramePacket.toBytes(FramePacket.createPacket(0, "Frame", frame, codec=codec))
+
+    return {
+        "resolution": f"{width}x{height}",
+        "listJpeg": _benchCodec(lambda: _encodeList(frame), _decodeList, iterations),
+        "jpeg": _benchCodec(encoder(FramePacket.JPEG), decode, iterations),
+        "png": _benchCodec(encoder(FramePacket.PNG), decode, iterations),
+        "raw": _benchCodec(encoder(FramePacket.RAW), decode, iterations),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=100, help="Runs of each codec")
+    parser.add_argument("--output", type=str, default=None, help="Also write the json here")
+    args = parser.parse_args()
+
+    results = {
+        "system": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "opencv": cv2.__version__,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "framePacket": [benchResolution(width, height, args.iterations) for width, height in RESOLUTIONS],
+    }
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""bench_opencvCapture.py
+
+Compares the OpenCVCapture stream options on one source (a camera, or a synthetic video if none is given).
+
+Measured, per configuration:
+    readMs: how long getMainFrame (or readInto) takes, p50/p99.
+    frameAgeMs: time from the capture timestamp to the read returning, p50/p99. Stale queued frames show up here.
+    cpuMsPerFrame: process cpu time per frame, decoding and color conversion show up here.
+
+Configurations:
+    default: whatever the driver picks.
+    bufferSize1: CAP_PROP_BUFFERSIZE=1.
+    mjpg / yuyv / grey: the pixel format asked for (camera support varies, the capture warns if it is ignored).
+    noRgbConversion: CONVERT_RGB off, frames stay in the camera's format.
+    readInto: reading into one preallocated array.
+    captureThread: the FrameGrabber thread, always handing out the newest frame.
+
+On a video file the V4L2 options do nothing, so only readInto and captureThread differ there.
+Everything is printed as json (and optionally written to a file), so runs can be diffed.
+
+Usage:
+    python bench_opencvCapture.py --source 0 --frames 300 --output results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import cv2
+import numpy as np
+
+from Alt.Cameras.Captures.OpenCVCapture import OpenCVCapture
+
+CONFIGURATIONS: Dict[str, Dict[str, Any]] = {
+    "default": {},
+    "bufferSize1": {"bufferSize": 1},
+    "mjpg": {"fourcc": "MJPG", "bufferSize": 1},
+    "yuyv": {"fourcc": "YUYV", "bufferSize": 1},
+    "grey": {"fourcc": "GREY", "bufferSize": 1},
+    "noRgbConversion": {"convertRgb": False, "bufferSize": 1},
+    "readInto": {"bufferSize": 1},
+    "captureThread": {"useCaptureThread": True},
+}
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    p50, p99 = np.percentile(samples, [50, 99])
+    return {"p50": round(float(p50), 4), "p99": round(float(p99), 4)}
+
+
+def _makeVideo(directory: str, frames: int) -> str:
+    path = os.path.join(directory, "synthetic.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (1280, 720))  # type: ignore
+    for i in range(frames):
+        frame = np.full((720, 1280, 3), i % 256, dtype=np.uint8)
+        cv2.putText(frame, str(i), (100, 360), cv2.FONT_HERSHEY_SIMPLEX, 5, (255, 255, 255), 10)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def benchConfiguration(source: str, frames: int, useV4L2: bool, name: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    capture = OpenCVCapture(name, source, useV4L2Backend=useV4L2, **options)
+    try:
+        capture.create()
+    except BrokenPipeError as e:
+        return {"configuration": name, "error": str(e)}
+
+    try:
+        first = capture.getMainFrame()
+        buffer = np.empty_like(first)
+
+        readMs, ageMs = [], []
+        cpuStart = time.process_time()
+        for _ in range(frames):
+            start = time.perf_counter()
+            if name == "readInto":
+                frame = capture.readInto(buffer)
+            else:
+                frame = capture.getMainFrame()
+            readMs.append((time.perf_counter() - start) * 1000)
+            if frame is None:
+                break
+            ageMs.append((time.monotonic() - capture.getCaptureTimestamp()) * 1000)
+        cpuMs = (time.process_time() - cpuStart) * 1000
+
+        return {
+            "configuration": name,
+            "options": options,
+            "frameShape": list(first.shape),
+            "readMs": _percentiles(readMs),
+            "frameAgeMs": _percentiles(ageMs) if ageMs else None,
+            "cpuMsPerFrame": round(cpuMs / max(len(readMs), 1), 4),
+        }
+    finally:
+        capture.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--source", type=str, default=None, help="Camera index or path, a synthetic video if not given")
+    parser.add_argument("--frames", type=int, default=300, help="Frames read per configuration")
+    parser.add_argument("--output", type=str, default=None, help="Also write the json here")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpDir:
+        source = args.source
+        if source is None:
+            # enough frames that no configuration runs off the end
+            source = _makeVideo(tmpDir, args.frames * 2 + 10)
+        isCamera = source.isdigit()
+        results = {
+            "system": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "opencv": cv2.__version__,
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "source": args.source or "synthetic",
+            "opencvCapture": [
+                benchConfiguration(
+                    source if not isCamera else int(source), args.frames, isCamera and platform.system() == "Linux", name, options
+                )
+                for name, options in CONFIGURATIONS.items()
+            ],
+        }
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""bench_undistort.py
+
+Compares the ways a frame (or its detections) can be undistorted with a CameraCalibration.
+
+Measured, per resolution:
+    floatMaps: cv2.remap with CV_32FC1 maps (what CameraCalibration used to do).
+    fixedPointMaps: cv2.remap with CV_16SC2 maps (CameraCalibration.undistortFrame).
+    croppedToRoi: fixed point maps that only output the valid roi (cropToRoi=True).
+    pointsOnly: CameraCalibration.undistortPoints on a handful of detection corners, no frame remap at all.
+
+Everything is printed as json (and optionally written to a file), so runs can be diffed.
+
+Usage:
+    python bench_undistort.py --iterations 200 --output results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+from typing import Any, Callable, Dict, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from Alt.Cameras.Parameters.CameraCalibration import CameraCalibration
+
+RESOLUTIONS: Sequence[Tuple[int, int]] = ((640, 480), (1280, 720), (1920, 1080))
+NUMPOINTS = 40 # eg 10 detections, 4 corners each
+
+
+def _timeMs(func: Callable[[], Any], iterations: int) -> Dict[str, float]:
+    func()  # warmup
+    samplesMs = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samplesMs.append((time.perf_counter() - start) * 1000)
+    p50, p99 = np.percentile(samplesMs, [50, 99])
+    return {"p50Ms": round(float(p50), 4), "p99Ms": round(float(p99), 4)}
+
+
+def benchResolution(width: int, height: int, iterations: int) -> Dict[str, Any]:
+    cameraMatrix = np.array([[width * 0.8, 0, width / 2], [0, width * 0.8, height / 2], [0, 0, 1]])
+    distortion = np.array([[-0.3, 0.1, 0, 0, 0]])
+    frame = np.random.randint(0, 255, (height, width, 3), dtype=np.uint8)
+    points = np.random.rand(NUMPOINTS, 2) * (width, height)
+
+    newCameraMatrix, _ = cv2.getOptimalNewCameraMatrix(cameraMatrix, distortion, (width, height), 1, (width, height))
+    mapX, mapY = cv2.initUndistortRectifyMap(
+        cameraMatrix, distortion, None, newCameraMatrix, (width, height), cv2.CV_32FC1
+    )
+
+    calibration = CameraCalibration(cameraMatrix, distortion, (width, height))
+    cropped = CameraCalibration(cameraMatrix, distortion, (width, height), cropToRoi=True)
+
+    # map creation, cold (builds and persists the maps) vs a new instance loading them from the cache
+    start = time.perf_counter()
+    calibration.getMapXY()
+    coldMapBuildMs = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    CameraCalibration(cameraMatrix, distortion, (width, height)).getMapXY()
+    cachedMapLoadMs = (time.perf_counter() - start) * 1000
+
+    return {
+        "resolution": f"{width}x{height}",
+        "floatMaps": _timeMs(lambda: cv2.remap(frame, mapX, mapY, cv2.INTER_LINEAR), iterations),
+        "fixedPointMaps": _timeMs(lambda: calibration.undistortFrame(frame), iterations),
+        "croppedToRoi": _timeMs(lambda: cropped.undistortFrame(frame), iterations),
+        "pointsOnly": _timeMs(lambda: calibration.undistortPoints(points), iterations),
+        "coldMapBuildMs": round(coldMapBuildMs, 3),
+        "cachedMapLoadMs": round(cachedMapLoadMs, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200, help="Runs of each mode")
+    parser.add_argument("--output", type=str, default=None, help="Also write the json here")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cacheDir:
+        # dont leave benchmark maps in the real cache
+        CameraCalibration.MAPCACHEDIR = cacheDir
+        results = {
+            "system": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "opencv": cv2.__version__,
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "undistort": [benchResolution(width, height, args.iterations) for width, height in RESOLUTIONS],
+        }
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,64 @@
+import queue
+import threading
 import time
-from typing import Union, Optional, Any
+from typing import Union, Optional, Any, Dict, Tuple
 import cv2
 import numpy as np
 
 from Alt.Core.Agents import AgentBase, BindableAgent
 from Alt.Core.Constants.AgentConstants import ProxyType
-from Alt.Core.Operators.StreamProxy import StreamProxy
+from Alt.Core.Operators.StreamProxy import DepthStreamProxy, StreamProxy
+from Alt.Core.Utils.frameTrace import FrameTrace
 
 from ..Captures.OpenCVCapture import OpenCVCapture
 from ..Captures.Capture import Capture, CaptureWIntrinsics, ConfigurableCapture
 from ..Captures.depthCamera import depthCamera
+from ..Captures.CaptureGroup import CaptureGroup, FrameSet
 from .. import canCurrentlyDisplay
 from ..Captures.tools import calibration
+from ..Captures.tools.latency import LatencyHistogram
+from ..Captures.tools.bufferPool import FrameBufferPool
+from ..Captures.tools.overlay import FrameOverlay
 from ..Calibration.CalibrationUtil import CalibrationUtil
+from ..Parameters.CameraCalibration import CameraCalibration
+
+
+class _StreamGate:
+    """Decides when to publish to a stream: only when someone is watching it, and at most fps times a second"""
+
+    def __init__(self, streamProxy: StreamProxy, subscriberCheckS: float) -> None:
+        self.streamProxy = streamProxy
+        self.subscriberCheckS = subscriberCheckS
+        self.__lastPublish: float = 0
+        self.__lastSubscriberCheck: float = 0
+        self.__hasSubscribers: bool = False
+
+    def shouldPublish(self, fps: float) -> bool:
+        now = time.monotonic()
+        if fps <= 0 or now - self.__lastPublish < 1 / fps:
+            return False
+
+        # the subscriber count lives in the manager process, so dont ask every tick
+        if now - self.__lastSubscriberCheck > self.subscriberCheckS:
+            self.__lastSubscriberCheck = now
+            self.__hasSubscribers = self.streamProxy.hasSubscribers()
+
+        if not self.__hasSubscribers:
+            return False
+
+        self.__lastPublish = now
+        return True
 
 
 class CameraUsingAgentBase(AgentBase, BindableAgent):
     """
     Main superclass for any agent that needs to use a camera. It is reccomended to extend this rather than create a separate agent class.
     Adds calibration support, automatic mjpeg streaming, camera status checking, and depth camera support
+
+    NOTE: latestFrameMain, latestFrameDEPTH and latestFrameSet can be buffers of the agent's frame pool, which are
+    reused once the next frame is ingested. Use them during runPeriodic, copy anything kept longer.
+    Debug drawing goes into self.overlay rather than onto latestFrameMain, it is only drawn onto the (downscaled)
+    stream frame when someone is watching.
     """
     
     
@@ -27,22 +67,46 @@ class CameraUsingAgentBase(AgentBase, BindableAgent):
     CALIBTOGGLEPOSTFIX = "StartCalib" # toggle name to start calibration
     CALIBIDEALSHAPEWPOSTFIX = "CALIBGOALSHAPEW" # requested width for calibration
     CALIBIDEALSHAPEHPOSTFIX = "CALIBGOALSHAPEH" # requested height for calibration
-    CALIBIDEALCOUNT = "NUMCALIBPICTURES" # number of calibration pictures to take
+    CALIBIDEALCOUNT = "NUMCALIBPICTURES" # most calibration pictures to take, it can stop early after Calibrator.minViews
     DEFAULTCALIBCOUNT = 100 # default 100 pictures
     ISCHARUCOCALIB = "ISCHARUCOCALIB" # true = board is charuco board, false = normal checkerboard
     
     # camera stream
     CAMERASTREAMNAME = "cameraStream" # name for the camera stream
+    DEPTHSTREAMNAME = "depthStream" # name for the depth stream (depth cameras only), raw depth colormapped by the stream server
+    DEFAULTSTREAMFPS = 15 # max rate frames are published to the stream
+    SUBSCRIBERCHECKS = 0.5 # how often to check if anyone is watching the stream (Seconds)
+
+    # latency
+    LATENCYPUBLISHS = 1.0 # how often the latency histogram is published (Seconds)
+    EXPOSURESPAN = "exposure" # trace mark at the time the camera captured the frame
     
     # camera gui display
     WINDOWNAMEDEPTH: str = "depth_frame" # color frame name
     WINDOWNAMECOLOR: str = "color_frame" # depth frame name
 
+    # pipelined mode
+    PIPELINEQUEUESIZE: int = 2 # max frames waiting between stages, the oldest is dropped when full
+    PIPELINETIMER: str = "pipeline" # timer the capture, process and publish stage times go under
+
 
     @classmethod
     def requestProxies(cls):
         super().requestProxies()
         super().addProxyRequest(cls.CAMERASTREAMNAME, ProxyType.STREAM)
+        super().addProxyRequest(cls.DEPTHSTREAMNAME, ProxyType.DEPTHSTREAM)
+
+    @classmethod
+    def isProxyNeeded(cls, proxyName: str, bindings: Dict[str, Any]) -> bool:
+        # the depth stream, its routes and properties only exist for depth cameras. Agents that make their capture in
+        # __init__ instead of binding it might have one, so they keep it
+        if proxyName == cls.DEPTHSTREAMNAME:
+            capture = bindings.get("capture")
+            return capture is None or isinstance(capture, depthCamera)
+        return super().isProxyNeeded(proxyName, bindings)
+
+    def _getBindings(self) -> Dict[str, Any]:
+        return {"capture": self.capture}
 
 
     """Agent -> CameraUsingAgentBase
@@ -56,15 +120,38 @@ class CameraUsingAgentBase(AgentBase, BindableAgent):
         cls, 
         capture : Union[Capture, depthCamera, OpenCVCapture, ConfigurableCapture, CaptureWIntrinsics],
         showFrames : bool = False,
+        pipelined : bool = False,
+        undistortFullFrame : bool = True,
+        cropToRoi : bool = False,
     ):
-        return cls._getBindedAgent(capture=capture, showFrames=showFrames)
+        return cls._getBindedAgent(
+            capture=capture,
+            showFrames=showFrames,
+            pipelined=pipelined,
+            undistortFullFrame=undistortFullFrame,
+            cropToRoi=cropToRoi,
+        )
 
     def __init__(
         self, 
         capture : Union[Capture, depthCamera, OpenCVCapture, ConfigurableCapture, CaptureWIntrinsics],
         showFrames : bool = False,
+        pipelined : bool = False,
+        undistortFullFrame : bool = True,
+        cropToRoi : bool = False,
         **kwargs: Any
     ) -> None:
+        """
+        Args:
+            capture: The camera to use
+            showFrames: Show frames in a local window (main thread only)
+            pipelined: Run capture + undistort and stream publishing on their own threads, so they overlap with the
+                processing done in runPeriodic. Throughput then approaches the slowest stage instead of the sum of all stages.
+            undistortFullFrame: Undistort every frame with the calibration. Set to False if only some points (eg detections)
+                need correcting, and undistort those with self.calibration.undistortPoints instead. Much cheaper.
+            cropToRoi: Crop undistorted frames to the valid region of the calibration. Frames get smaller, use
+                self.calibration.getNewCameraMatrix for their intrinsics.
+        """
         super().__init__(**kwargs)
         
         if capture is None:
@@ -72,17 +159,34 @@ class CameraUsingAgentBase(AgentBase, BindableAgent):
         
         self.capture = capture
 
-        self.depthEnabled = isinstance(self.capture.__class__, depthCamera)
-        self.isCv2Backend = isinstance(self.capture.__class__, OpenCVCapture)
-        self.isConfigurable = isinstance(self.capture.__class__, ConfigurableCapture)
-        self.isWIntrinsics = isinstance(self.capture.__class__, CaptureWIntrinsics)
+        self.depthEnabled = isinstance(self.capture, depthCamera)
+        self.isCv2Backend = isinstance(self.capture, OpenCVCapture)
+        self.isConfigurable = isinstance(self.capture, ConfigurableCapture)
+        self.isWIntrinsics = isinstance(self.capture, CaptureWIntrinsics)
 
         self.showFrames = showFrames
+        self.pipelined = pipelined
+        self.undistortFullFrame = undistortFullFrame
+        self.cropToRoi = cropToRoi
+        self.pipelineRunning: bool = False
+        self.pipelineError: Optional[Exception] = None
         self.hasIngested: bool = False
         self.exit: bool = False
         
         self.latestFrameDEPTH: Optional[np.ndarray] = None
         self.latestFrameMain: Optional[np.ndarray] = None
+        self.latestFrameTrace: Optional[FrameTrace] = None # trace of the latest frame, inheritors can add their own stages
+        self.latestFrameSet: Optional[FrameSet] = None # frames of every camera, when the capture is a CaptureGroup
+        self.overlay = FrameOverlay() # annotations of latestFrameMain, cleared when the next frame is ingested
+        self.captureLatency = LatencyHistogram() # from the camera capturing a frame until it is handed to runPeriodic
+        self.__lastSequenceNumber: int = 0
+        self.__droppedSequences: int = 0
+        self.__lastLatencyPublish: float = 0
+        # frames are read, undistorted and resized into recycled buffers instead of new arrays every frame
+        self.framePool = FrameBufferPool()
+        self.__mainFrameSpec: Optional[Tuple[Tuple[int, ...], np.dtype]] = None # (shape, dtype) that frames are read into
+        self.__lastBufferStatsPublish: float = 0
+        self.__lastBufferAllocations: int = 0
         self.calibActive: bool = False
 
     def create(self) -> None:
@@ -107,24 +211,30 @@ class CameraUsingAgentBase(AgentBase, BindableAgent):
         if self.showFrames:
             cv2.namedWindow(self.WINDOWNAMECOLOR)
 
-            if isinstance(self.capture.__class__, depthCamera):
+            if isinstance(self.capture, depthCamera):
                 cv2.namedWindow(self.WINDOWNAMEDEPTH)
 
 
         frameShape = self.capture.getFrameShape()
         self.__createCalibrationProperties(frameShape)
+        self.__createLatencyProperties()
+        if isinstance(self.capture, CaptureGroup):
+            # how far apart the cameras of a set were captured
+            self.groupSkewP50 = self.propertyOperator.createReadOnlyProperty("captureGroup.skewP50Ms", 0.0)
+            self.groupSkewMax = self.propertyOperator.createReadOnlyProperty("captureGroup.skewMaxMs", 0.0)
+            self.groupFailedSets = self.propertyOperator.createReadOnlyProperty("captureGroup.failedSets", 0)
         self.__createCameraStreamProperties(frameShape)
 
 
         self.calibrationUtil = CalibrationUtil(self.capture.getName())
         self.calibration = self.calibrationUtil.getCalibration()
 
-        if self.calibration is not None:
-            self.preprocessFrame = lambda frame: self.calibration.undistortFrame(frame)            
-        else:
-            self.preprocessFrame = lambda frame : frame
+        self.__setCalibration(self.calibration)
 
         self.__sendInitialUpdate()
+
+        if self.pipelined:
+            self.__startPipeline()
         
 
     def __testCapture(self) -> None:
@@ -133,7 +243,7 @@ class CameraUsingAgentBase(AgentBase, BindableAgent):
             frame = self.capture.getMainFrame()
             retTest = frame is not None
 
-            if isinstance(self.capture.__class__, depthCamera):
+            if isinstance(self.capture, depthCamera):
                 depthFrame = self.capture.getDepthFrame()
                 retTest = retTest and depthFrame is not None
         else:
@@ -172,6 +282,24 @@ class CameraUsingAgentBase(AgentBase, BindableAgent):
         self.isCharucoCalib = self.updateOp.createGlobalUpdate(
             self.ISCHARUCOCALIB, default=True, loadIfSaved=False
         )
+        # progress of a running calibration, it stops early once these are good enough
+        self.calibViews = self.propertyOperator.createReadOnlyProperty("calibration.views", 0)
+        self.calibCoverage = self.propertyOperator.createReadOnlyProperty("calibration.coverage", 0.0)
+        self.calibPoseBins = self.propertyOperator.createReadOnlyProperty("calibration.poseBins", 0)
+        self.calibReprojectionError = self.propertyOperator.createReadOnlyProperty("calibration.reprojectionError", -1.0)
+
+    def __createLatencyProperties(self) -> None:
+        self.latencyP50 = self.propertyOperator.createReadOnlyProperty("latency.captureToProcessP50Ms", 0.0)
+        self.latencyP99 = self.propertyOperator.createReadOnlyProperty("latency.captureToProcessP99Ms", 0.0)
+        self.latencyHistogram = self.propertyOperator.createReadOnlyProperty(
+            "latency.captureToProcessHistogram", self.captureLatency.getCounts()
+        )
+        self.propertyOperator.createReadOnlyProperty(
+            "latency.histogramBucketsMs", [float(edge) for edge in self.captureLatency.bucketsMs]
+        )
+        self.droppedSequenceFrames = self.propertyOperator.createReadOnlyProperty("capture.droppedSequences", 0)
+        self.bufferAllocationsPerSecond = self.propertyOperator.createReadOnlyProperty("frameBuffers.allocationsPerSecond", 0.0)
+        self.outstandingBuffers = self.propertyOperator.createReadOnlyProperty("frameBuffers.outstanding", 0)
 
     def __createCameraStreamProperties(self, frameShape : tuple):
         self.streamProxy: StreamProxy = self.getProxy(self.CAMERASTREAMNAME)
@@ -195,6 +323,22 @@ class CameraUsingAgentBase(AgentBase, BindableAgent):
             addOperatorPrefix=True,
             loadIfSaved=False,
         )
+        self.streamFps = self.propertyOperator.createCustomProperty(
+            "stream.fps",
+            self.DEFAULTSTREAMFPS,
+            addOperatorPrefix=True,
+            loadIfSaved=False,
+        )
+
+        self.__streamGate = _StreamGate(self.streamProxy, self.SUBSCRIBERCHECKS)
+
+        self.depthStreamProxy: Optional[DepthStreamProxy] = self.getProxy(self.DEPTHSTREAMNAME) if self.depthEnabled else None
+        self.__depthStreamGate: Optional[_StreamGate] = None
+        if self.depthStreamProxy is not None:
+            self.propertyOperator.createCustomReadOnlyProperty(
+                "stream.depthIP", self.depthStreamProxy.getStreamPath(), addBasePrefix=True, addOperatorPrefix=True
+            )
+            self.__depthStreamGate = _StreamGate(self.depthStreamProxy, self.SUBSCRIBERCHECKS)
    
 
     def runPeriodic(self) -> None:
@@ -202,8 +346,18 @@ class CameraUsingAgentBase(AgentBase, BindableAgent):
 
         # we show the last frames before ingesting new frames, as this allows the frame to be annotated by any inheritors of this class
         # then since the annottated frames will be shown before being overwritten by the new read, they can be displayed
-        self.__showLastFrame()
-        self.__ingestFrames()
+        if self.pipelined:
+            if self.hasIngested:
+                # everything since the last frame was handed over was the inheritors processing
+                self.pipelineTimer.measureAndUpdate("process")
+            self.__showLastFrame()
+            self.__ingestFromPipeline()
+            self.pipelineTimer.resetMeasurement("process")
+            self.captureQueueDepth.set(self.captureQueue.qsize())
+            self.publishQueueDepth.set(self.publishQueue.qsize())
+        else:
+            self.__showLastFrame()
+            self.__ingestFrames()
 
         if self.calibProp.get() and not self.calibActive:
             self.__initCalibrator()
@@ -212,10 +366,15 @@ class CameraUsingAgentBase(AgentBase, BindableAgent):
             if not self.calibProp.get():
                 # premature exit
                 self.calibActive = False
+                self.calibrator.close()
             else:                
                 # take a picture every N seconds (to allow for moving of the calibration board)
-                if time.time() - self.timeSinceLastPicture > self.timePerPicture.get():
-                    self.calibrator.savePicture(self.latestFrameMain)
+                if self.latestFrameMain is not None and time.time() - self.timeSinceLastPicture > self.timePerPicture.get():
+                    self.timeSinceLastPicture = time.time()
+                    if not self.calibrator.savePicture(self.latestFrameMain):
+                        self.Sentinel.debug("Calibration board not found in picture")
+                # the running calibration is solved in the background, so its error can come in between pictures
+                self.__publishCalibrationProgress()
 
                 if self.calibrator.isFinished():
                     self.__finishCalibration()
@@ -225,7 +384,10 @@ class CameraUsingAgentBase(AgentBase, BindableAgent):
         if self.hasIngested:
             # local showing of frame
             if self.showFrames:
-                cv2.imshow(self.WINDOWNAMECOLOR, self.latestFrameMain)
+                shownFrame = self.latestFrameMain
+                if not self.overlay.isEmpty():
+                    shownFrame = self.overlay.render(shownFrame.copy(), shownFrame.shape)
+                cv2.imshow(self.WINDOWNAMECOLOR, shownFrame)
 
                 if self.latestFrameDEPTH is not None:
                     cv2.imshow(self.WINDOWNAMEDEPTH, self.latestFrameDEPTH)
@@ -233,41 +395,337 @@ class CameraUsingAgentBase(AgentBase, BindableAgent):
                 if cv2.waitKey(1) & 0xFF == ord("q"):
                     self.exit = True
 
-            # send to mjpeg stream
-            # clear if above size
-            streamWidthI = int(self.streamWidth.get())
-            streamHeightI = int(self.streamHeight.get())
             if (
-                streamWidthI != self.latestFrameMain.shape[1]
-                or streamHeightI != self.latestFrameMain.shape[0]
+                self.__depthStreamGate is not None
+                and self.latestFrameDEPTH is not None
+                and self.__depthStreamGate.shouldPublish(self.streamFps.get())
             ):
-                resizedFrame = cv2.resize(
-                    self.latestFrameMain,
-                    (streamWidthI, streamHeightI),
-                )
-                self.streamProxy.put(resizedFrame)
+                # put() decimates and copies the raw depth, the colormap is only applied for connected clients
+                self.depthStreamProxy.put(self.latestFrameDEPTH)
+
+            if not self.__streamGate.shouldPublish(self.streamFps.get()):
+                return
+
+            annotations = self.overlay.getAnnotations()
+            if self.pipelined:
+                # the publisher thread holds the frame from here, and releases it once published
+                self.framePool.retain(self.latestFrameMain)
+                self.__putLatest(self.publishQueue, (self.latestFrameMain, annotations), isCaptureStage=False)
             else:
-                self.streamProxy.put(self.latestFrameMain)
+                self.__publishFrame(self.latestFrameMain, annotations)
+
+    def __publishFrame(self, frame: np.ndarray, annotations: list) -> None:
+        # send to mjpeg stream
+        # clear if above size
+        streamWidthI = int(self.streamWidth.get())
+        streamHeightI = int(self.streamHeight.get())
+        if (
+            streamWidthI != frame.shape[1]
+            or streamHeightI != frame.shape[0]
+        ):
+            streamFrame = self.framePool.acquire((streamHeightI, streamWidthI) + frame.shape[2:], frame.dtype)
+            cv2.resize(
+                frame,
+                (streamWidthI, streamHeightI),
+                dst=streamFrame,
+            )
+        elif annotations:
+            # annotations go on a copy, the frame itself is never drawn on
+            streamFrame = self.__copyToPool(frame)
+        else:
+            self.streamProxy.put(frame)
+            return
+
+        if annotations:
+            # drawn at stream resolution, so drawing costs scale with the stream and not the camera
+            self.overlay.render(streamFrame, frame.shape, annotations)
+        # put() copies the frame into the manager process, so the buffer goes straight back to the pool
+        self.streamProxy.put(streamFrame)
+        self.framePool.release(streamFrame)
     
     def __ingestFrames(self):
         with self.timer.run("cap_read"):
             self.hasIngested = True
+            self.__releaseLatestFrames()
+            self.overlay.clear()
+            self.latestFrameDEPTH, self.latestFrameMain, self.latestFrameTrace, self.latestFrameSet = self.__captureFrames()
+        self.__publishSkewStats()
+        self.__recordLatency()
+        self.__publishBufferStats()
+
+    def __releaseFrames(self, capturedFrames: Tuple[Optional[np.ndarray], np.ndarray, FrameTrace, Optional[FrameSet]]) -> None:
+        """Give the pool buffers of a __captureFrames result back"""
+        depthFrame, mainFrame, _, frameSet = capturedFrames
+        for frame in (depthFrame, mainFrame):
+            if frame is not None:
+                self.framePool.release(frame)
+        if frameSet is not None:
+            for frame in frameSet.frames:
+                self.framePool.release(frame)
+
+    def __releaseLatestFrames(self) -> None:
+        if self.latestFrameMain is not None:
+            self.__releaseFrames((self.latestFrameDEPTH, self.latestFrameMain, None, self.latestFrameSet))
+
+    def __copyToPool(self, frame: np.ndarray) -> np.ndarray:
+        buffer = self.framePool.acquire(frame.shape, frame.dtype)
+        np.copyto(buffer, frame)
+        return buffer
+
+    def __readMainFrame(self, ownFrame: bool) -> Optional[np.ndarray]:
+        """Read the next main frame, into a pool buffer where the capture supports it"""
+        if not self.isCv2Backend or (self.capture.grabber is not None and not ownFrame):
+            # the capture thread's buffer can be used as is, it stays valid until the next read
+            return self.capture.getMainFrame()
+
+        if self.__mainFrameSpec is None:
+            frame = self.capture.getMainFrame()
+            if frame is not None:
+                self.__mainFrameSpec = (frame.shape, frame.dtype)
+            return frame
+
+        buffer = self.framePool.acquire(*self.__mainFrameSpec)
+        frame = self.capture.readInto(buffer)
+        if frame is not buffer:
+            self.framePool.release(buffer)
+        if frame is None:
+            # getMainFrame reads again, and falls back to a black frame like it always did
+            return self.capture.getMainFrame()
+        # the camera changing resolution only costs a new set of buffers
+        self.__mainFrameSpec = (frame.shape, frame.dtype)
+        return frame
+
+    def __undistortIntoPool(self, calibration: CameraCalibration, frame: np.ndarray) -> np.ndarray:
+        w, h = calibration.getUndistortedResolution((frame.shape[1], frame.shape[0]))
+        dst = self.framePool.acquire((h, w) + frame.shape[2:], frame.dtype)
+        undistorted = calibration.undistortFrame(frame, dst=dst)
+        if undistorted is not dst:
+            self.framePool.release(dst)
+        return undistorted
+
+    def __publishBufferStats(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self.__lastBufferStatsPublish
+        if elapsed < self.LATENCYPUBLISHS:
+            return
 
-            if isinstance(self.capture.__class__, depthCamera):
+        stats = self.framePool.getStats()
+        if self.__lastBufferStatsPublish > 0:
+            self.bufferAllocationsPerSecond.set((stats["allocations"] - self.__lastBufferAllocations) / elapsed)
+        self.__lastBufferStatsPublish = now
+        self.__lastBufferAllocations = stats["allocations"]
+        self.outstandingBuffers.set(stats["outstanding"])
+
+    def __captureFrames(
+        self, ownFrame: bool = False
+    ) -> Tuple[Optional[np.ndarray], np.ndarray, FrameTrace, Optional[FrameSet]]:
+        """Capture and preprocess one frame. Returns (depth frame or None, main frame, trace, frame set or None)
+        If ownFrame is set, the frames are guaranteed to not be buffers the capture will reuse (they are pool buffers instead)"""
+        trace = FrameTrace()
+        depthFrame = None
+        frameSet = None
+
+        if isinstance(self.capture, depthCamera):
+            with trace.span("capture"):
                 latestFrames = self.capture.getDepthAndColorFrame()
-                if latestFrames is None:
-                    raise BrokenPipeError("Camera failed to capture with depth!")
-
-                self.latestFrameDEPTH = latestFrames[0]
+            if latestFrames is None:
+                raise BrokenPipeError("Camera failed to capture with depth!")
+
+            depthFrame = latestFrames[0]
+            frame = latestFrames[1]
+        elif isinstance(self.capture, CaptureGroup):
+            with trace.span("capture"):
+                frameSet = self.capture.getFrameSet()
+            if frameSet is None:
+                raise BrokenPipeError("Camera group failed to capture!")
+            frame = frameSet.frames[0]
+        else:
+            with trace.span("capture"):
+                frame = self.__readMainFrame(ownFrame)
+            if frame is None:
+                raise BrokenPipeError("Camera failed to capture!")
+
+        self.__markExposure(trace)
+
+        with trace.span("preprocess"):
+            mainFrame = self.preprocessFrame(frame)
+            if mainFrame is not frame:
+                # the raw read is not needed anymore once undistorted
+                self.framePool.release(frame)
+            elif ownFrame and not self.framePool.owns(mainFrame):
+                # some captures hand out the same buffers again, and the processing stage may still be using it
+                mainFrame = self.__copyToPool(mainFrame)
+            if ownFrame and depthFrame is not None:
+                # depth is never preprocessed, so it is always the captures buffer
+                depthFrame = self.__copyToPool(depthFrame)
+            if ownFrame and frameSet is not None:
+                frameSet.frames = [self.__copyToPool(setFrame) for setFrame in frameSet.frames]
+
+        return depthFrame, mainFrame, trace, frameSet
+
+    def __markExposure(self, trace: FrameTrace) -> None:
+        """Mark when the camera captured the frame (which can be well before the capture call returned it),
+        and count the frames the capture skipped"""
+        captureTimestamp = self.capture.getCaptureTimestamp()
+        if captureTimestamp > 0:
+            exposureNs = int(captureTimestamp * 1e9)
+            trace.addSpan(self.EXPOSURESPAN, exposureNs, exposureNs)
+
+        sequenceNumber = self.capture.getSequenceNumber()
+        if sequenceNumber > self.__lastSequenceNumber + 1 and self.__lastSequenceNumber > 0:
+            self.__droppedSequences += sequenceNumber - self.__lastSequenceNumber - 1
+        # a capture that starts counting again (eg a replay looping) is not a drop
+        self.__lastSequenceNumber = sequenceNumber
+
+    def __recordLatency(self) -> None:
+        trace = self.latestFrameTrace
+        if trace is None:
+            return
 
-                self.latestFrameMain = self.preprocessFrame(latestFrames[1])
+        spans = {span.name: span for span in trace.spans}
+        # the capture call returning is the best guess, for captures that do not know when they captured
+        capturedSpan = spans.get(self.EXPOSURESPAN) or spans.get("capture")
+        if capturedSpan is None:
+            return
+        self.captureLatency.add((time.monotonic_ns() - capturedSpan.endNs) / 1e6)
 
-            else:
-                frame = self.capture.getMainFrame()
-                if frame is None:
-                    raise BrokenPipeError("Camera failed to capture!")
+        now = time.monotonic()
+        if now - self.__lastLatencyPublish < self.LATENCYPUBLISHS:
+            return
+        self.__lastLatencyPublish = now
+        percentiles = self.captureLatency.getPercentiles()
+        self.latencyP50.set(percentiles["p50Ms"])
+        self.latencyP99.set(percentiles["p99Ms"])
+        self.latencyHistogram.set(self.captureLatency.getCounts())
+        self.droppedSequenceFrames.set(self.__droppedSequences)
+
+    def __publishSkewStats(self) -> None:
+        if not isinstance(self.capture, CaptureGroup):
+            return
+        stats = self.capture.getSkewStats()
+        if "skewP50Ms" in stats:
+            self.groupSkewP50.set(stats["skewP50Ms"])
+            self.groupSkewMax.set(stats["skewMaxMs"])
+        self.groupFailedSets.set(stats["failedSets"])
+
+    # ----- pipelined mode -----
+
+    def __startPipeline(self) -> None:
+        self.pipelineTimer = self.timeOp.getTimer(self.PIPELINETIMER)
+        self.captureQueue: queue.Queue = queue.Queue(maxsize=self.PIPELINEQUEUESIZE)
+        self.publishQueue: queue.Queue = queue.Queue(maxsize=self.PIPELINEQUEUESIZE)
+        self.captureQueueDepth = self.propertyOperator.createReadOnlyProperty("pipeline.captureQueueDepth", 0)
+        self.publishQueueDepth = self.propertyOperator.createReadOnlyProperty("pipeline.publishQueueDepth", 0)
+        self.droppedCaptureFrames = self.propertyOperator.createReadOnlyProperty("pipeline.droppedCaptureFrames", 0)
+        self.droppedPublishFrames = self.propertyOperator.createReadOnlyProperty("pipeline.droppedPublishFrames", 0)
+        # the capture thread drops from the capture queue, the agent thread from the publish queue
+        self.__droppedLock = threading.Lock()
+        self.__droppedCaptureCount = 0
+        self.__droppedPublishCount = 0
+        self.__captureLoopLock = threading.Lock()
+        self.__captureLoopExited = False
+        self.__captureLoopClosesCapture = False
+
+        self.pipelineRunning = True
+        self.__pipelineThreads = [
+            threading.Thread(target=self.__captureLoop, name=f"{self.agentName}_Capture", daemon=True),
+            threading.Thread(target=self.__publishLoop, name=f"{self.agentName}_Publish", daemon=True),
+        ]
+        for thread in self.__pipelineThreads:
+            thread.start()
+
+    def __stopPipeline(self) -> bool:
+        """Stops the pipeline threads. Returns False if the capture thread is still reading (eg stuck on the camera),
+        in which case it closes the capture itself once it exits and the caller must not close it"""
+        if not self.pipelineRunning:
+            return True
+        self.pipelineRunning = False
+        for thread in self.__pipelineThreads:
+            thread.join(timeout=1)
+
+        with self.__captureLoopLock:
+            if not self.__captureLoopExited:
+                self.Sentinel.warning("Capture thread did not stop in time, it will close the capture when it does")
+                self.__captureLoopClosesCapture = True
+                return False
+        return True
 
-                self.latestFrameMain = self.preprocessFrame(frame)
+    def __closeCapture(self) -> None:
+        if self.__stopPipeline():
+            self.capture.close()
+
+    def __putLatest(self, stageQueue: queue.Queue, item: Any, isCaptureStage: bool) -> None:
+        """Bounded hand off to the next stage, dropping the oldest waiting item if it is behind"""
+        while True:
+            try:
+                stageQueue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    dropped = stageQueue.get_nowait()
+                    if isCaptureStage:
+                        self.__releaseFrames(dropped)
+                    else:
+                        self.framePool.release(dropped[0])
+                    with self.__droppedLock:
+                        if isCaptureStage:
+                            self.__droppedCaptureCount += 1
+                        else:
+                            self.__droppedPublishCount += 1
+                except queue.Empty:
+                    pass
+
+    def __captureLoop(self) -> None:
+        try:
+            while self.pipelineRunning:
+                try:
+                    with self.pipelineTimer.run("capture"):
+                        capturedFrames = self.__captureFrames(ownFrame=True)
+                except Exception as e:
+                    self.pipelineError = e
+                    return
+
+                self.__putLatest(self.captureQueue, capturedFrames, isCaptureStage=True)
+        finally:
+            with self.__captureLoopLock:
+                self.__captureLoopExited = True
+                closeCapture = self.__captureLoopClosesCapture
+            if closeCapture:
+                # the agent already gave up waiting, releasing the capture was left to us
+                self.capture.close()
+
+    def __publishLoop(self) -> None:
+        while self.pipelineRunning:
+            try:
+                frame, annotations = self.publishQueue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            with self.pipelineTimer.run("publish"):
+                self.__publishFrame(frame, annotations)
+            self.framePool.release(frame)
+
+    def __ingestFromPipeline(self) -> None:
+        while True:
+            if self.pipelineError is not None:
+                raise BrokenPipeError(f"Capture stage failed! {self.pipelineError}")
+            try:
+                frames = self.captureQueue.get(timeout=0.5)
+                break
+            except queue.Empty:
+                continue
+
+        self.hasIngested = True
+        self.__releaseLatestFrames()
+        self.overlay.clear()
+        self.latestFrameDEPTH, self.latestFrameMain, self.latestFrameTrace, self.latestFrameSet = frames
+        self.__publishSkewStats()
+        self.__recordLatency()
+        self.__publishBufferStats()
+        with self.__droppedLock:
+            droppedCapture, droppedPublish = self.__droppedCaptureCount, self.__droppedPublishCount
+        self.droppedCaptureFrames.set(droppedCapture)
+        self.droppedPublishFrames.set(droppedPublish)
     
     def __initCalibrator(self):
         self.calibActive = True
@@ -285,6 +743,14 @@ class CameraUsingAgentBase(AgentBase, BindableAgent):
             nFrames=numPics, targetW=w, targetH=h, isCharucoBoard=isCharuco
         )
 
+    def __publishCalibrationProgress(self) -> None:
+        progress = self.calibrator.getProgress()
+        self.calibViews.set(progress["views"])
+        self.calibCoverage.set(progress["coverage"])
+        self.calibPoseBins.set(progress["poseBins"])
+        if progress["reprojectionError"] is not None:
+            self.calibReprojectionError.set(progress["reprojectionError"])
+
     def __finishCalibration(self):
         if not self.calibActive:
             raise RuntimeError("Called __finishCalibration when a calibration is not active!")
@@ -297,11 +763,21 @@ class CameraUsingAgentBase(AgentBase, BindableAgent):
             return
         
         self.calibrationUtil.setNewCalibration(outputCalib)
-        self.preprocessFrame = lambda frame : outputCalib.undistortFrame(frame)    
+        self.__setCalibration(outputCalib)
+
+    def __setCalibration(self, calibration : Optional[CameraCalibration]) -> None:
+        self.calibration = calibration
+        if calibration is not None:
+            calibration.setCropToRoi(self.cropToRoi)
+
+        if calibration is not None and self.undistortFullFrame:
+            self.preprocessFrame = lambda frame : self.__undistortIntoPool(calibration, frame)
+        else:
+            self.preprocessFrame = lambda frame : frame
     
     def onClose(self) -> None:
         super().onClose()
-        self.capture.close()
+        self.__closeCapture()
 
         if self.showFrames:
             cv2.destroyAllWindows()
@@ -319,7 +795,7 @@ class CameraUsingAgentBase(AgentBase, BindableAgent):
 
     def forceShutdown(self) -> None:
         super().forceShutdown()
-        self.capture.close()
+        self.__closeCapture()
 
     def getDescription(self):
         return "Camera Using Agent"
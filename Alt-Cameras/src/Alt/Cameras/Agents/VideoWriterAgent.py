@@ -1,46 +1,116 @@
 from typing import Any, Optional
-import cv2
+import time
 
 from Alt.Core.Agents import BindableAgent
 from .CameraUsingAgentBase import CameraUsingAgentBase
 from ..Captures import Capture
+from ..Captures.tools.session import SessionRecorder
 
 
 class VideoWriterAgent(CameraUsingAgentBase, BindableAgent):
+    """
+    Records the camera into a session (see Captures/tools/session.py), which ReplayCapture can play back.
+    Frames are encoded on a background thread, so recording does not slow down the capture loop.
+    """
+
     @classmethod
-    def bind(cls, capture: Capture, savePath: str, showFrames: bool):
-        return cls._getBindedAgent(capture=capture, savePath=savePath, showFrames=showFrames)
-    
-    def __init__(self, capture: Capture, savePath: str, showFrames: bool, **kwargs):
+    def bind(
+        cls,
+        capture: Capture,
+        savePath: str,
+        showFrames: bool,
+        recordDepth: bool = True,
+        segmentSeconds: float = 60,
+        dropPolicy: str = SessionRecorder.DROPOLDEST,
+        fourcc: str = "MJPG",
+    ):
+        return cls._getBindedAgent(
+            capture=capture,
+            savePath=savePath,
+            showFrames=showFrames,
+            recordDepth=recordDepth,
+            segmentSeconds=segmentSeconds,
+            dropPolicy=dropPolicy,
+            fourcc=fourcc,
+        )
+
+    def __init__(
+        self,
+        capture: Capture,
+        savePath: str,
+        showFrames: bool,
+        recordDepth: bool = True,
+        segmentSeconds: float = 60,
+        dropPolicy: str = SessionRecorder.DROPOLDEST,
+        fourcc: str = "MJPG",
+        **kwargs: Any
+    ):
+        """
+        Args:
+            capture: The camera to record
+            savePath: Session directory to record into
+            showFrames: Show frames in a local window (main thread only)
+            recordDepth: Also record depth frames (losslessly) for depth cameras
+            segmentSeconds: Start a new segment file every this many seconds
+            dropPolicy: Which frames to drop if the writer falls behind, see SessionRecorder
+            fourcc: Codec of the color video
+        """
         super().__init__(capture=capture, showFrames=showFrames, **kwargs)
         self.filePath: str = savePath
-        self.writer: Optional[cv2.VideoWriter] = None
+        self.recordDepth = recordDepth
+        self.segmentSeconds = segmentSeconds
+        self.dropPolicy = dropPolicy
+        self.fourcc = fourcc
+        self.recorder: Optional[SessionRecorder] = None
 
     def create(self) -> None:
         super().create()
-        fourcc = cv2.VideoWriter_fourcc(*"mp4v") # type: ignore
-        self.writer = cv2.VideoWriter(
+        self.recorder = SessionRecorder(
             self.filePath,
-            fourcc,
             self.capture.getFps(),
-            self.capture.getFrameShape()[:2][::-1],
+            segmentSeconds=self.segmentSeconds,
+            dropPolicy=self.dropPolicy,
+            fourcc=self.fourcc,
+            recordDepth=self.recordDepth,
         )
+        self.recorder.start()
+
+        self.recordedFrames = self.propertyOperator.createReadOnlyProperty("recorder.recordedFrames", 0)
+        self.droppedFrames = self.propertyOperator.createReadOnlyProperty("recorder.droppedFrames", 0)
+        self.queuedFrames = self.propertyOperator.createReadOnlyProperty("recorder.queuedFrames", 0)
 
     def runPeriodic(self) -> None:
         super().runPeriodic()
 
-        if self.writer is None:
-            raise ValueError("VideoWriter not initialized")
+        if self.recorder is None:
+            raise ValueError("SessionRecorder not initialized")
 
         if self.latestFrameMain is None:
             return
 
-        self.writer.write(self.latestFrameMain)
+        # frames can be reused buffers of the capture, and the writer gets to them later
+        depthFrame = self.latestFrameDEPTH.copy() if self.latestFrameDEPTH is not None else None
+        self.recorder.record(self.latestFrameMain.copy(), depthFrame, self.__getCaptureTimestamp())
+
+        stats = self.recorder.getStats()
+        self.recordedFrames.set(stats["recorded"])
+        self.droppedFrames.set(stats["dropped"])
+        self.queuedFrames.set(stats["queued"])
+
+    def __getCaptureTimestamp(self) -> float:
+        """When the latest frame was captured (time.monotonic)"""
+        if self.latestFrameTrace is not None:
+            spans = {span.name: span for span in self.latestFrameTrace.spans}
+            # the capture call returning, for captures that do not know when they captured
+            span = spans.get(self.EXPOSURESPAN) or spans.get("capture")
+            if span is not None:
+                return span.endNs / 1e9
+        return time.monotonic()
 
     def onClose(self) -> None:
         super().onClose()
-        if self.writer is not None:
-            self.writer.release()
+        if self.recorder is not None:
+            self.recorder.stop()
 
     def getDescription(self) -> str:
-        return "Ingests-Camera-Writes-Frames-To-File"
\ No newline at end of file
+        return "Ingests-Camera-Writes-Frames-To-File"
@@ -1,3 +1,4 @@
+import time
 from abc import ABC, abstractmethod
 from typing import Tuple, Optional
 
@@ -10,10 +11,32 @@ from ..Parameters.CameraConfig import CameraConfig
 class Capture(ABC):
     def __init__(self, name : str):
         self.__name = f"{name}_{self.__class__.__name__}"
+        self.__grabbedFrame: Optional[np.ndarray] = None
+        self.__captureTimestamp: float = 0.0
+        self.__sequenceNumber: int = 0
     
     def getName(self):
         return self.__name
 
+    def _markCaptured(self, timestamp : Optional[float] = None, sequenceNumber : Optional[int] = None) -> None:
+        """Implementations call this for every frame they return
+
+        Args:
+            timestamp: When the frame was captured (time.monotonic), as close to the exposure as known. Defaults to now
+            sequenceNumber: The camera's own frame counter, if it has one. Defaults to counting the frames returned
+        """
+        self.__captureTimestamp = timestamp if timestamp is not None else time.monotonic()
+        self.__sequenceNumber = sequenceNumber if sequenceNumber is not None else self.__sequenceNumber + 1
+
+    def getCaptureTimestamp(self) -> float:
+        """Returns when the last frame returned was captured (time.monotonic), 0 if the capture does not know"""
+        return self.__captureTimestamp
+
+    def getSequenceNumber(self) -> int:
+        """Returns the sequence number of the last frame returned, counting up from 1 (0 if unknown).
+        Skipped numbers are frames the camera produced that were never returned"""
+        return self.__sequenceNumber
+
     @abstractmethod
     def create(self) -> None:
         """Opens the capture, or throwing an exception if it cannot be opened"""
@@ -24,6 +47,17 @@ class Capture(ABC):
         """Returns the main capture frame"""
         pass
 
+    def grab(self) -> bool:
+        """Captures a frame without decoding it, retrieve() returns it. Lets several cameras capture at nearly the
+        same instant (see CaptureGroup). Captures that cannot split the two read the whole frame here"""
+        self.__grabbedFrame = self.getMainFrame()
+        return self.__grabbedFrame is not None
+
+    def retrieve(self) -> Optional[np.ndarray]:
+        """Returns the frame captured by the last grab(), None if there is none"""
+        frame, self.__grabbedFrame = self.__grabbedFrame, None
+        return frame
+
     @abstractmethod
     def getFps(self) -> int:
         """Returns fps of capture"""
@@ -0,0 +1,143 @@
+import collections
+import time
+from typing import Deque, Dict, List, Optional
+
+import numpy as np
+
+from .Capture import Capture
+
+
+class FrameSet:
+    """
+    Frames of every camera in a CaptureGroup, captured together
+    """
+
+    def __init__(self, sequence : int, frames : List[np.ndarray], timestamps : List[float]) -> None:
+        """
+        Args:
+            sequence: Number of this set, counting from 1
+            frames: Frame of each capture, in the group's order
+            timestamps: When each frame was grabbed (time.monotonic)
+        """
+        self.sequence = sequence
+        self.frames = frames
+        self.timestamps = timestamps
+
+    @property
+    def timestamp(self) -> float:
+        """Capture time of the set, the middle of its grabs"""
+        return (min(self.timestamps) + max(self.timestamps)) / 2
+
+    @property
+    def skewMs(self) -> float:
+        """Time between the first and last grab of the set"""
+        return (max(self.timestamps) - min(self.timestamps)) * 1000
+
+
+class CaptureGroup(Capture):
+    """
+    Several captures used as one, eg all the cameras on a robot. grab() is triggered on every capture back to back,
+    and only then are the frames retrieve()d (decoded), so the frames of a set are captured as close together as possible.
+
+    getMainFrame() returns the frame of the first capture, getFrameSet() / getLastFrameSet() all of them.
+    NOTE: Captures with their own capture thread (OpenCVCapture useCaptureThread) hand out whatever they grabbed last,
+    so they are not synchronized by the group.
+    """
+
+    SKEWWINDOW: int = 256 # sets the skew statistics are taken over
+
+    def __init__(self, name : str, captures : List[Capture]) -> None:
+        """
+        Args:
+            name: Name of the group
+            captures: The captures, the first one is the main frame
+        """
+        if not captures:
+            raise ValueError("CaptureGroup needs at least one capture!")
+
+        super().__init__(name)
+        self.captures = captures
+        self.__sequence = 0
+        self.__failedSets = 0
+        self.__skewsMs: Deque[float] = collections.deque(maxlen=self.SKEWWINDOW)
+        self.__lastFrameSet: Optional[FrameSet] = None
+
+    def create(self) -> None:
+        """
+        Open every capture
+
+        Raises:
+            Whatever the failing capture raised, after closing the ones already opened
+        """
+        created: List[Capture] = []
+        try:
+            for capture in self.captures:
+                capture.create()
+                created.append(capture)
+        except Exception:
+            for capture in created:
+                capture.close()
+            raise
+
+    def getFrameSet(self) -> Optional[FrameSet]:
+        """
+        Capture a frame from every camera
+
+        Returns:
+            The set, or None if any of the captures failed
+        """
+        timestamps = []
+        grabbed = True
+        for capture in self.captures:
+            grabbed = capture.grab() and grabbed
+            timestamps.append(time.monotonic())
+
+        # decoding is the slow part, and happens after every camera has captured
+        frames = [capture.retrieve() for capture in self.captures]
+
+        if not grabbed or any(frame is None for frame in frames):
+            self.__failedSets += 1
+            return None
+
+        self.__sequence += 1
+        frameSet = FrameSet(self.__sequence, frames, timestamps)  # type: ignore[arg-type]
+        self.__skewsMs.append(frameSet.skewMs)
+        self.__lastFrameSet = frameSet
+        self._markCaptured(frameSet.timestamp, frameSet.sequence)
+        return frameSet
+
+    def getLastFrameSet(self) -> Optional[FrameSet]:
+        """The set the last getMainFrame() / getFrameSet() returned from"""
+        return self.__lastFrameSet
+
+    def getMainFrame(self) -> Optional[np.ndarray]:
+        """
+        Capture a new set, and return the frame of the first capture. The whole set is getLastFrameSet()
+        """
+        frameSet = self.getFrameSet()
+        if frameSet is None:
+            return None
+        return frameSet.frames[0]
+
+    def getSkewStats(self) -> Dict[str, float]:
+        """
+        Returns:
+            Sets captured, sets that failed, and the p50, p99 and max skew (ms) of the last SKEWWINDOW sets
+        """
+        stats: Dict[str, float] = {"sets": self.__sequence, "failedSets": self.__failedSets}
+        if self.__skewsMs:
+            skews = np.fromiter(self.__skewsMs, dtype=np.float64)
+            p50, p99 = np.percentile(skews, [50, 99])
+            stats.update(skewP50Ms=float(p50), skewP99Ms=float(p99), skewMaxMs=float(skews.max()))
+        return stats
+
+    def getFps(self) -> int:
+        """The group runs at the rate of its slowest capture"""
+        return min(capture.getFps() for capture in self.captures)
+
+    def isOpen(self) -> bool:
+        return all(capture.isOpen() for capture in self.captures)
+
+    def close(self) -> None:
+        for capture in self.captures:
+            capture.close()
@@ -1,4 +1,4 @@
-from typing import Tuple, Optional
+from typing import Any, Tuple, Optional
 
 import numpy as np
 
@@ -14,29 +14,46 @@ class D435Capture(depthCamera, CaptureWIntrinsics):
     Capture implementation for Intel RealSense D435 depth camera
     """
 
-    def __init__(self, name : str, res: D435IResolution, realsenseSerialId=None) -> None:
+    def __init__(
+        self,
+        name : str,
+        res: D435IResolution,
+        realsenseSerialId=None,
+        alignDepthToColor : bool = False,
+        undistortDepth : bool = False,
+    ) -> None:
         """
         Initialize a D435 capture with the specified resolution
 
         Args:
             res: The resolution setting for the camera
+            realsenseSerialId: Serial id of the camera to open, None for any
+            alignDepthToColor: Reproject depth into the color camera, so both frames share pixels (and intrinsics)
+            undistortDepth: Also undistort depth frames. Off by default, full resolution depth remaps are expensive
         """
         super().__init__(name)
         self.res: D435IResolution = res
         self.realSenseSerialId = realsenseSerialId
+        self.alignDepthToColor = alignDepthToColor
+        self.undistortDepth = undistortDepth
         self.realsenseHelper: Optional[realsense2Helper] = None
 
     def create(self) -> None:
         """
         Initialize the RealSense camera
         """
-        self.realsenseHelper = realsense2Helper(self.res, self.realSenseSerialId)
+        self.realsenseHelper = realsense2Helper(
+            self.res,
+            self.realSenseSerialId,
+            alignDepthToColor=self.alignDepthToColor,
+            undistortDepth=self.undistortDepth,
+        )
         intr: CameraIntrinsics = self.realsenseHelper.getCameraIntrinsics()
         super().setIntrinsics(intr)
 
     def getMainFrame(self) -> Optional[np.ndarray]:
         """
-        Get the color frame from the camera
+        Get the color frame from the camera. Uses the frameset getDepthFrame last fetched, if its color was not returned yet
 
         Returns:
             The color frame as a numpy array
@@ -44,7 +61,9 @@ class D435Capture(depthCamera, CaptureWIntrinsics):
         if self.realsenseHelper is None:
             raise RuntimeError("Capture not created, call create() first")
 
-        return self.realsenseHelper.getDepthAndColor()[1]
+        frame = self.realsenseHelper.getColor()
+        self.__markCaptured(frame)
+        return frame
 
     def getFps(self) -> int:
         """
@@ -60,12 +79,18 @@ class D435Capture(depthCamera, CaptureWIntrinsics):
 
     def getDepthFrame(self) -> Optional[np.ndarray]:
         """
-        Get the depth frame from the camera
+        Get the depth frame from the camera. Only depth is converted, so depth only pipelines do not pay for color.
+        Uses the frameset getMainFrame last fetched, if its depth was not returned yet
 
         Returns:
             The depth frame as a numpy array
         """
-        return self.getDepthAndColorFrame()[0]  # linked together
+        if self.realsenseHelper is None:
+            raise RuntimeError("Capture not created, call create() first")
+
+        frame = self.realsenseHelper.getDepth()
+        self.__markCaptured(frame)
+        return frame
 
     def getDepthAndColorFrame(self) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
         """
@@ -77,7 +102,13 @@ class D435Capture(depthCamera, CaptureWIntrinsics):
         if self.realsenseHelper is None:
             raise RuntimeError("Capture not created, call create() first")
 
-        return self.realsenseHelper.getDepthAndColor()
+        frames = self.realsenseHelper.getDepthAndColor()
+        self.__markCaptured(frames)
+        return frames
+
+    def __markCaptured(self, frames : Optional[Any]) -> None:
+        if frames is not None and self.realsenseHelper is not None:
+            self._markCaptured(self.realsenseHelper.lastCaptureTimestamp, self.realsenseHelper.lastFrameNumber)
 
     def isOpen(self) -> bool:
         """
@@ -15,6 +15,7 @@ class FakeCamera(Capture):
         pass
 
     def getMainFrame(self) -> np.ndarray:
+        self._markCaptured()
         return self.fakeFrame
 
     def getFps(self) -> int:
@@ -36,12 +37,15 @@ class FakeDepthCamera(depthCamera):
         pass
 
     def getDepthAndColorFrame(self) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        self._markCaptured()
         return (self.fakeDepth, self.fakeColor)
 
     def getDepthFrame(self) -> Optional[np.ndarray]:
+        self._markCaptured()
         return self.fakeDepth
 
     def getMainFrame(self) -> Optional[np.ndarray]:
+        self._markCaptured()
         return self.fakeColor
 
     def getFps(self) -> int:
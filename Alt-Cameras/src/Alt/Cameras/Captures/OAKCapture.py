@@ -41,7 +41,9 @@ class OAKCapture(depthCamera, CaptureWIntrinsics):
         if self.depthAiHelper is None:
             raise RuntimeError("Capture not created, call create() first")
 
-        return (self.depthAiHelper.getDepthFrame(), self.depthAiHelper.getColorFrame())
+        depthFrame, colorFrame = self.depthAiHelper.getDepthFrame(), self.depthAiHelper.getColorFrame()
+        self.__markColorCaptured()
+        return depthFrame, colorFrame
 
     def getDepthFrame(self) -> Optional[np.ndarray]:
         """
@@ -65,7 +67,13 @@ class OAKCapture(depthCamera, CaptureWIntrinsics):
         if self.depthAiHelper is None:
             raise RuntimeError("Capture not created, call create() first")
 
-        return self.depthAiHelper.getColorFrame()
+        colorFrame = self.depthAiHelper.getColorFrame()
+        self.__markColorCaptured()
+        return colorFrame
+
+    def __markColorCaptured(self) -> None:
+        assert self.depthAiHelper is not None
+        self._markCaptured(self.depthAiHelper.lastColorTimestamp, self.depthAiHelper.lastColorSequence)
 
     def getFps(self) -> int:
         """
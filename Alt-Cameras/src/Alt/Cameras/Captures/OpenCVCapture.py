@@ -1,30 +1,62 @@
-from typing import Optional
+from typing import Dict, Optional
 
 import cv2
 import numpy as np
-from Alt.Core import Platform, DEVICEPLATFORM
+from Alt.Core import Platform, DEVICEPLATFORM, getChildLogger
 
 from . import utils
 from .Capture import Capture
+from .tools.frameGrabber import FrameGrabber
 
 DefaultUseV4L2 = DEVICEPLATFORM == Platform.LINUX
+Sentinel = getChildLogger("OpenCVCapture")
 
 class OpenCVCapture(Capture):
     """
     """
 
-    def __init__(self, name : str, capturePath: str, useV4L2Backend : bool = DefaultUseV4L2, flushTimeMS: int = -1) -> None:
+    GRABTIMEOUTS: float = 1.0 # how long getMainFrame waits for a new frame when using the capture thread
+
+    def __init__(
+        self,
+        name : str,
+        capturePath: str,
+        useV4L2Backend : bool = DefaultUseV4L2,
+        flushTimeMS: int = -1,
+        useCaptureThread: bool = False,
+        copyFrames: bool = False,
+        bufferSize: Optional[int] = None,
+        fourcc: Optional[str] = None,
+        convertRgb: bool = True,
+    ) -> None:
         """
         Initialize a opencv capture with the specified video file path
 
         Args:
             videoFilePath: Path to the opencv camera stream (could be a file, network location, camera, etc)
             flushTimeMS: Time in milliseconds to flush the capture buffer (default: -1, no flush)
+            useCaptureThread: Grab frames continuously on a background thread, so getMainFrame always returns the newest frame
+                without blocking on the camera. Replaces flushing (default: False)
+            copyFrames: With the capture thread, return a copy of each frame instead of the grabber's reused buffer.
+                Use this if frames are kept after the next getMainFrame call (default: False)
+            bufferSize: Frames the driver queues (CAP_PROP_BUFFERSIZE). 1 means a read never returns a stale frame,
+                without flushing. None keeps the driver default (default: None)
+            fourcc: Pixel format to ask the camera for, eg MJPG (compressed, decoded on the cpu), YUYV (raw, more usb
+                bandwidth) or GREY (mono sensors). None keeps the camera default (default: None)
+            convertRgb: Convert frames to BGR (CAP_PROP_CONVERT_RGB). Turn off for mono pipelines, frames then come in the
+                camera's own format, eg (h, w) for GREY or (h, w, 2) for YUYV where [:, :, 0] is the luma (default: True)
         """
         super().__init__(name)
         self.path: str = capturePath
         self.useV4L2Backend = useV4L2Backend
         self.flushTimeMS: int = flushTimeMS
+        self.useCaptureThread = useCaptureThread
+        self.copyFrames = copyFrames
+        self.bufferSize = bufferSize
+        self.fourcc = fourcc
+        self.convertRgb = convertRgb
+        self.grabber: Optional[FrameGrabber] = None
+        self.__blackFrame: Optional[np.ndarray] = None # returned when a read fails, allocated once
 
     def create(self) -> None:
         """
@@ -38,11 +70,34 @@ class OpenCVCapture(Capture):
         else:
             self.cap = cv2.VideoCapture(self.path)
 
+        self.__applyStreamOptions()
+
         if not self.__testCapture(self.cap):
             raise BrokenPipeError(f"Failed to open video camera! {self.path=} {self.useV4L2Backend=}")
 
+        if self.useCaptureThread:
+            ret, frame = self.cap.read()
+            if not ret or frame is None:
+                raise BrokenPipeError(f"Failed to read from video camera! {self.path=}")
+
+            self.grabber = FrameGrabber(self.cap, frame.shape, frame.dtype, name=f"{self.getName()}_Grabber")
+            self.grabber.start()
                 
 
+    def __applyStreamOptions(self) -> None:
+        """Set the stream options before the first read, most drivers ignore changes once streaming"""
+        options = []
+        if self.fourcc is not None:
+            options.append(("fourcc", cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc)))  # type: ignore
+        if self.bufferSize is not None:
+            options.append(("bufferSize", cv2.CAP_PROP_BUFFERSIZE, self.bufferSize))
+        if not self.convertRgb:
+            options.append(("convertRgb", cv2.CAP_PROP_CONVERT_RGB, 0))
+
+        for optionName, prop, value in options:
+            if not self.cap.set(prop, value):
+                Sentinel.warning(f"{self.getName()}: backend does not support {optionName}={value}")
+
     def __testCapture(self, cap: cv2.VideoCapture) -> bool:
         """
         Test if the capture can be read from
@@ -68,20 +123,112 @@ class OpenCVCapture(Capture):
         """
         Get the next color frame from the video
 
+        NOTE: With the capture thread, the frame is one of the grabber's reused buffers (unless copyFrames is set).
+        It is only valid until the next getMainFrame call, copy it to keep it longer.
+
         Returns:
             The next frame as a numpy array
         """
         self.__ensureCap()
 
+        if self.grabber is not None:
+            latest = self.grabber.getLatest(self.GRABTIMEOUTS)
+            if latest is None:
+                return self.__getBlackFrame()
+
+            frame, timestamp, sequence = latest
+            # the grabber's sequence skips the frames it replaced before they were read
+            self._markCaptured(timestamp, sequence)
+            if self.copyFrames:
+                return frame.copy()
+            return frame
+
         if self.flushTimeMS > 0:
             utils.flushCapture(self.cap, self.flushTimeMS)
 
         ret, frame = self.cap.read()
         if not ret or frame is None:
             # Return a black frame if we can't read from the capture
-            return np.zeros((480, 640, 3), dtype=np.uint8)
+            return self.__getBlackFrame()
+        self._markCaptured()
+        return frame
+
+    def __getBlackFrame(self) -> np.ndarray:
+        if self.__blackFrame is None:
+            self.__blackFrame = np.zeros((480, 640, 3), dtype=np.uint8)
+        else:
+            # the last one handed out may have been drawn on
+            self.__blackFrame.fill(0)
+        return self.__blackFrame
+
+    def readInto(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Read the next frame into a preallocated array, so reading does not allocate.
+
+        Args:
+            frame: Array of the capture's frame shape and dtype (see getFrameShape)
+
+        Returns:
+            The frame, which is the given array unless its shape or dtype did not fit (then a new array is returned).
+            None if reading failed
+        """
+        self.__ensureCap()
+
+        if self.grabber is not None:
+            latest = self.grabber.getLatest(self.GRABTIMEOUTS)
+            if latest is None:
+                return None
+            grabbed, timestamp, sequence = latest
+            self._markCaptured(timestamp, sequence)
+            if grabbed.shape != frame.shape or grabbed.dtype != frame.dtype:
+                return grabbed.copy()
+            np.copyto(frame, grabbed)
+            return frame
+
+        if self.flushTimeMS > 0:
+            utils.flushCapture(self.cap, self.flushTimeMS)
+
+        ret, read = self.cap.read(frame)
+        if not ret or read is None:
+            return None
+        self._markCaptured()
+        return read
+
+    def grab(self) -> bool:
+        """
+        Capture a frame without decoding it, retrieve() decodes it. Without the capture thread this is just
+        cv2.VideoCapture.grab(), so several cameras can be grabbed back to back (see CaptureGroup)
+        """
+        if self.grabber is not None:
+            return super().grab()
+
+        self.__ensureCap()
+        if not self.cap.grab():
+            return False
+        self._markCaptured()
+        return True
+
+    def retrieve(self) -> Optional[np.ndarray]:
+        """
+        Decode the frame captured by the last grab()
+        """
+        if self.grabber is not None:
+            return super().retrieve()
+
+        self.__ensureCap()
+        ret, frame = self.cap.retrieve()
+        if not ret:
+            return None
         return frame
 
+    def getCaptureStats(self) -> Dict[str, int]:
+        """
+        Frame counts from the capture thread (grabbed, dropped, duplicates, readFailures). Empty if not using it.
+        """
+        if self.grabber is None:
+            return {}
+        return self.grabber.getStats()
+
     def getFps(self) -> int:
         """
         Get the frames per second of the video
@@ -110,6 +257,9 @@ class OpenCVCapture(Capture):
         Close the capture and release any resources
         """
         self.__ensureCap()
+        if self.grabber is not None:
+            self.grabber.stop()
+            self.grabber = None
         self.cap.release()
 
     def setFps(self, fps : int) -> bool:
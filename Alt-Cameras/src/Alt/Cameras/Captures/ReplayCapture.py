@@ -0,0 +1,228 @@
+import time
+from enum import Enum
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .depthCamera import depthCamera
+from .tools.session import SessionSegment, locateFrame, openSession
+
+
+class ReplayMode(Enum):
+    REALTIME = "realtime" # paced by the recorded timestamps, frames are skipped when the reader falls behind (like a real camera)
+    FIXEDRATE = "fixedrate" # every frame in order, at most fps frames a second
+    FAST = "fast" # every frame in order, as fast as they can be read
+
+
+class ReplayCapture(depthCamera):
+    """
+    Plays back a recorded session (color, optional depth and capture timestamps) as a camera, so camera agent
+    pipelines can be run and benchmarked reproducibly without the hardware. See tools/session.py for the format.
+
+    FAST and FIXEDRATE return every frame in order, so runs are deterministic. REALTIME behaves like a live camera.
+    """
+
+    SEEKGRABLIMIT: int = 30 # skips shorter than this grab through the video instead of seeking, seeking is slow and not always exact
+
+    def __init__(
+        self,
+        name : str,
+        sessionPath : str,
+        mode : ReplayMode = ReplayMode.FAST,
+        fps : Optional[float] = None,
+        loop : bool = False,
+    ) -> None:
+        """
+        Args:
+            name: Name of the capture
+            sessionPath: A recorded session directory, a single segment, or a plain video file
+            mode: How playback is paced
+            fps: Rate for FIXEDRATE, defaults to the recorded fps
+            loop: Start over at the end instead of closing
+        """
+        super().__init__(name)
+        self.sessionPath = sessionPath
+        self.mode = mode
+        self.requestedFps = fps
+        self.loop = loop
+
+        self.segments: List[SessionSegment] = []
+        self.__timeline: np.ndarray = np.zeros(0) # recorded time of each frame, from the start of the session (seconds)
+        self.__cap: Optional[cv2.VideoCapture] = None
+        self.__capSegment: int = -1
+        self.__capPosition: int = 0 # next frame the open video will read
+        self.__nextIndex: int = 0
+        self.__currentIndex: int = -1
+        self.__clockStart: float = 0 # monotonic time that the frame at __clockIndex is due
+        self.__clockIndex: int = 0
+        self.__finished: bool = False
+        self.__peeked: Optional[Tuple[int, np.ndarray]] = None # frame read by getFrameShape, handed out next
+
+    def create(self) -> None:
+        """
+        Open the session
+
+        Raises:
+            FileNotFoundError: If there is no session at the path
+        """
+        self.segments = openSession(self.sessionPath)
+        timestamps = np.concatenate([segment.timestamps[: segment.frameCount] for segment in self.segments])
+        self.__timeline = timestamps - timestamps[0]
+        self.fps: float = self.requestedFps or self.segments[0].fps
+        self.seek(0)
+
+    def seek(self, index : int) -> None:
+        """
+        Continue playback from a frame. Pacing restarts from that frame.
+
+        Args:
+            index: Frame index in the whole session
+        """
+        if not 0 <= index < self.getFrameCount():
+            raise IndexError(f"Frame {index} is outside the session (0-{self.getFrameCount() - 1})")
+
+        self.__nextIndex = index
+        self.__clockIndex = index
+        self.__clockStart = time.monotonic()
+        self.__finished = False
+
+    def seekTime(self, seconds : float) -> None:
+        """
+        Continue playback from the first frame recorded at or after a time.
+
+        Args:
+            seconds: Time from the start of the session
+        """
+        index = int(np.searchsorted(self.__timeline, seconds, side="left"))
+        self.seek(min(index, self.getFrameCount() - 1))
+
+    def getFrameCount(self) -> int:
+        """Number of frames in the session"""
+        return len(self.__timeline)
+
+    def getFrameIndex(self) -> int:
+        """Index of the last frame returned, -1 before the first"""
+        return self.__currentIndex
+
+    def getFrameTimestamp(self) -> float:
+        """Recorded capture time of the last frame returned (seconds, from the start of the session)"""
+        if self.__currentIndex < 0:
+            return 0.0
+        return float(self.__timeline[self.__currentIndex])
+
+    def __waitForFrame(self, index : int) -> int:
+        """Sleeps until a frame is due, returns the frame to play"""
+        if self.mode == ReplayMode.FAST:
+            return index
+
+        if self.mode == ReplayMode.FIXEDRATE:
+            dueAt = self.__clockStart + (index - self.__clockIndex) / self.fps
+        else:
+            startOffset = self.__timeline[self.__clockIndex]
+            elapsed = time.monotonic() - self.__clockStart + startOffset
+            # the newest frame that would have been captured by now, a live camera never hands out old ones
+            latest = int(np.searchsorted(self.__timeline, elapsed, side="right")) - 1
+            if latest > index:
+                return min(latest, self.getFrameCount() - 1)
+            dueAt = self.__clockStart + self.__timeline[index] - startOffset
+
+        delay = dueAt - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        return index
+
+    def __readColor(self, index : int) -> Optional[np.ndarray]:
+        if self.__peeked is not None:
+            peekedIndex, frame = self.__peeked
+            self.__peeked = None
+            if peekedIndex == index:
+                return frame
+
+        segmentIdx, localIdx = locateFrame(self.segments, index)
+        if self.__cap is None or self.__capSegment != segmentIdx:
+            if self.__cap is not None:
+                self.__cap.release()
+            self.__cap = cv2.VideoCapture(self.segments[segmentIdx].colorPath)
+            self.__capSegment = segmentIdx
+            self.__capPosition = 0
+
+        skip = localIdx - self.__capPosition
+        if skip < 0 or skip > self.SEEKGRABLIMIT:
+            self.__cap.set(cv2.CAP_PROP_POS_FRAMES, localIdx)
+        else:
+            for _ in range(skip):
+                # grab without decoding
+                self.__cap.grab()
+
+        ret, frame = self.__cap.read()
+        self.__capPosition = localIdx + 1
+        if not ret:
+            return None
+        return frame
+
+    def __advance(self) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        if self.__finished:
+            return None, None
+
+        if self.__nextIndex >= self.getFrameCount():
+            if not self.loop:
+                self.__finished = True
+                return None, None
+            self.seek(0)
+
+        index = self.__waitForFrame(self.__nextIndex)
+        color = self.__readColor(index)
+        segmentIdx, localIdx = locateFrame(self.segments, index)
+        depth = self.segments[segmentIdx].getDepth(localIdx)
+
+        self.__currentIndex = index
+        self.__nextIndex = index + 1
+        # numbered by position in the session, so frames skipped by REALTIME show up as gaps
+        self._markCaptured(sequenceNumber=index + 1)
+        return depth, color
+
+    def getDepthAndColorFrame(self) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """
+        Get the next depth and color frame
+
+        Returns:
+            (depth, color). Depth is None if the session has none, both are None once playback ended
+        """
+        return self.__advance()
+
+    def getDepthFrame(self) -> Optional[np.ndarray]:
+        """
+        Get the next depth frame (uint16)
+        """
+        return self.__advance()[0]
+
+    def getMainFrame(self) -> Optional[np.ndarray]:
+        """
+        Get the next color frame
+        """
+        return self.__advance()[1]
+
+    def getFrameShape(self) -> Tuple[int, ...]:
+        """Shape of the color frames, without using up a frame of the playback"""
+        index = min(self.__nextIndex, self.getFrameCount() - 1)
+        frame = self.__readColor(index)
+        if frame is None:
+            raise RuntimeError("Capture mainframe is None!")
+        self.__peeked = (index, frame)
+        return frame.shape
+
+    def getFps(self) -> int:
+        return int(round(self.fps))
+
+    def isOpen(self) -> bool:
+        """
+        Open until playback reaches the end (never, if looping)
+        """
+        return bool(self.segments) and not self.__finished
+
+    def close(self) -> None:
+        if self.__cap is not None:
+            self.__cap.release()
+            self.__cap = None
+        self.__finished = True
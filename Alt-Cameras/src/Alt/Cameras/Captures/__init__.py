@@ -6,4 +6,6 @@ from .depthCamera import depthCamera
 from .OpenCVCapture import OpenCVCapture
 from .OAKCapture import OAKCapture, OAKDLITEResolution
 from .D435Capture import D435Capture, D435IResolution
-from .FakeCapture import FakeCamera, FakeDepthCamera
\ No newline at end of file
+from .FakeCapture import FakeCamera, FakeDepthCamera
+from .ReplayCapture import ReplayCapture, ReplayMode
+from .CaptureGroup import CaptureGroup, FrameSet
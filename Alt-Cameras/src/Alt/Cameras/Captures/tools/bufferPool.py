@@ -0,0 +1,88 @@
+import collections
+import threading
+from typing import Deque, Dict, List, Tuple
+
+import numpy as np
+
+BufferKey = Tuple[Tuple[int, ...], str]
+
+
+class FrameBufferPool:
+    """
+    Recycles frame sized arrays, so a capture loop running at camera rate does not allocate (and free) several full
+    frames every frame. Buffers are handed out by acquire() and come back once every holder released them.
+
+    Arrays that did not come from the pool can be passed to retain()/release(), they are ignored. Thread safe, the
+    capture thread can acquire what the agent thread releases.
+    """
+
+    def __init__(self, maxFreePerShape: int = 8) -> None:
+        """
+        Args:
+            maxFreePerShape: Released buffers kept for reuse per shape and dtype, more than this are let go
+        """
+        self.maxFreePerShape = maxFreePerShape
+        self.__free: Dict[BufferKey, Deque[np.ndarray]] = collections.defaultdict(collections.deque)
+        # id of an outstanding buffer -> (buffer, holders)
+        self.__outstanding: Dict[int, List] = {}
+        self.__lock = threading.Lock()
+        self.__allocations = 0
+        self.__reuses = 0
+
+    def acquire(self, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        """
+        Returns:
+            An array of shape and dtype with undefined contents, held once by the caller
+        """
+        key = (tuple(int(dim) for dim in shape), np.dtype(dtype).str)
+        with self.__lock:
+            free = self.__free[key]
+            if free:
+                buffer = free.pop()
+                self.__reuses += 1
+            else:
+                buffer = np.empty(key[0], dtype=dtype)
+                self.__allocations += 1
+            self.__outstanding[id(buffer)] = [buffer, 1]
+        return buffer
+
+    def owns(self, buffer: np.ndarray) -> bool:
+        """If buffer is a pool buffer that is currently held"""
+        with self.__lock:
+            entry = self.__outstanding.get(id(buffer))
+            return entry is not None and entry[0] is buffer
+
+    def retain(self, buffer: np.ndarray) -> None:
+        """Add a holder, eg when a frame is handed to another stage that releases it on its own"""
+        with self.__lock:
+            entry = self.__outstanding.get(id(buffer))
+            if entry is not None and entry[0] is buffer:
+                entry[1] += 1
+
+    def release(self, buffer: np.ndarray) -> None:
+        """Drop a holder. Once the last holder released it, the buffer is reused by a later acquire()"""
+        with self.__lock:
+            entry = self.__outstanding.get(id(buffer))
+            if entry is None or entry[0] is not buffer:
+                return
+            entry[1] -= 1
+            if entry[1] > 0:
+                return
+            del self.__outstanding[id(buffer)]
+
+            free = self.__free[(buffer.shape, buffer.dtype.str)]
+            if len(free) < self.maxFreePerShape:
+                free.append(buffer)
+
+    def getStats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Buffers allocated and reused since the start, and currently outstanding (held) and free
+        """
+        with self.__lock:
+            return {
+                "allocations": self.__allocations,
+                "reuses": self.__reuses,
+                "outstanding": len(self.__outstanding),
+                "free": sum(len(free) for free in self.__free.values()),
+            }
@@ -1,4 +1,10 @@
+import hashlib
 import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Optional
+
 import numpy as np
 import cv2
 
@@ -12,24 +18,225 @@ Sentinel = getChildLogger("Calibrator")
 
 CALIBRATIONPHOTOPATH = str(user_tmp_dir / "ALT" / "Calibration")
 CALIBRATIONPHOTOFILEENDING = ".jpg"
+CORNERCACHEDIR = ".corners" # detected corners of each picture, inside the picture directory
+DETECTIONMAXSIDE = 960 # boards are found on a copy downscaled to this, then refined at full resolution
 os.makedirs(CALIBRATIONPHOTOPATH, exist_ok=True)
+
+_CHESSBOARD = "chessboard"
+_CHARUCO = "charuco"
+_SUBPIXCRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+
+
+def _makeCharucoBoard(boardSpec : tuple) -> "cv2.aruco.CharucoBoard":
+    arucoboarddim, squareLength, markerLength, dictBytes, dictShape, markerSize, maxCorrectionBits = boardSpec
+    bytesList = np.frombuffer(dictBytes, dtype=np.uint8).reshape(dictShape)
+    dictionary = cv2.aruco.Dictionary(bytesList, markerSize, maxCorrectionBits)
+    return cv2.aruco.CharucoBoard(
+        size=arucoboarddim,
+        squareLength=squareLength,
+        markerLength=markerLength,
+        dictionary=dictionary,
+    )
+
+
+def _downscale(gray : np.ndarray) -> tuple[np.ndarray, float]:
+    scale = DETECTIONMAXSIDE / max(gray.shape)
+    if scale >= 1:
+        return gray, 1.0
+    return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA), scale
+
+
+def _refine(gray : np.ndarray, corners : np.ndarray, scale : float) -> np.ndarray:
+    """Move corners found on the downscaled image back to full resolution, and refine them there"""
+    corners = (corners.astype(np.float32) + 0.5) / scale - 0.5
+    return cv2.cornerSubPix(gray, corners, (11, 11), (-1, -1), _SUBPIXCRITERIA)
+
+
+def detectChessboard(gray : np.ndarray, chessBoardDim : tuple[int, int]) -> Optional[np.ndarray]:
+    """
+    Returns:
+        The refined inner corners of the chessboard, None if it was not found
+    """
+    small, scale = _downscale(gray)
+    ret, corners = cv2.findChessboardCorners(small, chessBoardDim, None)
+    if not ret:
+        return None
+    return _refine(gray, corners, scale)
+
+
+def detectCharuco(gray : np.ndarray, boardSpec : tuple) -> tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    Args:
+        boardSpec: See Calibrator.charucoBoardSpec
+
+    Returns:
+        The refined charuco corners and their ids, (None, None) if the board was not found
+    """
+    detector = cv2.aruco.CharucoDetector(_makeCharucoBoard(boardSpec))
+
+    small, scale = _downscale(gray)
+    charuco_corners, charuco_ids, _, _ = detector.detectBoard(small)
+    if charuco_corners is None or len(charuco_corners) == 0:
+        return None, None
+    return _refine(gray, charuco_corners, scale), charuco_ids
+
+
+def _chessboardObjectPoints(chessBoardDim : tuple[int, int]) -> np.ndarray:
+    # prepare object points, like (0,0,0), (1,0,0), (2,0,0) ....,(6,5,0)
+    objp = np.zeros((chessBoardDim[0] * chessBoardDim[1], 3), np.float32)
+    objp[:, :2] = (
+        np.mgrid[0 : chessBoardDim[0], 0 : chessBoardDim[1]].T.reshape(-1, 2) * 2
+    )
+    return objp
+
+
+def _cachePath(imageFile : str, boardType : str, boardSpec : tuple) -> str:
+    stat = os.stat(imageFile)
+    key = repr((os.path.basename(imageFile), stat.st_size, stat.st_mtime_ns, boardType, boardSpec, DETECTIONMAXSIDE))
+    digest = hashlib.sha1(key.encode()).hexdigest()
+    return os.path.join(os.path.dirname(imageFile), CORNERCACHEDIR, digest + ".npz")
+
+
+def _detectImageFile(job : tuple) -> tuple[tuple[int, int], Optional[np.ndarray], Optional[np.ndarray]]:
+    """Process pool worker. Returns (image (width, height), corners, ids), from the cache if this picture was seen before"""
+    imageFile, boardType, boardSpec = job
+    cachePath = _cachePath(imageFile, boardType, boardSpec)
+    try:
+        with np.load(cachePath) as cached:
+            imageWH = tuple(int(v) for v in cached["imageWH"])
+            corners = cached["corners"] if "corners" in cached else None
+            ids = cached["ids"] if "ids" in cached else None
+            return imageWH, corners, ids
+    except (OSError, KeyError, ValueError):
+        pass
+
+    gray = cv2.imread(imageFile, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        raise RuntimeError(f"Could not read calibration picture {imageFile}")
+    imageWH = gray.shape[::-1]
+
+    if boardType == _CHESSBOARD:
+        corners, ids = detectChessboard(gray, boardSpec), None
+    else:
+        corners, ids = detectCharuco(gray, boardSpec)
+
+    arrays = {"imageWH": np.array(imageWH)}
+    if corners is not None:
+        arrays["corners"] = corners
+    if ids is not None:
+        arrays["ids"] = ids
+    os.makedirs(os.path.dirname(cachePath), exist_ok=True)
+    # written under another name first, so a concurrent reader never sees half a file
+    tmpPath = cachePath + f".{os.getpid()}.tmp.npz"
+    np.savez(tmpPath, **arrays)
+    os.replace(tmpPath, cachePath)
+    return imageWH, corners, ids
+
+
+def _solveViews(
+    objPoints : list[np.ndarray], imgPoints : list[np.ndarray], imageWH : tuple[int, int]
+) -> tuple[int, float, np.ndarray, np.ndarray, set[int]]:
+    """Solve the calibration with the views, for the running error and the board tilts (see Calibrator)"""
+    rms, mtx, dist, rvecs, _ = cv2.calibrateCamera(objPoints, imgPoints, imageWH, None, None)
+
+    # the board poses move as the intrinsics converge, so they are all binned again
+    poseBins = set()
+    for rvec in rvecs:
+        rotation, _ = cv2.Rodrigues(rvec)
+        normal = rotation[:, 2]
+        if normal[2] < 0:
+            normal = -normal
+        tiltDeg = np.degrees(np.arccos(min(1.0, normal[2])))
+        if tiltDeg < Calibrator.FRONTALTILTDEG:
+            poseBins.add(0)
+        else:
+            direction = np.arctan2(normal[1], normal[0])
+            poseBins.add(1 + int(((direction + np.pi / 4) % (2 * np.pi)) // (np.pi / 2)))
+    return len(imgPoints), float(rms), mtx, dist, poseBins
+
+
 class Calibrator:
+    """
+    Takes calibration pictures and solves the camera calibration from them.
+
+    Corners are detected as each picture is taken, and a running calibration tracks how much of the image the board
+    has covered, how many different board tilts were seen, and the reprojection error. Picture taking finishes as soon
+    as those are good enough, or after nFrames pictures.
+
+    The running calibration is solved on a worker thread, as cv2.calibrateCamera over every view gets slower with each
+    one. A picture taken while a solve is running is included in the next solve, which starts once that one is done, so
+    the tilts and error lag the newest pictures by a solve.
+
+    nFrames caps the pictures taken (with the board found or not), minViews is the least pictures with the board found
+    before stopping early. Stopping early needs minViews <= nFrames, otherwise all nFrames pictures are always taken.
+    """
+
+    COVERAGEGRID = (8, 6) # cells (columns, rows) of the image plane coverage map
+    FRONTALTILTDEG = 15 # boards tilted less than this are frontal, the rest are binned by tilt direction
+    MINVIEWSFORESTIMATE = 3 # views needed before the running calibration is solved
+
     def __init__(
         self,
         nFrames : int,
         targetW: int,
         targetH: int,
-        isCharucoBoard: bool = True
+        isCharucoBoard: bool = True,
+        minCoverage : float = 0.7,
+        minPoseBins : int = 4,
+        maxReprojectionError : float = 0.5,
+        minViews : int = 10,
+        chessBoardDim : tuple[int, int] = (7, 10),
+        charucoBoardSpec : Optional[tuple] = None,
     ): 
+        """
+        Args:
+            nFrames: Most pictures to take, the agent's NUMCALIBPICTURES
+            targetW: Width of the pictures
+            targetH: Height of the pictures
+            isCharucoBoard: Board is a charuco board, else a plain chessboard
+            minCoverage: Fraction of COVERAGEGRID cells the board has to have covered to stop early
+            minPoseBins: Different board tilts (frontal, or tilted in one of four directions) needed to stop early
+            maxReprojectionError: Running rms reprojection error (pixels) needed to stop early
+            minViews: Pictures with the board found needed to stop early, see above for how it relates to nFrames
+            chessBoardDim: Inner corners of the chessboard, if not charuco
+            charucoBoardSpec: See charucoBoardSpec, defaults to the charuco_calibration board
+        """
         self.nFrames = nFrames
         self.targetW = targetW
         self.targetH = targetH
         self.frameIdx = 0
         self.isCharucoBoard = isCharucoBoard
+        self.minCoverage = minCoverage
+        self.minPoseBins = minPoseBins
+        self.maxReprojectionError = maxReprojectionError
+        self.minViews = minViews
+        self.chessBoardDim = tuple(chessBoardDim)
+        self.boardSpec = charucoBoardSpec or Calibrator.charucoBoardSpec()
+        self.__board = _makeCharucoBoard(self.boardSpec) if isCharucoBoard else None
+
+        self.__objPoints: list[np.ndarray] = []
+        self.__imgPoints: list[np.ndarray] = []
+        self.__coverage = np.zeros(self.COVERAGEGRID[::-1], dtype=bool)
+        self.__poseBins: set[int] = set()
+        self.__reprojectionError: Optional[float] = None
+        self.__solution: Optional[tuple[np.ndarray, np.ndarray]] = None
+        self.__solvedViews = 0 # views the running calibration was solved with
+
+        self.__solver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Calibrator")
+        self.__pendingSolve: Optional[Future] = None
+        self.__solveLock = threading.Lock()
+        self.__closed = False
+
         Sentinel.warning("Clearing any old calibration images!")
         Calibrator.__clearCalibrationPath(CALIBRATIONPHOTOPATH)
 
-    def savePicture(self, frame : np.ndarray):
+    def savePicture(self, frame : np.ndarray) -> bool:
+        """
+        Take a calibration picture, and detect the board in it
+
+        Returns:
+            True if the board was found
+        """
         if self.isFinished():
             raise RuntimeError("Taking pictures already finished. Please now start the calibration")
 
@@ -39,52 +246,171 @@ class Calibrator:
         self.frameIdx += 1
         Calibrator.saveCalibrationPicture(frame, f"Frame#{self.frameIdx}{CALIBRATIONPHOTOFILEENDING}")
 
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        points = self.__detectPoints(gray)
+        if points is None:
+            return False
+
+        objPoints, imgPoints = points
+        self.__objPoints.append(objPoints)
+        self.__imgPoints.append(imgPoints)
+        self.__markCoverage(imgPoints)
+        self.__updateEstimate()
+        return True
+
+    def __detectPoints(self, gray : np.ndarray) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        if self.__board is None:
+            corners = detectChessboard(gray, self.chessBoardDim)
+            if corners is None:
+                return None
+            return _chessboardObjectPoints(self.chessBoardDim), corners
+
+        corners, ids = detectCharuco(gray, self.boardSpec)
+        if corners is None:
+            return None
+        objPoints, imgPoints = self.__board.matchImagePoints(corners, ids)
+        # fewer than 4 corners cannot constrain a pose
+        if len(imgPoints) < 4:
+            return None
+        return objPoints, imgPoints
+
+    def __markCoverage(self, imgPoints : np.ndarray) -> None:
+        cols, rows = self.COVERAGEGRID
+        points = imgPoints.reshape(-1, 2)
+        col = np.clip((points[:, 0] * cols / self.targetW).astype(int), 0, cols - 1)
+        row = np.clip((points[:, 1] * rows / self.targetH).astype(int), 0, rows - 1)
+        self.__coverage[row, col] = True
+
+    def __updateEstimate(self) -> None:
+        """Take the result of a finished solve, and start solving again if views were added since"""
+        with self.__solveLock:
+            pending = self.__pendingSolve
+            if pending is not None:
+                if not pending.done():
+                    return
+                self.__pendingSolve = None
+                if not pending.cancelled():
+                    self.__applyEstimate(*pending.result())
+
+            views = len(self.__imgPoints)
+            if not self.__closed and views >= self.MINVIEWSFORESTIMATE and views > self.__solvedViews:
+                # the lists are only appended to, so the solve gets a snapshot of the views so far
+                self.__pendingSolve = self.__solver.submit(
+                    _solveViews, self.__objPoints[:], self.__imgPoints[:], (self.targetW, self.targetH)
+                )
+
+    def __applyEstimate(self, views : int, rms : float, mtx : np.ndarray, dist : np.ndarray, poseBins : set[int]) -> None:
+        self.__solvedViews = views
+        self.__reprojectionError = rms
+        self.__solution = (mtx, dist)
+        self.__poseBins = poseBins
+
+    def waitForEstimate(self, timeout : Optional[float] = None) -> bool:
+        """
+        Wait for the running calibration to be solved with every view so far
+
+        Returns:
+            False if it was not in time
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.__updateEstimate()
+        # views added while a solve ran start another one once it is taken
+        while (pending := self.__pendingSolve) is not None:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not wait([pending], timeout=remaining).done:
+                return False
+            self.__updateEstimate()
+        return True
+
+    def close(self) -> None:
+        """Stop solving the running calibration, eg when picture taking is stopped early"""
+        with self.__solveLock:
+            self.__closed = True
+        self.__solver.shutdown(wait=False, cancel_futures=True)
+
+    def getProgress(self) -> dict:
+        """
+        Returns:
+            pictures taken, views (pictures with the board found), coverage (0-1), poseBins,
+            and reprojectionError (None until the first solve with MINVIEWSFORESTIMATE views is done)
+        """
+        self.__updateEstimate()
+        return {
+            "pictures": self.frameIdx,
+            "views": len(self.__imgPoints),
+            "coverage": float(self.__coverage.mean()),
+            "poseBins": len(self.__poseBins),
+            "reprojectionError": self.__reprojectionError,
+        }
+
+    def hasEnoughViews(self) -> bool:
+        """True once coverage, tilt diversity and reprojection error are good enough to stop taking pictures"""
+        progress = self.getProgress()
+        return (
+            progress["views"] >= self.minViews
+            and progress["coverage"] >= self.minCoverage
+            and progress["poseBins"] >= self.minPoseBins
+            and progress["reprojectionError"] is not None
+            and progress["reprojectionError"] <= self.maxReprojectionError
+        )
+
     def isFinished(self):
-        return self.frameIdx >= self.nFrames
+        return self.frameIdx >= self.nFrames or self.hasEnoughViews()
     
-    def startCalibration(self) -> CameraCalibration:
+    def startCalibration(self) -> Optional[CameraCalibration]:
+        """
+        Calibrate from the corners detected while the pictures were taken. No picture is detected again
+        (use chessboard_calibration/charuco_calibration to solve again from the saved pictures).
+        """
         if not self.isFinished():
             raise RuntimeError("Taking pictures has not finished!")
-        
-        if self.isCharucoBoard:
-            return Calibrator.charuco_calibration()
-        else:
-            return Calibrator.chessboard_calibration()
+
+        if not self.__imgPoints:
+            Sentinel.warning("Failed to find the calibration board in any picture!")
+            return None
+
+        self.waitForEstimate()
+        self.close()
+        if self.__solvedViews != len(self.__imgPoints):
+            # fewer than MINVIEWSFORESTIMATE views, never solved while taking pictures
+            self.__applyEstimate(*_solveViews(self.__objPoints, self.__imgPoints, (self.targetW, self.targetH)))
+        assert self.__solution is not None
+
+        Sentinel.info(f"Using {len(self.__imgPoints)} valid images for calibration | {self.getProgress()}")
+        mtx, dist = self.__solution
+        return CameraCalibration(mtx, dist, (self.targetW, self.targetH))
         
     
     @staticmethod
     def chessboard_calibration(
-        chessBoardDim=(7, 10)
-    ) -> CameraCalibration:
-        images, imageWH = Calibrator.__collectImages(CALIBRATIONPHOTOPATH)
-        
+        chessBoardDim=(7, 10),
+        flags : int = 0,
+        workers : Optional[int] = None,
+        imagePath : str = CALIBRATIONPHOTOPATH,
+    ) -> Optional[CameraCalibration]:
+        """
+        Args:
+            chessBoardDim: Inner corners of the chessboard (columns, rows)
+            flags: cv2.calibrateCamera flags. Corners are cached, so trying other flags does not redo detection
+            workers: Processes to detect corners with, defaults to the cpu count
+            imagePath: Directory of the calibration pictures
+        """
+        detections, imageWH = Calibrator.detectAll(imagePath, _CHESSBOARD, tuple(chessBoardDim), workers)
+
+        objp = _chessboardObjectPoints(tuple(chessBoardDim))
+
         # Arrays to store object points and image points from all the images.
         objpoints = []  # 3d point in real world space
         imgpoints = []  # 2d points in image plane.
-
-        # termination criteria
-        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
-        
-        # prepare object points, like (0,0,0), (1,0,0), (2,0,0) ....,(6,5,0)
-        objp = np.zeros((chessBoardDim[0] * chessBoardDim[1], 3), np.float32)
-        objp[:, :2] = (
-            np.mgrid[0 : chessBoardDim[0], 0 : chessBoardDim[1]].T.reshape(-1, 2) * 2
-        )
-
-        for image in images:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            # Find the chess board corners
-            ret, corners = cv2.findChessboardCorners(gray, chessBoardDim, None)
-            # If found, add object points, image points (after refining them)
-            if ret == True:
+        for corners, _ in detections:
+            if corners is not None:
                 objpoints.append(objp)
-                corners2 = cv2.cornerSubPix(gray, corners, (11, 11), (-1, -1), criteria)
-                imgpoints.append(corners2)
+                imgpoints.append(corners)
 
         if imgpoints:
             Sentinel.info(f"Using: {len(imgpoints)} points")
             retf, mtx, dist, rvecs, tvecs = cv2.calibrateCamera(
-                objpoints, imgpoints, gray.shape[::-1], None, None
+                objpoints, imgpoints, imageWH, None, None, flags=flags
             )
             calibration = CameraCalibration(mtx, dist, imageWH)
             return calibration
@@ -98,38 +424,37 @@ class Calibrator:
         squareLengthMM = 30,
         markerLengthMM = 22,
         dictionary=cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_100),
-    ) -> CameraCalibration:
-        images, imageWH = Calibrator.__collectImages(CALIBRATIONPHOTOPATH)
-
-        board = cv2.aruco.CharucoBoard(
-            size=arucoboarddim,
-            squareLength=squareLengthMM,
-            markerLength=markerLengthMM,
-            dictionary=dictionary,
-        )
-        arucoParams = cv2.aruco.DetectorParameters()
-        arucoParams.cornerRefinementMethod = cv2.aruco.CORNER_REFINE_SUBPIX
+        flags : int = 0,
+        workers : Optional[int] = None,
+        imagePath : str = CALIBRATIONPHOTOPATH,
+    ) -> Optional[CameraCalibration]:
+        """
+        Args:
+            arucoboarddim: Squares of the board (columns, rows)
+            squareLengthMM: Side of a chessboard square
+            markerLengthMM: Side of an aruco marker
+            dictionary: Aruco dictionary of the markers
+            flags: cv2.calibrateCameraExtended flags. Corners are cached, so trying other flags does not redo detection
+            workers: Processes to detect corners with, defaults to the cpu count
+            imagePath: Directory of the calibration pictures
+        """
+        boardSpec = Calibrator.charucoBoardSpec(arucoboarddim, squareLengthMM, markerLengthMM, dictionary)
+        detections, imageWH = Calibrator.detectAll(imagePath, _CHARUCO, boardSpec, workers)
 
-        detector = cv2.aruco.CharucoDetector(board)
-        detector.setDetectorParameters(arucoParams)
+        board = _makeCharucoBoard(boardSpec)
         obj_points = []
         img_points = []
-
-        for img in images:
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            charuco_corners, charuco_ids, _, _ = detector.detectBoard(gray)
-
-            if charuco_corners is not None and len(charuco_corners) > 0:
+        for charuco_corners, charuco_ids in detections:
+            if charuco_corners is not None:
                 obj_pt, img_pt = board.matchImagePoints(charuco_corners, charuco_ids)
                 if len(img_pt) > 0:
                     obj_points.append(obj_pt)
                     img_points.append(img_pt)
-                    cv2.aruco.drawDetectedCornersCharuco(img, charuco_corners, charuco_ids)
 
         if obj_points and img_points:
             Sentinel.info(f"Using {len(img_points)} valid images for calibration")
             ret, mtx, dist, rvecs, tvecs = cv2.calibrateCameraExtended(
-                obj_points, img_points, imageWH, None, None
+                obj_points, img_points, imageWH, None, None, flags=flags
             )[:5]
 
             calibration = CameraCalibration(mtx, dist, imageWH)
@@ -137,7 +462,64 @@ class Calibrator:
 
         Sentinel.warning("Failed to find enough Charuco points")
         return None
-    
+
+    @staticmethod
+    def charucoBoardSpec(
+        arucoboarddim=(15, 15),
+        squareLengthMM = 30,
+        markerLengthMM = 22,
+        dictionary=cv2.aruco.getPredefinedDictionary(cv2.aruco.DICT_4X4_100),
+    ) -> tuple:
+        """A picklable description of a charuco board, cv2 aruco objects cant be sent to worker processes"""
+        return (
+            tuple(arucoboarddim),
+            squareLengthMM,
+            markerLengthMM,
+            dictionary.bytesList.tobytes(),
+            dictionary.bytesList.shape,
+            dictionary.markerSize,
+            dictionary.maxCorrectionBits,
+        )
+
+    @staticmethod
+    def detectAll(
+        imagePath : str,
+        boardType : str,
+        boardSpec : tuple,
+        workers : Optional[int] = None,
+    ) -> tuple[list[tuple[Optional[np.ndarray], Optional[np.ndarray]]], tuple[int, int]]:
+        """
+        Detect the board in every calibration picture, across a process pool.
+        Results are cached per picture (see CORNERCACHEDIR), so only new pictures are detected.
+
+        Returns:
+            ((corners, ids) of each picture in order, None where the board was not found), and the image (width, height)
+        """
+        imageFiles = Calibrator.__collectImageFiles(imagePath)
+        jobs = [(imageFile, boardType, boardSpec) for imageFile in imageFiles]
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = min(workers, len(jobs))
+
+        if workers <= 1:
+            results = [_detectImageFile(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_detectImageFile, jobs))
+
+        calibshape = None
+        detections = []
+        for imageWH, corners, ids in results:
+            if calibshape is None:
+                calibshape = imageWH
+            elif calibshape != imageWH:
+                raise RuntimeError("Calibration photo image shapes dont match!")
+            detections.append((corners, ids))
+
+        assert calibshape is not None
+        return detections, calibshape
+
     @staticmethod
     def saveCalibrationPicture(frame : np.ndarray, pictureName : str):
         cv2.imwrite(
@@ -145,30 +527,19 @@ class Calibrator:
         )
     
     @staticmethod
-    def __collectImages(imagePath : str) -> tuple[list[np.ndarray], tuple[int,int]]:
-        images = []
-        calibshape = None
-        
+    def __collectImageFiles(imagePath : str) -> list[str]:
         # sorted not really necessary. It just helps keep calibration in order if taken with the Calibratior.savePicture()
-        for image_file in sorted(os.listdir(imagePath)): 
-            if image_file.endswith(CALIBRATIONPHOTOFILEENDING):
-                img = cv2.imread(os.path.join(imagePath, image_file))
-                images.append(img)
-
-                imgShape = img.shape[:2][::-1]  # (width, height)
-                
-                if calibshape is None:
-                    calibshape = imgShape 
-                elif calibshape == imgShape:
-                    pass
-                else:
-                    raise RuntimeError("Calibration photo image shapes dont match!")
-                
-        if not images:
-            raise RuntimeError(f"CALIBRATIONPHOTOPATH: {CALIBRATIONPHOTOPATH} does not have any pictures! Did you take some pictures first!")
-                
-        return images, calibshape
-    
+        imageFiles = [
+            os.path.join(imagePath, image_file)
+            for image_file in sorted(os.listdir(imagePath))
+            if image_file.endswith(CALIBRATIONPHOTOFILEENDING)
+        ]
+
+        if not imageFiles:
+            raise RuntimeError(f"{imagePath} does not have any pictures! Did you take some pictures first!")
+
+        return imageFiles
+
     @staticmethod
     def __clearCalibrationPath(imagePath : str):
         removedCnt = 0
@@ -178,6 +549,11 @@ class Calibrator:
                 removedCnt+=1
 
         Sentinel.info(f"Cleared {removedCnt} {CALIBRATIONPHOTOFILEENDING} images from {imagePath}")
+
+        cacheDir = os.path.join(imagePath, CORNERCACHEDIR)
+        if os.path.isdir(cacheDir):
+            for cacheFile in os.listdir(cacheDir):
+                os.remove(os.path.join(cacheDir, cacheFile))
         
     
      
@@ -25,6 +25,8 @@ class DepthAIHelper:
         self.depth_queue = self.device.getOutputQueue(
             name="depth", maxSize=4, blocking=False
         )
+        self.lastColorSequence: Optional[int] = None # device sequence number of the last color frame
+        self.lastColorTimestamp: Optional[float] = None # time.monotonic() the last color frame was captured
 
     def getFps(self):
         return self.res.fps
@@ -112,6 +114,9 @@ class DepthAIHelper:
         if self.device is not None:
             frame = self.color_queue.get()
             if frame is not None:
+                self.lastColorSequence = frame.getSequenceNum() # type: ignore
+                # synced to the host's steady clock, which is what time.monotonic() reads
+                self.lastColorTimestamp = frame.getTimestamp().total_seconds() # type: ignore
                 return frame.getCvFrame() # type: ignore
         return None
 
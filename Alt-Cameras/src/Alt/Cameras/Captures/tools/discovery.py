@@ -0,0 +1,308 @@
+"""discovery.py
+
+Finds which /dev/video* device is the camera you want, quickly.
+
+Candidates are first matched on the metadata sysfs has about each device (name, usb vendor/product/serial, usb port),
+which costs nothing. Only the remaining devices are opened, all at once, each with a strict timeout, and checked for
+the expected frame shape. The result is cached between runs, keyed on the usb topology, so as long as nothing was
+plugged in, unplugged or moved, the next startup does not open any device at all.
+
+On platforms without sysfs every index in idxOptions is a candidate, and only probing is done.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+
+from Alt.Core import getChildLogger
+from Alt.Core.Utils.files import user_data_dir
+
+Sentinel = getChildLogger("CameraDiscovery")
+
+SYSFSROOT = "/sys/class/video4linux"
+CACHEPATH = os.path.join(str(user_data_dir), "CameraDiscovery.json")
+PROBETIMEOUTS = 2.0 # longest a single device may take to open and return a frame
+
+
+class V4L2Device:
+    """
+    What sysfs knows about a video device, read without opening it
+    """
+
+    def __init__(
+        self,
+        index : int,
+        name : str = "",
+        nodeIndex : int = 0,
+        usbPort : Optional[str] = None,
+        vendorId : Optional[str] = None,
+        productId : Optional[str] = None,
+        serial : Optional[str] = None,
+    ) -> None:
+        """
+        Args:
+            index: N of /dev/videoN, what cv2.VideoCapture takes
+            name: Name the driver gives the device
+            nodeIndex: Node of the physical device, 0 is the capture node (uvc cameras add metadata nodes)
+            usbPort: Usb port path, eg 1-1.2
+            vendorId: Usb vendor id (hex)
+            productId: Usb product id (hex)
+            serial: Usb serial number, if the camera has one
+        """
+        self.index = index
+        self.name = name
+        self.nodeIndex = nodeIndex
+        self.usbPort = usbPort
+        self.vendorId = vendorId
+        self.productId = productId
+        self.serial = serial
+
+    def matches(
+        self,
+        name : Optional[str] = None,
+        vendorId : Optional[str] = None,
+        productId : Optional[str] = None,
+        serial : Optional[str] = None,
+        usbPort : Optional[str] = None,
+    ) -> bool:
+        """True if the device fits every criteria that is given. name matches as a case insensitive substring"""
+        if name is not None and name.lower() not in self.name.lower():
+            return False
+        return all(
+            wanted is None or wanted.lower() == (actual or "").lower()
+            for wanted, actual in (
+                (vendorId, self.vendorId),
+                (productId, self.productId),
+                (serial, self.serial),
+                (usbPort, self.usbPort),
+            )
+        )
+
+    def key(self) -> Tuple[Any, ...]:
+        return (self.index, self.name, self.nodeIndex, self.usbPort, self.vendorId, self.productId, self.serial)
+
+    def __repr__(self) -> str:
+        return f"V4L2Device(/dev/video{self.index}, {self.name!r}, usb={self.usbPort} {self.vendorId}:{self.productId})"
+
+
+def _readSysfs(path : str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def listV4L2Devices(sysfsRoot : str = SYSFSROOT) -> List[V4L2Device]:
+    """
+    Returns:
+        Every video device sysfs lists, by index. Empty where there is no sysfs
+    """
+    try:
+        nodes = os.listdir(sysfsRoot)
+    except OSError:
+        return []
+
+    devices = []
+    for node in nodes:
+        if not node.startswith("video") or not node[len("video"):].isdigit():
+            continue
+        nodePath = os.path.join(sysfsRoot, node)
+        device = V4L2Device(
+            index=int(node[len("video"):]),
+            name=_readSysfs(os.path.join(nodePath, "name")) or "",
+            nodeIndex=int(_readSysfs(os.path.join(nodePath, "index")) or 0),
+        )
+
+        # device links to the usb interface (eg .../1-1.2/1-1.2:1.0), its parent is the usb device
+        interfacePath = os.path.realpath(os.path.join(nodePath, "device"))
+        usbPath = os.path.dirname(interfacePath)
+        if _readSysfs(os.path.join(usbPath, "idVendor")) is not None:
+            device.usbPort = os.path.basename(usbPath)
+            device.vendorId = _readSysfs(os.path.join(usbPath, "idVendor"))
+            device.productId = _readSysfs(os.path.join(usbPath, "idProduct"))
+            device.serial = _readSysfs(os.path.join(usbPath, "serial"))
+        devices.append(device)
+
+    return sorted(devices, key=lambda device: device.index)
+
+
+def getTopologyHash(devices : List[V4L2Device]) -> str:
+    """Changes whenever a device is plugged in, unplugged, or moved to another port"""
+    return hashlib.sha1(repr([device.key() for device in devices]).encode()).hexdigest()
+
+
+def _probe(index : int, expectedRes : Optional[Tuple[int, ...]]) -> bool:
+    """Open a device and check the shape of one frame. Can block, see probeDevices"""
+    cap = cv2.VideoCapture(index, cv2.CAP_V4L2) if os.path.isdir(SYSFSROOT) else cv2.VideoCapture(index)
+    try:
+        if not cap.isOpened():
+            return False
+        if expectedRes is not None:
+            # ask for the resolution, instead of hoping the device defaults to it
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, expectedRes[0])
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, expectedRes[1])
+        ret, frame = cap.read()
+        return bool(ret) and frame is not None and (expectedRes is None or frame.shape == tuple(expectedRes))
+    finally:
+        cap.release()
+
+
+def probeDevices(
+    indices : List[int],
+    expectedRes : Optional[Tuple[int, ...]] = None,
+    timeoutS : float = PROBETIMEOUTS,
+) -> Optional[int]:
+    """
+    Open every device at once, and check each returns frames of the expected shape.
+
+    Devices that take longer than timeoutS are given up on (their probe thread is left to finish on its own,
+    a blocked open cannot be cancelled).
+
+    Returns:
+        The first index (in the given order) that matched, None if none did in time
+    """
+    results: Dict[int, bool] = {}
+    done = threading.Condition()
+
+    def run(index : int) -> None:
+        try:
+            matched = _probe(index, expectedRes)
+        except Exception as e:
+            Sentinel.debug(f"Probing /dev/video{index} failed: {e}")
+            matched = False
+        with done:
+            results[index] = matched
+            done.notify_all()
+
+    for index in indices:
+        threading.Thread(target=run, args=(index,), name=f"Probe_video{index}", daemon=True).start()
+
+    def firstMatch() -> Optional[int]:
+        # earlier indices win, so wait for them before settling on a later one
+        for index in indices:
+            if index not in results:
+                return None
+            if results[index]:
+                return index
+        return None
+
+    deadline = time.monotonic() + timeoutS
+    with done:
+        while True:
+            match = firstMatch()
+            if match is not None or len(results) == len(indices):
+                return match
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # use whatever matched in time
+                return next((index for index in indices if results.get(index)), None)
+            done.wait(remaining)
+
+
+def _loadCache(cachePath : str) -> Dict[str, Any]:
+    try:
+        with open(cachePath) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _saveCache(cachePath : str, cache : Dict[str, Any]) -> None:
+    try:
+        os.makedirs(os.path.dirname(cachePath), exist_ok=True)
+        tmpPath = f"{cachePath}.{os.getpid()}.tmp"
+        with open(tmpPath, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmpPath, cachePath)
+    except OSError as e:
+        Sentinel.warning(f"Could not save the camera discovery cache: {e}")
+
+
+def findCamera(
+    idxOptions : Optional[List[int]] = None,
+    expectedRes : Optional[Tuple[int, ...]] = None,
+    name : Optional[str] = None,
+    vendorId : Optional[str] = None,
+    productId : Optional[str] = None,
+    serial : Optional[str] = None,
+    usbPort : Optional[str] = None,
+    timeoutS : float = PROBETIMEOUTS,
+    useCache : bool = True,
+    sysfsRoot : str = SYSFSROOT,
+    cachePath : str = CACHEPATH,
+) -> Optional[int]:
+    """
+    Find the index of a camera.
+
+    Args:
+        idxOptions: Indices to consider, all capture devices if None
+        expectedRes: Frame shape (height, width, channels) the camera must produce, not probed if None
+        name: Part of the device name, eg "Arducam"
+        vendorId: Usb vendor id (hex, eg "0c45")
+        productId: Usb product id (hex)
+        serial: Usb serial number
+        usbPort: Usb port path, eg "1-1.2", to tell identical cameras apart
+        timeoutS: Longest a device may take to be probed
+        useCache: Use (and update) the cache of previous results
+        sysfsRoot: Where video4linux sysfs is
+        cachePath: Cache file
+
+    Returns:
+        The index to open with cv2.VideoCapture, None if no device matched
+    """
+    devices = listV4L2Devices(sysfsRoot)
+    criteria = dict(
+        idxOptions=idxOptions,
+        expectedRes=list(expectedRes) if expectedRes is not None else None,
+        name=name,
+        vendorId=vendorId,
+        productId=productId,
+        serial=serial,
+        usbPort=usbPort,
+    )
+    cacheKey = json.dumps(criteria, sort_keys=True)
+    topology = getTopologyHash(devices)
+
+    cache: Dict[str, Any] = {}
+    if useCache and devices:
+        cache = _loadCache(cachePath)
+        if cache.get("topology") == topology and cacheKey in cache.get("matches", {}):
+            return cache["matches"][cacheKey]
+
+    if devices:
+        candidates = [
+            device.index
+            for device in devices
+            if device.nodeIndex == 0
+            and (idxOptions is None or device.index in idxOptions)
+            and device.matches(name, vendorId, productId, serial, usbPort)
+        ]
+    else:
+        if any(value is not None for value in (name, vendorId, productId, serial, usbPort)):
+            Sentinel.warning("No sysfs to match device metadata on, only probing")
+        candidates = list(idxOptions) if idxOptions is not None else list(range(10))
+
+    if not candidates:
+        return None
+
+    if expectedRes is None and devices:
+        # the metadata was enough
+        match: Optional[int] = candidates[0]
+    else:
+        match = probeDevices(candidates, expectedRes, timeoutS)
+
+    if useCache and devices and match is not None:
+        if cache.get("topology") != topology:
+            cache = {"topology": topology, "matches": {}}
+        cache.setdefault("matches", {})[cacheKey] = match
+        _saveCache(cachePath, cache)
+
+    return match
@@ -0,0 +1,165 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class FrameGrabber:
+    """
+    Continuously grabs frames on a background thread into a small ring of preallocated buffers, so a reader
+    always gets the newest frame instead of whatever is next in the driver's queue.
+
+    The source only needs a cv2.VideoCapture like grab() -> bool and retrieve(image) -> (bool, frame).
+    The capture timestamp (time.monotonic) is taken right after grab(), as close to the exposure as we can get.
+
+    Buffers are reused. A frame returned by getLatest() stays valid until the next getLatest() call,
+    copy it if you need to keep it longer.
+    """
+
+    def __init__(
+        self,
+        source: Any,
+        frameShape: Tuple[int, ...],
+        dtype: Any = np.uint8,
+        numBuffers: int = 3,
+        name: str = "FrameGrabber",
+    ) -> None:
+        """
+        Args:
+            source: Object with grab() and retrieve(image), eg a cv2.VideoCapture.
+            frameShape: Shape of the frames the source produces.
+            dtype: Dtype of the frames. Defaults to uint8.
+            numBuffers: Size of the ring, at least 3 (one being read, one latest, one being written).
+            name: Name of the grabbing thread.
+        """
+        if numBuffers < 3:
+            raise ValueError("FrameGrabber needs at least 3 buffers!")
+
+        self.source = source
+        self.name = name
+        self.__buffers: List[np.ndarray] = [
+            np.empty(frameShape, dtype=dtype) for _ in range(numBuffers)
+        ]
+        self.__timestamps: List[float] = [0.0] * numBuffers
+        self.__sequence: List[int] = [0] * numBuffers
+
+        self.__cond = threading.Condition()
+        self.__latestIdx: int = -1  # newest complete frame, -1 if none yet
+        self.__heldIdx: int = -1  # buffer the reader currently has
+        self.__lastReadSequence: int = 0
+        self.__latestConsumed: bool = True
+
+        self.__running = False
+        self.__thread: Optional[threading.Thread] = None
+
+        # stats
+        self.__grabbed = 0
+        self.__dropped = 0
+        self.__duplicates = 0
+        self.__readFailures = 0
+
+    def start(self) -> None:
+        """Start grabbing on a background thread"""
+        if self.__running:
+            return
+        self.__running = True
+        self.__thread = threading.Thread(
+            target=self.__grabLoop, name=self.name, daemon=True
+        )
+        self.__thread.start()
+
+    def stop(self, timeoutS: float = 1.0) -> None:
+        """Stop the grabbing thread"""
+        self.__running = False
+        with self.__cond:
+            self.__cond.notify_all()
+        if self.__thread is not None:
+            self.__thread.join(timeoutS)
+            self.__thread = None
+
+    def isRunning(self) -> bool:
+        return self.__running
+
+    def __grabLoop(self) -> None:
+        while self.__running:
+            if not self.source.grab():
+                with self.__cond:
+                    self.__readFailures += 1
+                time.sleep(0.005)
+                continue
+            timestamp = time.monotonic()
+
+            with self.__cond:
+                # any buffer that is not the latest, and not held by the reader
+                writeIdx = next(
+                    idx
+                    for idx in range(len(self.__buffers))
+                    if idx != self.__latestIdx and idx != self.__heldIdx
+                )
+
+            ret, frame = self.source.retrieve(self.__buffers[writeIdx])
+            if not ret or frame is None:
+                with self.__cond:
+                    self.__readFailures += 1
+                continue
+
+            if frame is not self.__buffers[writeIdx]:
+                # the source could not write in place (eg shape changed), keep its frame instead
+                self.__buffers[writeIdx] = frame
+
+            with self.__cond:
+                self.__grabbed += 1
+                if not self.__latestConsumed:
+                    # previous frame is being replaced before anyone read it
+                    self.__dropped += 1
+                self.__timestamps[writeIdx] = timestamp
+                self.__sequence[writeIdx] = self.__grabbed
+                self.__latestIdx = writeIdx
+                self.__latestConsumed = False
+                self.__cond.notify_all()
+
+    def getLatest(
+        self, timeoutS: Optional[float] = 1.0
+    ) -> Optional[Tuple[np.ndarray, float, int]]:
+        """
+        Get the newest frame, waiting up to timeoutS for one that has not been returned before.
+        If no new frame arrives in time, the previous frame is returned again (counted as a duplicate).
+
+        Args:
+            timeoutS: How long to wait for a new frame. 0 never waits, None waits forever.
+
+        Returns:
+            (frame, captureTimestamp, sequenceNumber), or None if no frame was ever grabbed.
+        """
+        with self.__cond:
+            if timeoutS != 0:
+                self.__cond.wait_for(
+                    lambda: not self.__latestConsumed or not self.__running, timeoutS
+                )
+
+            if self.__latestIdx == -1:
+                return None
+
+            idx = self.__latestIdx
+            if self.__sequence[idx] == self.__lastReadSequence:
+                self.__duplicates += 1
+
+            self.__heldIdx = idx
+            self.__latestConsumed = True
+            self.__lastReadSequence = self.__sequence[idx]
+            return self.__buffers[idx], self.__timestamps[idx], self.__sequence[idx]
+
+    def getStats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Counts of frames grabbed, dropped (replaced before being read), duplicates (returned more than once)
+            and read failures.
+        """
+        with self.__cond:
+            return {
+                "grabbed": self.__grabbed,
+                "dropped": self.__dropped,
+                "duplicates": self.__duplicates,
+                "readFailures": self.__readFailures,
+            }
@@ -0,0 +1,46 @@
+import bisect
+import collections
+import threading
+from typing import Deque, Dict, List, Sequence
+
+import numpy as np
+
+# upper edges (ms) of the histogram buckets, the last bucket holds everything above
+DEFAULTBUCKETSMS: Sequence[float] = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class LatencyHistogram:
+    """
+    Counts latencies into fixed buckets (cheap enough for every frame), and keeps a window of recent samples for
+    percentiles. Thread safe.
+    """
+
+    def __init__(self, bucketsMs: Sequence[float] = DEFAULTBUCKETSMS, window: int = 512) -> None:
+        """
+        Args:
+            bucketsMs: Upper edges of the buckets in ms, increasing
+            window: Recent samples the percentiles are taken over
+        """
+        self.bucketsMs = list(bucketsMs)
+        self.__counts: List[int] = [0] * (len(self.bucketsMs) + 1)
+        self.__recent: Deque[float] = collections.deque(maxlen=window)
+        self.__lock = threading.Lock()
+
+    def add(self, latencyMs: float) -> None:
+        with self.__lock:
+            self.__counts[bisect.bisect_left(self.bucketsMs, latencyMs)] += 1
+            self.__recent.append(latencyMs)
+
+    def getCounts(self) -> List[int]:
+        """Samples in each bucket since the start, len(bucketsMs) + 1 long"""
+        with self.__lock:
+            return list(self.__counts)
+
+    def getPercentiles(self) -> Dict[str, float]:
+        """p50, p99 and max (ms) of the recent samples, empty if there are none"""
+        with self.__lock:
+            if not self.__recent:
+                return {}
+            samples = np.fromiter(self.__recent, dtype=np.float64)
+        p50, p99 = np.percentile(samples, [50, 99])
+        return {"p50Ms": float(p50), "p99Ms": float(p99), "maxMs": float(samples.max())}
@@ -0,0 +1,115 @@
+from typing import List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+
+Color = Tuple[int, int, int]
+
+
+class Box(NamedTuple):
+    x1: float
+    y1: float
+    x2: float
+    y2: float
+    label: Optional[str]
+    color: Color
+
+
+class Text(NamedTuple):
+    text: str
+    x: float
+    y: float
+    color: Color
+
+
+class Point(NamedTuple):
+    x: float
+    y: float
+    radius: int
+    color: Color
+
+
+Annotation = Union[Box, Text, Point]
+
+
+class FrameOverlay:
+    """
+    Records annotations (boxes, labels, points) on a frame as primitives in the frame's pixel coordinates, instead of
+    drawing them. They are only drawn by render(), onto whatever frame is shown (eg the downscaled stream frame),
+    so the frame being processed is never painted on and drawing costs nothing when nobody is watching.
+    """
+
+    FONT = cv2.FONT_HERSHEY_SIMPLEX
+    FONTSCALE = 0.4
+    THICKNESS = 1
+
+    def __init__(self) -> None:
+        self.__annotations: List[Annotation] = []
+
+    def box(self, bboxXYXY: Sequence[float], label: Optional[str] = None, color: Color = (10, 100, 255)) -> None:
+        """A box from (x1, y1) to (x2, y2), with an optional label above it"""
+        x1, y1, x2, y2 = bboxXYXY[:4]
+        self.__annotations.append(Box(float(x1), float(y1), float(x2), float(y2), label, color))
+
+    def text(self, text: str, position: Sequence[float], color: Color = (255, 255, 255)) -> None:
+        """Text with its bottom left corner at position (x, y)"""
+        self.__annotations.append(Text(text, float(position[0]), float(position[1]), color))
+
+    def point(self, position: Sequence[float], color: Color = (0, 255, 0), radius: int = 3) -> None:
+        """A filled circle at position (x, y). The radius is in pixels of the rendered frame"""
+        self.__annotations.append(Point(float(position[0]), float(position[1]), radius, color))
+
+    def clear(self) -> None:
+        self.__annotations.clear()
+
+    def isEmpty(self) -> bool:
+        return not self.__annotations
+
+    def getAnnotations(self) -> List[Annotation]:
+        """A copy of the annotations, which can be rendered later (eg on another thread) while this overlay is reused"""
+        return list(self.__annotations)
+
+    def render(
+        self,
+        frame: np.ndarray,
+        sourceShape: Sequence[int],
+        annotations: Optional[Sequence[Annotation]] = None,
+    ) -> np.ndarray:
+        """
+        Draw annotations onto a frame, scaled from the frame they were recorded on
+
+        Args:
+            frame: The frame to draw on (in place)
+            sourceShape: Shape of the frame the annotations are in the coordinates of
+            annotations: What to draw, defaults to this overlay's annotations
+
+        Returns:
+            frame
+        """
+        if annotations is None:
+            annotations = self.__annotations
+        scaleX = frame.shape[1] / sourceShape[1]
+        scaleY = frame.shape[0] / sourceShape[0]
+
+        for annotation in annotations:
+            if isinstance(annotation, Box):
+                p1 = (int(annotation.x1 * scaleX), int(annotation.y1 * scaleY))
+                p2 = (int(annotation.x2 * scaleX), int(annotation.y2 * scaleY))
+                cv2.rectangle(frame, p1, p2, annotation.color, self.THICKNESS)
+                if annotation.label:
+                    self.__drawLabel(frame, annotation.label, p1, annotation.color)
+            elif isinstance(annotation, Text):
+                position = (int(annotation.x * scaleX), int(annotation.y * scaleY))
+                cv2.putText(frame, annotation.text, position, self.FONT, self.FONTSCALE, annotation.color, self.THICKNESS)
+            else:
+                center = (int(annotation.x * scaleX), int(annotation.y * scaleY))
+                cv2.circle(frame, center, annotation.radius, annotation.color, -1)
+        return frame
+
+    def __drawLabel(self, frame: np.ndarray, label: str, corner: Tuple[int, int], color: Color) -> None:
+        """Label on a filled background, just above the box's top left corner"""
+        (textW, textH), baseline = cv2.getTextSize(label, self.FONT, self.FONTSCALE, self.THICKNESS)
+        x, y = corner
+        y = max(y, textH + baseline)
+        cv2.rectangle(frame, (x, y - textH - baseline), (x + textW, y), color, -1)
+        cv2.putText(frame, label, (x, y - baseline), self.FONT, self.FONTSCALE, (255, 255, 255), self.THICKNESS)
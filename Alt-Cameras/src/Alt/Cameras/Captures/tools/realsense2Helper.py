@@ -1,6 +1,8 @@
-from typing import Optional
+import time
+from typing import Optional, Any
 import pyrealsense2 as rs
 import numpy as np
+import cv2
 from ...Parameters.CameraIntrinsics import CameraIntrinsics
 from ...Parameters.CameraCalibration import CameraCalibration
 from ...Constants.resolution import D435IResolution
@@ -8,11 +10,36 @@ from .calibration import Calibrator
 
 
 class realsense2Helper:
+    """
+    Wraps a realsense pipeline. Each frameset is fetched once and cached, the depth and color getters convert only
+    the stream they return, so a getDepth() never pays for the color frame (and the other way around).
+    A getter fetches a new frameset once its stream was already returned from the cached one.
+    """
+
     DEPTH = 0
     COLOR = 1
 
-    def __init__(self, res: D435IResolution, realSenseSerialId : Optional[str]) -> None:
+    def __init__(
+        self,
+        res: D435IResolution,
+        realSenseSerialId : Optional[str],
+        alignDepthToColor : bool = False,
+        undistortColor : bool = True,
+        undistortDepth : bool = False,
+    ) -> None:
+        """
+        Args:
+            res: Resolution and fps of both streams
+            realSenseSerialId: Serial id of the device to use, None for any
+            alignDepthToColor: Reproject depth into the color camera (rs.align), so depth[y, x] is the depth of color[y, x].
+                Depth then has the color stream's intrinsics
+            undistortColor: Undistort color frames. Skipped anyway when the stream reports no distortion
+            undistortDepth: Undistort depth frames (nearest neighbour, interpolated depth is made up depth). Full resolution
+                remaps are expensive, leave this off unless the depth pixels themselves need to be undistorted
+        """
         self.res = res
+        self.alignDepthToColor = alignDepthToColor
+        self.undistort = [undistortDepth, undistortColor] # indexed by DEPTH / COLOR
         self.pipeline = rs.pipeline()
         self.config = rs.config()
         self.streams = [rs.stream.depth, rs.stream.color]
@@ -28,6 +55,12 @@ class realsense2Helper:
             self.config.enable_stream(stream, res.w, res.h, _format, res.fps)
 
         pipeline_profile = self.pipeline.start(self.config)
+        self.lastFrameNumber: Optional[int] = None # hardware frame counter of the last frameset
+        self.lastCaptureTimestamp: Optional[float] = None # time.monotonic() the last frameset was captured
+        self.align = rs.align(rs.stream.color) if alignDepthToColor else None
+        self.__frames: Optional[Any] = None # the cached frameset
+        self.__images: dict[int, np.ndarray] = {} # streams of the cached frameset converted so far
+        self.__returned: set[int] = set() # streams of the cached frameset already returned
 
         self.baked : list[tuple[CameraIntrinsics, np.ndarray]] = []
         self.calibrations : list[CameraCalibration] = []
@@ -38,6 +71,11 @@ class realsense2Helper:
             self.baked.append((intr, coeffs))
             self.calibrations.append(calibration)
 
+        if alignDepthToColor:
+            # aligned depth is in the color camera's pixels
+            self.baked[self.DEPTH] = self.baked[self.COLOR]
+            self.calibrations[self.DEPTH] = self.calibrations[self.COLOR]
+
     def __verifyExistence(self, serialId : str):
         """ Checks if a device with a cetain serial is plugged in"""
         context = rs.context()
@@ -75,25 +113,81 @@ class realsense2Helper:
         return intr, np.array(intrinsics.coeffs, dtype=np.float32)
 
     def __dewarp(self, frame, stream_idx : int):
+        if not self.undistort[stream_idx] or not np.any(self.baked[stream_idx][1]):
+            # the d435 usually reports zero distortion, remapping would only cost time
+            return frame
+        if stream_idx == self.DEPTH:
+            return self.calibrations[stream_idx].undistortFrame(frame, cv2.INTER_NEAREST)
         return self.calibrations[stream_idx].undistortFrame(frame)
 
     def getCameraIntrinsics(self, stream_idx=COLOR) -> CameraIntrinsics:
         return self.baked[stream_idx][0]
 
-    def getDepthAndColor(self):
+    def fetch(self) -> bool:
+        """
+        Wait for the next frameset and cache it. Nothing is converted until a getter asks for it
+
+        Returns:
+            False if the frameset is missing the depth or color frame
+        """
         frames = self.pipeline.wait_for_frames()
-        depth_frame = frames.get_depth_frame()
-        color_frame = frames.get_color_frame()
-        if not depth_frame or not color_frame:
+        if self.align is not None:
+            frames = self.align.process(frames)
+        self.lastFrameNumber = frames.get_frame_number()
+        self.lastCaptureTimestamp = self.__toMonotonic(frames)
+        self.__frames = frames
+        self.__images.clear()
+        self.__returned.clear()
+        return bool(frames.get_depth_frame()) and bool(frames.get_color_frame())
+
+    def __getImage(self, stream_idx : int) -> Optional[np.ndarray]:
+        """A stream of the cached frameset as an array, converted once"""
+        image = self.__images.get(stream_idx)
+        if image is None and self.__frames is not None:
+            frame = self.__frames.get_depth_frame() if stream_idx == self.DEPTH else self.__frames.get_color_frame()
+            if not frame:
+                return None
+            image = self.__dewarp(np.asanyarray(frame.get_data()), stream_idx)
+            self.__images[stream_idx] = image
+        return image
+
+    def __getNext(self, stream_idx : int) -> Optional[np.ndarray]:
+        if self.__frames is None or stream_idx in self.__returned:
+            self.fetch()
+        self.__returned.add(stream_idx)
+        return self.__getImage(stream_idx)
+
+    def getDepth(self) -> Optional[np.ndarray]:
+        """Depth frame (uint16), from the cached frameset unless depth was already returned from it"""
+        return self.__getNext(self.DEPTH)
+
+    def getColor(self) -> Optional[np.ndarray]:
+        """Color frame (bgr), from the cached frameset unless color was already returned from it"""
+        return self.__getNext(self.COLOR)
+
+    def getDepthAndColor(self) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """Depth and color of a new frameset, None if it is missing either"""
+        if not self.fetch():
+            return None
+        self.__returned.update((self.DEPTH, self.COLOR))
+        depth_image = self.__getImage(self.DEPTH)
+        color_image = self.__getImage(self.COLOR)
+        if depth_image is None or color_image is None:
             return None
-
-        depth_image = np.asanyarray(depth_frame.get_data())
-        depth_image = self.__dewarp(depth_image, self.DEPTH)
-        color_image = np.asanyarray(color_frame.get_data())
-        color_image = self.__dewarp(color_image, self.COLOR)
         return depth_image, color_image
 
+    @staticmethod
+    def __toMonotonic(frames) -> float:
+        """Capture time of a frameset on the time.monotonic() clock"""
+        if frames.get_frame_timestamp_domain() == rs.timestamp_domain.global_time:
+            # device time mapped onto the host's wall clock (ms)
+            return frames.get_timestamp() / 1000 - (time.time() - time.monotonic())
+        # the device clock is not related to ours, the arrival time is the best we know
+        return time.monotonic()
+
     def close(self):
+        self.__frames = None
+        self.__images.clear()
         self.pipeline.stop()
 
     def isOpen(self) -> bool:
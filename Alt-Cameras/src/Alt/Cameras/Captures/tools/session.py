@@ -0,0 +1,362 @@
+"""session.py
+
+On disk format of recorded camera sessions, written by SessionRecorder and played back by ReplayCapture.
+
+A session is a directory of one or more segments, or a single segment directory. Each segment holds:
+    meta.json: {"fps": float, "colorFile": str, "depthFile": str or null, "depthShape": [h, w] or null, "frameCount": int}
+    the color video (colorFile), anything cv2.VideoCapture can read
+    an optional raw depth sidecar (depthFile), uint16 frames of depthShape written back to back
+    timestamps.csv: the capture timestamp (seconds) of each frame, one per line
+
+Segments are played in the order of their directory names. A plain video file also works as a session,
+without depth and with timestamps made up from its fps.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from Alt.Core import getChildLogger
+
+Sentinel = getChildLogger("SessionRecorder")
+
+METAFILE = "meta.json"
+TIMESTAMPSFILE = "timestamps.csv"
+COLORFILE = "color.avi"
+DEPTHFILE = "depth.u16"
+DEPTHDTYPE = np.uint16
+
+
+class SessionSegment:
+    """
+    Read access to a single recorded segment.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path: A segment directory, or a plain video file.
+        """
+        self.path = path
+        self.depth: Optional[np.ndarray] = None
+
+        if os.path.isdir(path):
+            with open(os.path.join(path, METAFILE)) as f:
+                meta = json.load(f)
+
+            self.colorPath = os.path.join(path, meta["colorFile"])
+            self.fps = float(meta.get("fps") or 30)
+            self.timestamps = self.__readTimestamps(os.path.join(path, TIMESTAMPSFILE))
+
+            depthFile = meta.get("depthFile")
+            if depthFile:
+                h, w = meta["depthShape"]
+                depthPath = os.path.join(path, depthFile)
+                # memory mapped, so seeking is free and only the frames played are read
+                depthFrames = os.path.getsize(depthPath) // (h * w * np.dtype(DEPTHDTYPE).itemsize)
+                if depthFrames > 0:
+                    self.depth = np.memmap(
+                        depthPath, dtype=DEPTHDTYPE, mode="r", shape=(depthFrames, h, w)
+                    )
+
+            # a recording that was cut off might not have written its final frame count
+            frameCount = meta.get("frameCount")
+            if frameCount is None:
+                frameCount = len(self.timestamps)
+        else:
+            self.colorPath = path
+            cap = cv2.VideoCapture(path)
+            self.fps = cap.get(cv2.CAP_PROP_FPS) or 30
+            frameCount = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            cap.release()
+            self.timestamps = np.arange(frameCount) / self.fps
+
+        counts = [frameCount, len(self.timestamps)]
+        if self.depth is not None:
+            counts.append(len(self.depth))
+        # only frames that have everything are played
+        self.frameCount: int = int(min(counts))
+
+    @staticmethod
+    def __readTimestamps(path: str) -> np.ndarray:
+        try:
+            with open(path) as f:
+                return np.array([float(line) for line in f if line.strip()], dtype=np.float64)
+        except FileNotFoundError:
+            return np.zeros(0, dtype=np.float64)
+
+    def getDepth(self, index: int) -> Optional[np.ndarray]:
+        """Depth frame at index (a copy, not a view into the file), None if the segment has no depth"""
+        if self.depth is None:
+            return None
+        return np.array(self.depth[index])
+
+
+def openSession(path: str) -> List[SessionSegment]:
+    """
+    Open every segment of a session.
+
+    Args:
+        path: A session directory, a single segment directory, or a plain video file.
+
+    Returns:
+        The segments in playback order, empty ones skipped.
+
+    Raises:
+        FileNotFoundError: If there is nothing to play at path.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No session at {path}")
+
+    if os.path.isdir(path) and not os.path.exists(os.path.join(path, METAFILE)):
+        segmentPaths = [
+            os.path.join(path, name)
+            for name in sorted(os.listdir(path))
+            if os.path.exists(os.path.join(path, name, METAFILE))
+        ]
+    else:
+        segmentPaths = [path]
+
+    segments = [SessionSegment(segmentPath) for segmentPath in segmentPaths]
+    segments = [segment for segment in segments if segment.frameCount > 0]
+    if not segments:
+        raise FileNotFoundError(f"Session at {path} has no frames")
+    return segments
+
+
+def locateFrame(segments: List[SessionSegment], index: int) -> Tuple[int, int]:
+    """
+    Args:
+        segments: The segments of a session.
+        index: Frame index in the whole session.
+
+    Returns:
+        (segment index, frame index in that segment)
+    """
+    for segmentIdx, segment in enumerate(segments):
+        if index < segment.frameCount:
+            return segmentIdx, index
+        index -= segment.frameCount
+    raise IndexError("Frame index past the end of the session")
+
+
+class SessionRecorder:
+    """
+    Records frames (color, optional depth and capture timestamps) into a session on a background writer thread,
+    so encoding never blocks the caller.
+
+    Frames wait in a bounded queue. When the writer falls behind, frames are dropped by the drop policy and counted,
+    instead of the queue (and memory) growing. Output is split into segments of segmentSeconds of capture time, so
+    a crash only loses the segment being written.
+    """
+
+    DROPOLDEST = "oldest" # drop the oldest waiting frame, the recording keeps up with the present
+    DROPNEWEST = "newest" # drop the incoming frame, the recording keeps the frames it already has
+
+    def __init__(
+        self,
+        sessionPath: str,
+        fps: float,
+        segmentSeconds: float = 60,
+        queueSize: int = 64,
+        dropPolicy: str = DROPOLDEST,
+        fourcc: str = "MJPG",
+        recordDepth: bool = True,
+    ) -> None:
+        """
+        Args:
+            sessionPath: Directory the segments are written to, created if needed
+            fps: Frame rate stored in the videos
+            segmentSeconds: Length of each segment in capture time. <= 0 writes a single segment
+            queueSize: Frames that can wait for the writer
+            dropPolicy: DROPOLDEST or DROPNEWEST
+            fourcc: Color codec. MJPG is cheap to encode, mp4v is smaller but much slower
+            recordDepth: Write depth frames (when given) to the raw depth sidecar
+        """
+        if dropPolicy not in (self.DROPOLDEST, self.DROPNEWEST):
+            raise ValueError(f"Invalid drop policy: {dropPolicy}")
+
+        self.sessionPath = sessionPath
+        self.fps = fps
+        self.segmentSeconds = segmentSeconds
+        self.dropPolicy = dropPolicy
+        self.fourcc = fourcc
+        self.recordDepth = recordDepth
+
+        self.__queue: queue.Queue = queue.Queue(maxsize=queueSize)
+        self.__thread: Optional[threading.Thread] = None
+        self.__statsLock = threading.Lock()
+        self.__recorded = 0
+        self.__dropped = 0
+        self.__segments = 0
+        self.__writeErrors = 0
+
+        # writer thread state
+        self.__colorWriter: Optional[cv2.VideoWriter] = None
+        self.__depthFile: Optional[Any] = None
+        self.__timestampsFile: Optional[Any] = None
+        self.__segmentPath: Optional[str] = None
+        self.__segmentMeta: Dict[str, Any] = {}
+        self.__segmentStart: float = 0
+        self.__segmentFrames = 0
+
+    def start(self) -> None:
+        """Start the writer thread"""
+        if self.__thread is not None:
+            return
+        os.makedirs(self.sessionPath, exist_ok=True)
+        self.__thread = threading.Thread(target=self.__writeLoop, name="SessionRecorder", daemon=True)
+        self.__thread.start()
+
+    def record(
+        self,
+        color: np.ndarray,
+        depth: Optional[np.ndarray] = None,
+        timestamp: Optional[float] = None,
+    ) -> bool:
+        """
+        Queue a frame to be written. Never blocks.
+        NOTE: the frames are written later, they must not be modified after this (pass copies of reused buffers).
+
+        Args:
+            color: The color frame
+            depth: The depth frame, converted to uint16
+            timestamp: Capture time (seconds, monotonic), defaults to now
+
+        Returns:
+            False if this frame was dropped
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        item = (color, depth if self.recordDepth else None, timestamp)
+
+        while True:
+            try:
+                self.__queue.put_nowait(item)
+                return True
+            except queue.Full:
+                if self.dropPolicy == self.DROPNEWEST:
+                    self.__countDrop()
+                    return False
+                try:
+                    self.__queue.get_nowait()
+                    self.__countDrop()
+                except queue.Empty:
+                    pass
+
+    def __countDrop(self) -> None:
+        with self.__statsLock:
+            self.__dropped += 1
+
+    def stop(self, timeoutS: float = 10) -> None:
+        """Write everything still queued, and close the current segment"""
+        if self.__thread is None:
+            return
+        self.__queue.put(None)
+        self.__thread.join(timeoutS)
+        self.__thread = None
+
+    def getStats(self) -> Dict[str, int]:
+        """
+        Returns:
+            Counts of frames recorded, dropped, segments started, write errors, and frames waiting in the queue
+        """
+        with self.__statsLock:
+            return {
+                "recorded": self.__recorded,
+                "dropped": self.__dropped,
+                "segments": self.__segments,
+                "writeErrors": self.__writeErrors,
+                "queued": self.__queue.qsize(),
+            }
+
+    def __writeLoop(self) -> None:
+        while True:
+            item = self.__queue.get()
+            if item is None:
+                break
+            try:
+                self.__write(*item)
+            except Exception as e:
+                Sentinel.error(f"Failed to record frame! {e}")
+                with self.__statsLock:
+                    self.__writeErrors += 1
+        self.__closeSegment()
+
+    def __write(self, color: np.ndarray, depth: Optional[np.ndarray], timestamp: float) -> None:
+        if (
+            self.__colorWriter is None
+            or (self.segmentSeconds > 0 and timestamp - self.__segmentStart >= self.segmentSeconds)
+            or (depth is not None and self.__segmentMeta.get("depthShape") not in (None, list(depth.shape)))
+        ):
+            self.__closeSegment()
+            self.__openSegment(color, depth, timestamp)
+
+        assert self.__colorWriter is not None and self.__timestampsFile is not None
+        self.__colorWriter.write(color)
+        if self.__depthFile is not None:
+            if depth is None:
+                # keep the sidecar aligned with the video
+                depth = np.zeros(self.__segmentMeta["depthShape"], dtype=DEPTHDTYPE)
+            self.__depthFile.write(np.ascontiguousarray(depth, dtype=DEPTHDTYPE).tobytes())
+        self.__timestampsFile.write(f"{timestamp}\n")
+
+        self.__segmentFrames += 1
+        with self.__statsLock:
+            self.__recorded += 1
+
+    def __openSegment(self, color: np.ndarray, depth: Optional[np.ndarray], timestamp: float) -> None:
+        with self.__statsLock:
+            segmentIdx = self.__segments
+            self.__segments += 1
+
+        self.__segmentPath = os.path.join(self.sessionPath, f"segment_{segmentIdx:04d}")
+        os.makedirs(self.__segmentPath, exist_ok=True)
+        self.__segmentStart = timestamp
+        self.__segmentFrames = 0
+
+        self.__colorWriter = cv2.VideoWriter(
+            os.path.join(self.__segmentPath, COLORFILE),
+            cv2.VideoWriter_fourcc(*self.fourcc),  # type: ignore
+            self.fps,
+            (color.shape[1], color.shape[0]),
+        )
+        self.__timestampsFile = open(os.path.join(self.__segmentPath, TIMESTAMPSFILE), "w")
+        if depth is not None:
+            self.__depthFile = open(os.path.join(self.__segmentPath, DEPTHFILE), "wb")
+
+        self.__segmentMeta = {
+            "fps": self.fps,
+            "colorFile": COLORFILE,
+            "depthFile": DEPTHFILE if depth is not None else None,
+            "depthShape": list(depth.shape) if depth is not None else None,
+            "frameCount": None,  # filled in when the segment is closed
+        }
+        self.__writeMeta()
+
+    def __closeSegment(self) -> None:
+        if self.__colorWriter is None:
+            return
+
+        self.__colorWriter.release()
+        self.__colorWriter = None
+        for sidecar in (self.__depthFile, self.__timestampsFile):
+            if sidecar is not None:
+                sidecar.close()
+        self.__depthFile = None
+        self.__timestampsFile = None
+
+        self.__segmentMeta["frameCount"] = self.__segmentFrames
+        self.__writeMeta()
+
+    def __writeMeta(self) -> None:
+        assert self.__segmentPath is not None
+        with open(os.path.join(self.__segmentPath, METAFILE), "w") as f:
+            json.dump(self.__segmentMeta, f)
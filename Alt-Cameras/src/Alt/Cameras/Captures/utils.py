@@ -4,6 +4,8 @@ from typing import List, Tuple, Optional
 
 import cv2
 
+from .tools import discovery
+
 def flushCapture(cap: cv2.VideoCapture, flushTimeMs: int) -> None:
     """
     Flush the capture buffer by grabbing frames for the specified amount of time
@@ -19,26 +21,25 @@ def flushCapture(cap: cv2.VideoCapture, flushTimeMs: int) -> None:
 
 def getCorrectCameraFeed(
     idxOptions: List[int] = [0, 1], 
-    expectedRes: Tuple[int, int, int] = (640, 640, 3)
+    expectedRes: Tuple[int, int, int] = (640, 640, 3),
+    timeoutS: float = 2.0,
+    useCache: bool = True,
 ) -> Optional[int]:
     """
-    Find a camera with the specified resolution from the list of camera indices
+    Find a camera with the specified resolution from the list of camera indices.
+    The cameras are probed concurrently and the result is cached, see tools/discovery.findCamera
     
     Args:
         idxOptions: List of camera indices to try
         expectedRes: Expected resolution of the camera feed as (height, width, channels)
+        timeoutS: Longest a camera may take to return its first frame
+        useCache: Reuse the camera found last run, if no usb device changed since
         
     Returns:
         The index of the first camera that matches the expected resolution, or None if no match found
     """
     try:
-        for idx in idxOptions:
-            cap = cv2.VideoCapture(idx)
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if ret and frame.shape == expectedRes: # type: ignore
-                    return idx
-        return None
+        return discovery.findCamera(idxOptions, expectedRes, timeoutS=timeoutS, useCache=useCache)
     except Exception as E:
         logging.error(f"Error when finding correct camera index! {E}")
         return None
@@ -1,40 +1,165 @@
 import os
 import json
 import codecs
+import hashlib
 from typing import Optional
 
 import cv2
 import numpy as np
+from Alt.Core import getChildLogger
+from Alt.Core.Utils.files import user_data_dir
 
+Sentinel = getChildLogger("CameraCalibration")
 
 class CameraCalibration:
-    def __init__(self, cameraMatrix : np.ndarray,  distortionCoeff : np.ndarray, resolutionWH : tuple[int, int]):
+    MAPCACHEDIR = os.path.join(str(user_data_dir), "Calibrations", "MapCache") # persisted undistortion maps
+
+    def __init__(self, cameraMatrix : np.ndarray,  distortionCoeff : np.ndarray, resolutionWH : tuple[int, int], cropToRoi : bool = False):
+        """
+        Args:
+            cameraMatrix: 3x3 camera matrix at the calibration resolution
+            distortionCoeff: Distortion coefficients
+            resolutionWH: Resolution the calibration was done at
+            cropToRoi: Only output the valid (roi) part of the undistorted frame. Smaller output, and less pixels to remap
+        """
         self.cameraMatrix = cameraMatrix
         self.distortionCoeff = distortionCoeff
         self.resolutionWH = resolutionWH
-        self.__mapX, self.__mapY = None, None
-
-    def undistortFrame(self, frame : np.ndarray, interpolationMethod = cv2.INTER_LINEAR) -> np.ndarray:
-        self.getMapXY() # ensures they exist
-        return cv2.remap(frame, self.__mapX, self.__mapY, interpolationMethod)
-
-    def getMapXY(self) -> tuple[np.ndarray]:
-        if self.__mapX is None or self.__mapY is None:
-            self.__mapX, self.__mapY = self.__getMapXY()
-
-        return self.__mapX, self.__mapY
-
-    def __getMapXY(self) -> tuple[np.ndarray, np.ndarray]:
+        self.cropToRoi = cropToRoi
+        # (width, height) -> (map1, map2, newCameraMatrix)
+        self.__maps: dict[tuple[int, int], tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+    def setCropToRoi(self, cropToRoi : bool) -> None:
+        """Change whether undistortFrame crops to the valid roi. Maps are rebuilt (or loaded) on the next use"""
+        if cropToRoi != self.cropToRoi:
+            self.cropToRoi = cropToRoi
+            self.__maps.clear()
+
+    def undistortFrame(self, frame : np.ndarray, interpolationMethod = cv2.INTER_LINEAR, dst : Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Undistort a full frame. Frames at a different resolution than the calibration are supported
+
+        Args:
+            frame: The distorted frame
+            interpolationMethod: cv2 interpolation flag
+            dst: Array to write the output into instead of allocating one. Must have the shape of the output
+                (see getUndistortedResolution) and the frame's dtype, otherwise a new array is returned
+
+        Returns:
+            The undistorted frame (dst, if it fit)
+        """
+        map1, map2, _ = self.__getMaps((frame.shape[1], frame.shape[0]))
+        return cv2.remap(frame, map1, map2, interpolationMethod, dst=dst)
+
+    def getUndistortedResolution(self, resolutionWH : tuple[int, int]) -> tuple[int, int]:
+        """Resolution (width, height) of undistortFrame's output for frames of resolutionWH. Smaller when cropping to the roi"""
+        map1, _, _ = self.__getMaps(resolutionWH)
+        return map1.shape[1], map1.shape[0]
+
+    def undistortPoints(self, points : np.ndarray, resolutionWH : Optional[tuple[int, int]] = None) -> np.ndarray:
+        """
+        Undistort only some pixel coordinates (eg detection boxes), for pipelines that need geometry but not the undistorted frame.
+        The output matches the pixel coordinates the same point would have in undistortFrame()'s output.
+
+        Args:
+            points: Nx2 array of (x, y) pixel coordinates in the distorted frame
+            resolutionWH: Resolution of the frame the points are from, defaults to the calibration resolution
+
+        Returns:
+            Nx2 array of undistorted (x, y) pixel coordinates
+        """
+        if resolutionWH is None:
+            resolutionWH = self.resolutionWH
+
+        cameraMatrix = self.getCameraMatrix(resolutionWH)
+        newCameraMatrix = self.getNewCameraMatrix(resolutionWH)
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 1, 2)
+        undistorted = cv2.undistortPoints(points, cameraMatrix, self.distortionCoeff, P=newCameraMatrix)
+        return undistorted.reshape(-1, 2)
+
+    def getMapXY(self) -> tuple[np.ndarray, np.ndarray]:
+        """Fixed point (CV_16SC2) maps at the calibration resolution, to be used with cv2.remap"""
+        map1, map2, _ = self.__getMaps(self.resolutionWH)
+        return map1, map2
+
+    def getCameraMatrix(self, resolutionWH : tuple[int, int]) -> np.ndarray:
+        """Camera matrix scaled to a resolution other than the calibration one"""
+        if tuple(resolutionWH) == tuple(self.resolutionWH):
+            return self.cameraMatrix
+
+        scaleX = resolutionWH[0] / self.resolutionWH[0]
+        scaleY = resolutionWH[1] / self.resolutionWH[1]
+        cameraMatrix = np.array(self.cameraMatrix, dtype=np.float64)
+        cameraMatrix[0] *= scaleX
+        cameraMatrix[1] *= scaleY
+        return cameraMatrix
+
+    def getNewCameraMatrix(self, resolutionWH : tuple[int, int]) -> np.ndarray:
+        """Camera matrix of the undistorted frame. Use this for geometry on undistorted frames/points"""
+        return self.__getMaps(resolutionWH)[2]
+
+    def getHash(self) -> str:
+        """Identifies this calibration, used to key the map cache"""
+        hasher = hashlib.sha1()
+        hasher.update(np.ascontiguousarray(self.cameraMatrix, dtype=np.float64).tobytes())
+        hasher.update(np.ascontiguousarray(self.distortionCoeff, dtype=np.float64).tobytes())
+        hasher.update(f"{self.resolutionWH[0]}x{self.resolutionWH[1]}".encode())
+        return hasher.hexdigest()[:16]
+
+    def __getMaps(self, resolutionWH : tuple[int, int]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        resolutionWH = (int(resolutionWH[0]), int(resolutionWH[1]))
+        maps = self.__maps.get(resolutionWH)
+        if maps is None:
+            maps = self.__loadCachedMaps(resolutionWH)
+            if maps is None:
+                maps = self.__createMaps(resolutionWH)
+                self.__saveCachedMaps(resolutionWH, maps)
+            self.__maps[resolutionWH] = maps
+        return maps
+
+    def __createMaps(self, resolutionWH : tuple[int, int]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        cameraMatrix = self.getCameraMatrix(resolutionWH)
         newCameraMatrix, roi = cv2.getOptimalNewCameraMatrix(
-            self.cameraMatrix, self.distortionCoeff, self.resolutionWH, 1, self.resolutionWH
+            cameraMatrix, self.distortionCoeff, resolutionWH, 1, resolutionWH
         )
 
-        # Generate undistortion and rectification maps
-        mapx, mapy = cv2.initUndistortRectifyMap(
-            self.cameraMatrix, self.distortionCoeff, None, newCameraMatrix, self.resolutionWH, cv2.CV_32FC1
+        outputWH = resolutionWH
+        x, y, w, h = roi
+        if self.cropToRoi and w > 0 and h > 0:
+            # shift the principal point so the roi starts at 0,0, then only the roi gets remapped
+            newCameraMatrix = np.array(newCameraMatrix)
+            newCameraMatrix[0][2] -= x
+            newCameraMatrix[1][2] -= y
+            outputWH = (w, h)
+
+        # Generate undistortion and rectification maps, in fixed point as that remaps a lot faster
+        map1, map2 = cv2.initUndistortRectifyMap(
+            cameraMatrix, self.distortionCoeff, None, newCameraMatrix, outputWH, cv2.CV_16SC2
         )
 
-        return mapx, mapy
+        return map1, map2, newCameraMatrix
+
+    def __getCachePath(self, resolutionWH : tuple[int, int]) -> str:
+        crop = "_crop" if self.cropToRoi else ""
+        return os.path.join(self.MAPCACHEDIR, f"{self.getHash()}_{resolutionWH[0]}x{resolutionWH[1]}{crop}.npz")
+
+    def __loadCachedMaps(self, resolutionWH : tuple[int, int]) -> Optional[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        try:
+            with np.load(self.__getCachePath(resolutionWH)) as cached:
+                return cached["map1"], cached["map2"], cached["newCameraMatrix"]
+        except Exception:
+            return None
+
+    def __saveCachedMaps(self, resolutionWH : tuple[int, int], maps : tuple[np.ndarray, np.ndarray, np.ndarray]) -> None:
+        try:
+            os.makedirs(self.MAPCACHEDIR, exist_ok=True)
+            path = self.__getCachePath(resolutionWH)
+            # per process, as agents sharing a camera calibration can write the same cache at once
+            tmpPath = f"{path}.{os.getpid()}.tmp.npz"
+            np.savez(tmpPath, map1=maps[0], map2=maps[1], newCameraMatrix=maps[2])
+            os.replace(tmpPath, path)
+        except Exception as e:
+            Sentinel.warning(f"Failed to cache undistortion maps! {e}")
 
     @staticmethod
     def fromJsonPath(path : str) -> Optional["CameraCalibration"]:
@@ -61,7 +186,7 @@ class CameraCalibration:
     def saveJson(cameraCalibration : "CameraCalibration", path : str):
         if not path.endswith(".json"):
             path = f"{path}.json"
-        os.makedirs(path, exist_ok=True)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
 
         calibrationJSON = {
             "CameraMatrix": cameraCalibration.cameraMatrix.tolist(),
@@ -4,6 +4,7 @@ from typing import Optional
 
 import cv2
 import numpy as np
+from Alt.Core.Utils.frameTrace import FrameTrace
 # necessary for the below frameNetPacket import!
 import capnp
 
@@ -11,26 +12,81 @@ from . import frameNetPacket_capnp # type:ignore
 
 
 class FramePacket:
+    # codecs
+    JPEG = "jpeg"
+    PNG = "png"
+    RAW = "raw" # no compression, the only codec for non uint8 frames (eg depth)
+
+    DEFAULTJPEGQUALITY = 90
+    DEFAULTPNGCOMPRESSION = 1 # png is lossless either way, higher levels are a lot slower for little gain
+
     @staticmethod
-    def createPacket(timeStamp : float, message : str, frame : np.ndarray) -> frameNetPacket_capnp.DataPacket:
+    def createPacket(
+        timeStamp : float,
+        message : str,
+        frame : np.ndarray,
+        trace : Optional[FrameTrace] = None,
+        codec : str = JPEG,
+        quality : Optional[int] = None,
+    ) -> frameNetPacket_capnp.DataPacket:
+        """
+        Args:
+            timeStamp: Timestamp of the frame
+            message: Message sent along
+            frame: The frame, (h, w) or (h, w, channels)
+            trace: Trace of the frame, if it is being traced
+            codec: JPEG, PNG or RAW
+            quality: Jpeg quality (0-100) or png compression level (0-9), codec default if None
+        """
+        # the encoded buffer goes into the packet as one blob, never as a list of python ints
+        if codec == FramePacket.JPEG:
+            quality = FramePacket.DEFAULTJPEGQUALITY if quality is None else quality
+            ret, encoded = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+            data = encoded.tobytes()
+        elif codec == FramePacket.PNG:
+            quality = FramePacket.DEFAULTPNGCOMPRESSION if quality is None else quality
+            ret, encoded = cv2.imencode(".png", frame, [int(cv2.IMWRITE_PNG_COMPRESSION), quality])
+            data = encoded.tobytes()
+        elif codec == FramePacket.RAW:
+            quality = 0
+            ret = True
+            data = np.ascontiguousarray(frame).tobytes()
+        else:
+            raise ValueError(f"Unknown codec: {codec}")
+
+        if not ret:
+            raise ValueError(f"Failed to encode frame as {codec}! {frame.shape=} {frame.dtype=}")
+
         packet = frameNetPacket_capnp.DataPacket.new_message()
         packet.message = message
         packet.timestamp = timeStamp
 
-        _, compressed_frame = cv2.imencode(
-            ".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), 90]
-        )  # You can adjust the quality
-
         packet_frame = packet.init("frame")
-        packet_frame.width = frame.shape[0]
-        packet_frame.height = frame.shape[1]
-        packet_frame.channels = frame.shape[2]
-        packet_frame.init("data", len(compressed_frame))
+        packet_frame.height = frame.shape[0]
+        packet_frame.width = frame.shape[1]
+        packet_frame.channels = frame.shape[2] if frame.ndim > 2 else 1
+        packet_frame.codec = codec
+        packet_frame.dtype = frame.dtype.name
+        packet_frame.quality = quality
+        packet_frame.data = data
 
-        packet_frame.data = compressed_frame.tolist()
+        if trace is not None:
+            trace.writeTo(packet.init("trace"))
 
         return packet
 
+    @staticmethod
+    def getTrace(packet : frameNetPacket_capnp.DataPacket) -> Optional[FrameTrace]:
+        """Trace of this frame, None if the sender did not trace it"""
+        if not packet._has("trace"):
+            return None
+        return FrameTrace.readFrom(packet.trace)
+
+    @staticmethod
+    def toBytes(packet : frameNetPacket_capnp.DataPacket) -> bytes:
+        """Serialized packet. Prefer this over base64 wherever bytes can be sent"""
+        return packet.to_bytes()
+
     @staticmethod
     def toBase64(packet : frameNetPacket_capnp.DataPacket):
         # Write the packet to a byte string directly
@@ -55,11 +111,31 @@ class FramePacket:
 
         return None
 
-    def getFrame(packet : frameNetPacket_capnp.DataPacket) -> np.ndarray:
-        # Decompress the JPEG data
-        compressed_frame = np.array(packet.frame.data, dtype=np.uint8)
-        decompressed_frame = cv2.imdecode(compressed_frame, cv2.IMREAD_COLOR)
-        return decompressed_frame
+    @staticmethod
+    def getFrame(packet : frameNetPacket_capnp.DataPacket, copy : bool = True) -> np.ndarray:
+        """
+        Decode the frame, color frames come back as BGR (h, w, 3)
+
+        Args:
+            packet: The received packet
+            copy: Return a writable frame. With False, RAW frames are a read only view of the packet's data (drawing on
+                them raises), which saves a copy when the frame is only read. Other codecs always decode into a new frame
+        """
+        packet_frame = packet.frame
+        # a view of the blob, no per byte conversion
+        buffer = np.frombuffer(packet_frame.data, dtype=np.uint8)
+        codec = str(packet_frame.codec)
+
+        if codec == FramePacket.RAW:
+            shape = (packet_frame.height, packet_frame.width)
+            if packet_frame.channels > 1:
+                shape += (packet_frame.channels,)
+            # packets from before the dtype field are uint8
+            frame = buffer.view(np.dtype(packet_frame.dtype or "uint8")).reshape(shape)
+            return frame.copy() if copy else frame
+
+        flags = cv2.IMREAD_UNCHANGED if codec == FramePacket.PNG else cv2.IMREAD_COLOR
+        return cv2.imdecode(buffer, flags)
 
 
 def test_packet() -> None:
@@ -0,0 +1,127 @@
+"""Stand ins for what Neo injects into an agent, so camera agents can be created and driven directly by tests"""
+
+import contextlib
+import logging
+import threading
+import time
+
+import numpy as np
+
+from Alt.Cameras.Captures import FakeCamera
+
+
+class FakeProperty:
+    def __init__(self, default):
+        self.value = default
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class FakePropertyOperator:
+    """Keeps properties in a dict by name, so tests can read what the agent published"""
+
+    def __init__(self):
+        self.properties = {}
+
+    def _create(self, name, default, *args, **kwargs):
+        return self.properties.setdefault(name, FakeProperty(default))
+
+    createProperty = _create
+    createReadOnlyProperty = _create
+    createCustomProperty = _create
+    createCustomReadOnlyProperty = _create
+
+
+class FakeUpdateOperator:
+    def __init__(self):
+        self.updates = {}
+
+    def createGlobalUpdate(self, name, default=None, *args, **kwargs):
+        return self.updates.setdefault(name, FakeProperty(default))
+
+
+class FakeTimer:
+    @contextlib.contextmanager
+    def run(self, subTimerName="main"):
+        yield
+
+    def measureAndUpdate(self, subTimerName="main"):
+        pass
+
+    def resetMeasurement(self, subTimerName="main"):
+        pass
+
+
+class FakeTimeOperator:
+    def getTimer(self, timeName="timers"):
+        return FakeTimer()
+
+
+class FakeStreamProxy:
+    """Records the value of every frame put, put() can be held to stall the publisher"""
+
+    def __init__(self, subscribed=False):
+        self.subscribed = subscribed
+        self.putValues = []
+        self.putting = threading.Event()
+        self.allowPut = threading.Event()
+        self.allowPut.set()
+
+    def put(self, frame):
+        self.putting.set()
+        self.allowPut.wait(5)
+        self.putValues.append(int(frame.flat[0]))
+
+    def getStreamPath(self):
+        return "http://localhost/fake.mjpg"
+
+    def hasSubscribers(self):
+        return self.subscribed
+
+
+class CountingCamera(FakeCamera):
+    """
+    Every frame is filled with its number. Each read waits until the test allows it, so the test decides how many
+    frames are captured. Reads into the same buffer every time, like real captures.
+    """
+
+    def __init__(self, name="countingCam"):
+        super().__init__(name)
+        self.buffer = np.zeros((48, 64, 3), dtype=np.uint8)
+        self.allowed = threading.Semaphore(0)
+        self.count = 0
+        self.waiting = False
+        self.closed = False
+
+    def allow(self, frames):
+        for _ in range(frames):
+            self.allowed.release()
+
+    def getMainFrame(self):
+        self.waiting = True
+        while not self.allowed.acquire(timeout=0.05):
+            if self.closed:
+                # ends the capture loop
+                return None
+        self.waiting = False
+        self.count += 1
+        self._markCaptured(sequenceNumber=self.count)
+        self.buffer[:] = self.count
+        return self.buffer
+
+    def getFrameShape(self):
+        return self.buffer.shape
+
+    def close(self):
+        self.closed = True
+
+
+def waitFor(condition, timeoutS=5):
+    start = time.time()
+    while not condition():
+        assert time.time() - start < timeoutS
+        time.sleep(0.005)
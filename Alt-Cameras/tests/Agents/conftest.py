@@ -0,0 +1,43 @@
+import logging
+from functools import partial
+
+import pytest
+from Alt.Core.Constants.AgentConstants import ProxyType
+
+from agentHarness import CountingCamera, FakePropertyOperator, FakeStreamProxy, FakeTimeOperator, FakeUpdateOperator
+
+
+@pytest.fixture
+def startAgent(monkeypatch, tmp_path):
+    """Creates a camera agent with stand in operators instead of running it under Neo, so tests can drive
+    runPeriodic themselves and see exceptions raised by it"""
+    from Alt.Cameras.Calibration import CalibrationUtil as calibrationUtilModule
+
+    # no saved calibration is picked up from the machine running the tests
+    monkeypatch.setattr(calibrationUtilModule, "user_data_dir", str(tmp_path))
+    agents = []
+
+    def start(agentClass, **kwargs):
+        agent = agentClass(**kwargs)
+        agent._injectCore(shareOperator=None, isMainThread=False, agentName="testAgent")
+        agent._injectNEW(
+            xclient=None,
+            propertyOperator=FakePropertyOperator(),
+            configOperator=None,
+            updateOperator=FakeUpdateOperator(),
+            timeOperator=FakeTimeOperator(),
+            metadataOperator=None,
+            logger=logging.getLogger("testAgent"),
+        )
+        # the proxies Neo would make for the agent bound with these arguments
+        agent._setProxies({name: FakeStreamProxy() for name in ProxyType.getProxyRequests(partial(agentClass, **kwargs))})
+        agent.create()
+        agents.append(agent)
+        return agent
+
+    yield start
+    for agent in agents:
+        if isinstance(agent.capture, CountingCamera):
+            # a read waiting for the test to allow it would keep the capture thread from stopping
+            agent.capture.close()
+        agent.onClose()
@@ -1,6 +1,11 @@
+import numpy as np
+import pytest
+from Alt.Core.Constants.AgentConstants import ProxyType
 from Alt.Core.TestUtils import AgentTests
 from Alt.Cameras.Agents import CameraUsingAgentBase
-from Alt.Cameras.Captures import FakeCamera, FakeDepthCamera
+from Alt.Cameras.Captures import CaptureGroup, FakeCamera, FakeDepthCamera
+
+from agentHarness import CountingCamera, waitFor
 
 
 
@@ -28,4 +33,137 @@ def test_depth_capture():
         def getDescription(self):
             return "Camera test depth"
     
-    AgentTests.test_agent(CamTest)
\ No newline at end of file
+    AgentTests.test_agent(CamTest)
+
+def test_pipelined_capture():
+    class CamTest(CameraUsingAgentBase):
+        def __init__(self, **kwargs):
+            super().__init__(capture=FakeCamera(), pipelined=True)
+
+        def getDescription(self):
+            return "Camera test pipelined"
+
+        def runPeriodic(self):
+            super().runPeriodic()
+            self.Sentinel.info("LOGLOGLOGLOGLOGLOG")
+
+    AgentTests.test_agent(CamTest)
+
+
+def test_capture_group():
+    class CamTest(CameraUsingAgentBase):
+        def __init__(self, **kwargs):
+            super().__init__(capture=CaptureGroup("group", [FakeCamera("left"), FakeCamera("right")]), pipelined=True)
+
+        def getDescription(self):
+            return "Camera test group"
+
+    AgentTests.test_agent(CamTest)
+
+
+class PipelinedCamTest(CameraUsingAgentBase):
+    def getDescription(self):
+        return "Camera test pipelined"
+
+
+def makeGroupCamera(name, value):
+    camera = FakeCamera(name)
+    camera.fakeFrame = np.full((48, 64, 3), value, dtype=np.uint8)
+    return camera
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_capture_group_frame_sets(startAgent, pipelined):
+    left, right = makeGroupCamera("left", 10), makeGroupCamera("right", 20)
+    group = CaptureGroup("group", [left, right])
+    agent = startAgent(PipelinedCamTest, capture=group, pipelined=pipelined)
+
+    agent.runPeriodic()
+    first = agent.latestFrameSet
+    assert first is not None
+    assert [int(frame[0, 0, 0]) for frame in first.frames] == [10, 20]
+    # the main frame is the first camera's frame of the set
+    assert agent.latestFrameMain[0, 0, 0] == 10
+    if pipelined:
+        # handed over from the capture thread, so they must not be the captures' own buffers
+        assert first.frames[0] is not left.fakeFrame and first.frames[1] is not right.fakeFrame
+
+    agent.runPeriodic()
+    assert agent.latestFrameSet.sequence > first.sequence
+    assert agent.capture.getSequenceNumber() >= agent.latestFrameSet.sequence
+
+    properties = agent.propertyOperator.properties
+    assert properties["captureGroup.failedSets"].get() == 0
+    assert 0 <= properties["captureGroup.skewP50Ms"].get() <= properties["captureGroup.skewMaxMs"].get()
+
+
+def test_pipelined_capture_drops_oldest(startAgent):
+    camera = CountingCamera()
+    camera.allow(1)  # read by create() to test the camera
+    agent = startAgent(PipelinedCamTest, capture=camera, pipelined=True)
+
+    # five frames while the agent is not taking any, the queue keeps the newest two
+    camera.allow(5)
+    waitFor(lambda: camera.count == 6 and camera.waiting and agent.captureQueue.qsize() == 2)
+    # the dropped frames went back to the pool, only the queued ones are held
+    assert agent.framePool.getStats()["outstanding"] == 2
+
+    agent.runPeriodic()
+    assert agent.latestFrameMain[0, 0, 0] == 5
+    agent.runPeriodic()
+    assert agent.latestFrameMain[0, 0, 0] == 6
+    # frames are copies, the camera reading into its buffer again does not change them
+    assert agent.latestFrameMain is not camera.buffer
+    assert agent.propertyOperator.properties["pipeline.droppedCaptureFrames"].get() == 3
+    assert agent.framePool.getStats()["outstanding"] == 1
+
+
+def test_pipelined_publish_drops_oldest(startAgent):
+    camera = CountingCamera()
+    camera.allow(1)
+    agent = startAgent(PipelinedCamTest, capture=camera, pipelined=True)
+    agent.streamProxy.subscribed = True
+    agent.streamFps.set(1e6)
+    # the publisher gets stuck on its first frame
+    agent.streamProxy.allowPut.clear()
+
+    published = []
+    for tick in range(5):
+        camera.allow(1)
+        agent.runPeriodic()
+        published.append(int(agent.latestFrameMain[0, 0, 0]))
+        if tick == 1:
+            # the first frame shown was handed to the publisher, which is now stuck on it
+            waitFor(agent.streamProxy.putting.is_set)
+    assert agent.publishQueue.qsize() == 2
+
+    agent.streamProxy.allowPut.set()
+    waitFor(lambda: agent.publishQueue.qsize() == 0 and len(agent.streamProxy.putValues) == 3)
+    # frames 2 to 5 were handed to the publisher (6 is only on the next tick), 3 was dropped while it was stuck on 2
+    assert published == [2, 3, 4, 5, 6]
+    assert agent.streamProxy.putValues == [2, 4, 5]
+
+    camera.allow(1)
+    agent.runPeriodic()
+    assert agent.propertyOperator.properties["pipeline.droppedPublishFrames"].get() == 1
+    waitFor(lambda: len(agent.streamProxy.putValues) == 4)
+    # everything published was released, what is left is the latest frame and anything the capture queued since
+    waitFor(lambda: agent.framePool.getStats()["outstanding"] == 1 + agent.captureQueue.qsize())
+
+
+def test_depth_stream_only_for_depth_cameras(startAgent):
+    colorRequests = ProxyType.getProxyRequests(PipelinedCamTest.bind(capture=FakeCamera()))
+    assert colorRequests == {PipelinedCamTest.CAMERASTREAMNAME: ProxyType.STREAM}
+    depthRequests = ProxyType.getProxyRequests(PipelinedCamTest.bind(capture=FakeDepthCamera()))
+    assert depthRequests[PipelinedCamTest.DEPTHSTREAMNAME] is ProxyType.DEPTHSTREAM
+
+    colorAgent = startAgent(PipelinedCamTest, capture=FakeCamera())
+    assert colorAgent.depthStreamProxy is None
+    assert "stream.depthIP" not in colorAgent.propertyOperator.properties
+    # a missing proxy the agent does not need is not an error
+    colorAgent._runOwnCreate()
+
+    depthAgent = startAgent(PipelinedCamTest, capture=FakeDepthCamera())
+    assert depthAgent.depthStreamProxy is not None
+    assert "stream.depthIP" in depthAgent.propertyOperator.properties
+    depthAgent._runOwnCreate()
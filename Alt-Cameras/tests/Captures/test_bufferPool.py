@@ -0,0 +1,36 @@
+import numpy as np
+
+from Alt.Cameras.Captures.tools.bufferPool import FrameBufferPool
+
+
+def test_buffers_are_recycled_after_last_release():
+    pool = FrameBufferPool()
+    frame = pool.acquire((480, 640, 3))
+    assert frame.shape == (480, 640, 3) and frame.dtype == np.uint8
+
+    # a second holder, eg the publish stage
+    pool.retain(frame)
+    pool.release(frame)
+    assert pool.acquire((480, 640, 3)) is not frame
+
+    pool.release(frame)
+    assert pool.acquire((480, 640, 3)) is frame
+
+    # other shapes and dtypes get their own buffers
+    assert pool.acquire((480, 640, 3), np.uint16) is not frame
+    assert pool.getStats() == {"allocations": 3, "reuses": 1, "outstanding": 3, "free": 0}
+
+
+def test_foreign_arrays_are_ignored():
+    pool = FrameBufferPool(maxFreePerShape=1)
+    foreign = np.zeros((4, 4), dtype=np.uint8)
+    pool.retain(foreign)
+    pool.release(foreign)
+    assert not pool.owns(foreign)
+    assert pool.acquire((4, 4)) is not foreign
+
+    # only maxFreePerShape released buffers are kept
+    first, second = pool.acquire((2, 2)), pool.acquire((2, 2))
+    pool.release(first)
+    pool.release(second)
+    assert pool.getStats()["free"] == 1
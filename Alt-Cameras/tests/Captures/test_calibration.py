@@ -0,0 +1,137 @@
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from Alt.Cameras.Captures.tools import calibration
+from Alt.Cameras.Captures.tools.calibration import Calibrator
+
+IMAGEWH = (1280, 960)
+CAMERAMATRIX = np.array([[900.0, 0, 640], [0, 900.0, 480], [0, 0, 1]])
+CHESSBOARDDIM = (7, 10)
+SQUAREPX = 40 # of the board texture
+
+
+def _boardTexture() -> np.ndarray:
+    # one extra square on every side of the inner corners, and a white margin
+    cols, rows = CHESSBOARDDIM[0] + 1, CHESSBOARDDIM[1] + 1
+    texture = np.full(((rows + 2) * SQUAREPX, (cols + 2) * SQUAREPX), 255, dtype=np.uint8)
+    for row in range(rows):
+        for col in range(cols):
+            if (row + col) % 2 == 0:
+                y, x = (row + 1) * SQUAREPX, (col + 1) * SQUAREPX
+                texture[y : y + SQUAREPX, x : x + SQUAREPX] = 0
+    return texture
+
+
+POSES = [(0.3, 0, 0), (-0.3, 0.2, 0.1), (0, 0.4, -0.1), (0.2, -0.3, 0.3), (-0.2, -0.2, 0)]
+
+
+def _renderViews(poses=POSES, offsets=None):
+    """Pinhole views of the board (no distortion)"""
+    texture = _boardTexture()
+    squareMM = 25
+    toMM = np.diag([squareMM / SQUAREPX, squareMM / SQUAREPX, 1])
+    center = np.array([texture.shape[1], texture.shape[0]]) * squareMM / SQUAREPX / 2
+    views = []
+    for idx, rvec in enumerate(poses):
+        offset = offsets[idx] if offsets is not None else (0, 0)
+        rotation, _ = cv2.Rodrigues(np.array(rvec, dtype=float))
+        tvec = np.array([offset[0], offset[1], 700.0]) - rotation @ np.array([center[0], center[1], 0])
+        homography = CAMERAMATRIX @ np.column_stack([rotation[:, 0], rotation[:, 1], tvec]) @ toMM
+        view = cv2.warpPerspective(texture, homography, IMAGEWH, borderValue=200)
+        views.append(cv2.cvtColor(view, cv2.COLOR_GRAY2BGR))
+    return views
+
+
+def _writeViews(imagePath: str) -> None:
+    for idx, view in enumerate(_renderViews()):
+        cv2.imwrite(os.path.join(imagePath, f"Frame#{idx}.jpg"), view)
+
+
+def test_parallel_chessboard_calibration_is_cached(tmp_path, monkeypatch):
+    _writeViews(str(tmp_path))
+
+    result = Calibrator.chessboard_calibration(CHESSBOARDDIM, workers=2, imagePath=str(tmp_path))
+    assert result is not None
+    np.testing.assert_allclose(result.cameraMatrix, CAMERAMATRIX, rtol=0.02, atol=5)
+    assert len(os.listdir(tmp_path / calibration.CORNERCACHEDIR)) == 5
+
+    # solving again with other flags only reads the cached corners
+    def noDetection(*args, **kwargs):
+        raise AssertionError("corners should have come from the cache")
+
+    monkeypatch.setattr(calibration, "detectChessboard", noDetection)
+    fixed = Calibrator.chessboard_calibration(
+        CHESSBOARDDIM, flags=cv2.CALIB_FIX_ASPECT_RATIO, workers=1, imagePath=str(tmp_path)
+    )
+    assert fixed is not None
+    np.testing.assert_allclose(fixed.cameraMatrix, CAMERAMATRIX, rtol=0.02, atol=5)
+
+
+def test_incremental_calibration_stops_early(tmp_path, monkeypatch):
+    monkeypatch.setattr(calibration, "CALIBRATIONPHOTOPATH", str(tmp_path))
+    calibrator = Calibrator(
+        nFrames=100, targetW=IMAGEWH[0], targetH=IMAGEWH[1], isCharucoBoard=False,
+        minCoverage=0.5, minPoseBins=4, maxReprojectionError=1.0, minViews=6,
+    )
+
+    blank = np.full((IMAGEWH[1], IMAGEWH[0], 3), 200, dtype=np.uint8)
+    assert not calibrator.savePicture(blank)
+
+    poses = POSES + [(0.35, 0.1, 0), (-0.1, -0.35, 0.2), (0.05, 0.05, 0)]
+    offsets = [(-200, -150), (200, 150), (-200, 150), (200, -150), (0, 0), (150, 0), (-150, 0), (0, 200)]
+    for view in _renderViews(poses, offsets):
+        assert calibrator.savePicture(view)
+        assert calibrator.waitForEstimate(timeout=10)
+        if calibrator.isFinished():
+            break
+
+    progress = calibrator.getProgress()
+    # stopped on coverage and error, long before nFrames
+    assert calibrator.isFinished() and progress["pictures"] < calibrator.nFrames
+    assert progress["views"] >= 6 and progress["coverage"] >= 0.5 and progress["poseBins"] >= 4
+    assert progress["reprojectionError"] <= 1.0
+
+    result = calibrator.startCalibration()
+    assert result is not None
+    np.testing.assert_allclose(result.cameraMatrix, CAMERAMATRIX, rtol=0.02, atol=5)
+
+
+def test_running_calibration_is_solved_in_the_background(tmp_path, monkeypatch):
+    monkeypatch.setattr(calibration, "CALIBRATIONPHOTOPATH", str(tmp_path))
+    solving = threading.Event()
+    release = threading.Event()
+    solvedWith = []
+    solveViews = calibration._solveViews
+
+    def slowSolve(objPoints, imgPoints, imageWH):
+        solving.set()
+        assert release.wait(10)
+        solvedWith.append(len(imgPoints))
+        return solveViews(objPoints, imgPoints, imageWH)
+
+    monkeypatch.setattr(calibration, "_solveViews", slowSolve)
+    calibrator = Calibrator(
+        nFrames=len(POSES), targetW=IMAGEWH[0], targetH=IMAGEWH[1], isCharucoBoard=False, minViews=10,
+    )
+
+    # pictures are taken while the first solve (of the first three views) is still running
+    for view in _renderViews():
+        assert calibrator.savePicture(view)
+    assert solving.wait(10)
+    progress = calibrator.getProgress()
+    assert progress["views"] == 5 and progress["reprojectionError"] is None
+
+    # the views taken meanwhile are solved together once it is done, not one solve each
+    release.set()
+    assert calibrator.waitForEstimate(timeout=10)
+    assert solvedWith == [3, 5]
+    assert calibrator.getProgress()["reprojectionError"] is not None
+
+    # all nFrames pictures were taken, and nothing was added since the last solve so finishing does not solve again
+    assert calibrator.isFinished()
+    result = calibrator.startCalibration()
+    assert result is not None and solvedWith == [3, 5]
+    np.testing.assert_allclose(result.cameraMatrix, CAMERAMATRIX, rtol=0.02, atol=5)
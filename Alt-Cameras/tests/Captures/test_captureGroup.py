@@ -0,0 +1,92 @@
+import time
+
+import numpy as np
+import pytest
+
+from Alt.Cameras.Captures.Capture import Capture
+from Alt.Cameras.Captures.CaptureGroup import CaptureGroup
+
+
+class SlowDecodeCapture(Capture):
+    """grab() is instant, the frame is only produced (slowly) by retrieve()"""
+
+    def __init__(self, name, value, decodeS=0.01, failing=False):
+        super().__init__(name)
+        self.value = value
+        self.decodeS = decodeS
+        self.failing = failing
+        self.grabTimes = []
+        self.closed = False
+
+    def create(self):
+        if self.failing:
+            raise BrokenPipeError("no camera")
+
+    def grab(self):
+        self.grabTimes.append(time.monotonic())
+        return True
+
+    def retrieve(self):
+        time.sleep(self.decodeS)
+        return np.full((4, 4, 3), self.value, dtype=np.uint8)
+
+    def getMainFrame(self):
+        self.grab()
+        return self.retrieve()
+
+    def getFps(self):
+        return 30 + self.value
+
+    def isOpen(self):
+        return not self.closed
+
+    def close(self):
+        self.closed = True
+
+
+def test_grabs_back_to_back():
+    captures = [SlowDecodeCapture(f"cam{idx}", idx) for idx in range(3)]
+    group = CaptureGroup("group", captures)
+    group.create()
+
+    frameSet = group.getFrameSet()
+    assert frameSet is not None and frameSet.sequence == 1
+    assert [frame[0, 0, 0] for frame in frameSet.frames] == [0, 1, 2]
+    # all grabs happen before the (slow) retrieves
+    assert frameSet.skewMs < captures[0].decodeS * 1000
+
+    main = group.getMainFrame()
+    assert main is not None and main[0, 0, 0] == 0
+    assert group.getLastFrameSet().sequence == 2
+
+    stats = group.getSkewStats()
+    assert stats["sets"] == 2 and stats["failedSets"] == 0
+    assert 0 <= stats["skewP50Ms"] <= stats["skewMaxMs"]
+    assert group.getFps() == 30
+
+    group.close()
+    assert not group.isOpen()
+
+
+def test_failed_member():
+    captures = [SlowDecodeCapture("ok", 0), SlowDecodeCapture("broken", 1)]
+    captures[1].retrieve = lambda: None
+    group = CaptureGroup("group", captures)
+
+    assert group.getFrameSet() is None
+    assert group.getMainFrame() is None
+    assert group.getSkewStats() == {"sets": 0, "failedSets": 2}
+
+
+def test_create_closes_opened_captures_on_failure():
+    captures = [SlowDecodeCapture("ok", 0), SlowDecodeCapture("broken", 1, failing=True)]
+    with pytest.raises(BrokenPipeError):
+        CaptureGroup("group", captures).create()
+    assert captures[0].closed
+
+
+def test_sets_are_stamped():
+    group = CaptureGroup("group", [SlowDecodeCapture("a", 0, decodeS=0), SlowDecodeCapture("b", 1, decodeS=0)])
+    frameSet = group.getFrameSet()
+    assert group.getSequenceNumber() == frameSet.sequence == 1
+    assert group.getCaptureTimestamp() == frameSet.timestamp
@@ -0,0 +1,161 @@
+import sys
+import types
+
+import numpy as np
+import pytest
+
+SHAPE = (48, 64)
+
+
+class FakeFrame:
+    def __init__(self, data):
+        self.data = data
+
+    def get_data(self):
+        return self.data
+
+
+class FakeFrameset:
+    def __init__(self, number):
+        self.number = number
+        self.depth = FakeFrame(np.full(SHAPE, number, dtype=np.uint16))
+        self.color = FakeFrame(np.full(SHAPE + (3,), number, dtype=np.uint8))
+
+    def get_depth_frame(self):
+        return self.depth
+
+    def get_color_frame(self):
+        return self.color
+
+    def get_frame_number(self):
+        return self.number
+
+    def get_frame_timestamp_domain(self):
+        return "hardware_clock"
+
+    def get_timestamp(self):
+        return 0.0
+
+
+class FakePipeline:
+    """Stands in for rs.pipeline, every wait_for_frames is a new frameset"""
+
+    coeffs = [0.0] * 5
+
+    def __init__(self):
+        self.waits = 0
+
+    def start(self, config):
+        intrinsics = types.SimpleNamespace(
+            width=SHAPE[1], height=SHAPE[0], ppx=32.0, ppy=24.0, fx=50.0, fy=50.0, model="brown", coeffs=self.coeffs
+        )
+        streamProfile = types.SimpleNamespace(get_intrinsics=lambda: intrinsics)
+        stream = types.SimpleNamespace(as_video_stream_profile=lambda: streamProfile)
+        return types.SimpleNamespace(get_stream=lambda rsStream: stream)
+
+    def wait_for_frames(self):
+        self.waits += 1
+        return FakeFrameset(self.waits)
+
+    def stop(self):
+        pass
+
+
+class FakeAlign:
+    def __init__(self, stream):
+        self.stream = stream
+        self.processed = 0
+
+    def process(self, frames):
+        self.processed += 1
+        return frames
+
+
+def makeFakeRs():
+    fakeRs = types.ModuleType("pyrealsense2")
+    fakeRs.pipeline = FakePipeline
+    fakeRs.config = lambda: types.SimpleNamespace(enable_stream=lambda *args: None, enable_device=lambda serial: None)
+    fakeRs.align = FakeAlign
+    fakeRs.stream = types.SimpleNamespace(depth="depth", color="color")
+    fakeRs.format = types.SimpleNamespace(z16="z16", bgr8="bgr8")
+    fakeRs.timestamp_domain = types.SimpleNamespace(global_time="global_time")
+    return fakeRs
+
+
+# no device (or sdk) is needed, the helper only ever talks to the fake
+sys.modules.setdefault("pyrealsense2", makeFakeRs())
+
+from Alt.Cameras.Captures.tools import realsense2Helper as helperModule  # noqa: E402
+from Alt.Cameras.Captures.D435Capture import D435Capture  # noqa: E402
+from Alt.Cameras.Constants.resolution import D435IResolution  # noqa: E402
+from Alt.Cameras.Parameters.CameraCalibration import CameraCalibration  # noqa: E402
+
+
+@pytest.fixture
+def fakeRs(monkeypatch, tmp_path):
+    fake = makeFakeRs()
+    monkeypatch.setattr(helperModule, "rs", fake)
+    monkeypatch.setattr(CameraCalibration, "MAPCACHEDIR", str(tmp_path))
+    return fake
+
+
+def makeCapture(**kwargs):
+    capture = D435Capture("d435", D435IResolution.RS480P, **kwargs)
+    capture.create()
+    return capture
+
+
+def test_getters_share_a_frameset(fakeRs):
+    capture = makeCapture()
+    pipeline = capture.realsenseHelper.pipeline
+
+    # color then depth come from the same frameset
+    color = capture.getMainFrame()
+    depth = capture.getDepthFrame()
+    assert pipeline.waits == 1
+    assert color[0, 0, 0] == depth[0, 0] == 1
+    assert capture.getSequenceNumber() == 1
+
+    # asking for a stream again fetches the next one
+    assert capture.getMainFrame()[0, 0, 0] == 2
+    depth, color = capture.getDepthAndColorFrame()
+    assert pipeline.waits == 3 and depth[0, 0] == color[0, 0, 0] == 3
+
+
+def test_depth_is_not_remapped_unless_asked(fakeRs, monkeypatch):
+    monkeypatch.setattr(FakePipeline, "coeffs", [-0.3, 0.1, 0.0, 0.0, 0.0])
+    remapped = []
+    original = CameraCalibration.undistortFrame
+
+    def countingUndistort(self, frame, *args, **kwargs):
+        remapped.append(frame.dtype)
+        return original(self, frame, *args, **kwargs)
+
+    monkeypatch.setattr(CameraCalibration, "undistortFrame", countingUndistort)
+
+    capture = makeCapture()
+    capture.getDepthFrame()
+    assert remapped == []
+    capture.getDepthAndColorFrame()
+    assert remapped == [np.uint8]
+
+    capture = makeCapture(undistortDepth=True)
+    capture.getDepthFrame()
+    assert remapped[-1] == np.uint16
+
+
+def test_zero_distortion_is_never_remapped(fakeRs, monkeypatch):
+    monkeypatch.setattr(CameraCalibration, "undistortFrame", lambda *args, **kwargs: pytest.fail("remapped"))
+    capture = makeCapture(undistortDepth=True)
+    depth, color = capture.getDepthAndColorFrame()
+    assert depth.shape == SHAPE and color.shape == SHAPE + (3,)
+
+
+def test_align_depth_to_color(fakeRs):
+    capture = makeCapture(alignDepthToColor=True)
+    helper = capture.realsenseHelper
+    assert helper.getCameraIntrinsics(helper.DEPTH) is helper.getCameraIntrinsics(helper.COLOR)
+
+    capture.getDepthFrame()
+    capture.getMainFrame()
+    assert helper.align.stream == fakeRs.stream.color and helper.align.processed == 1
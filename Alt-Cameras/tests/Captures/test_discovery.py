@@ -0,0 +1,80 @@
+import os
+import time
+
+from Alt.Cameras.Captures.tools import discovery
+
+
+def _addCamera(sysfsRoot, usbRoot, index, name, port, vendor="0c45", product="6366", nodeIndex=0):
+    usbDevice = usbRoot / port
+    interface = usbDevice / f"{port}:1.0"
+    interface.mkdir(parents=True, exist_ok=True)
+    (usbDevice / "idVendor").write_text(vendor + "\n")
+    (usbDevice / "idProduct").write_text(product + "\n")
+
+    node = sysfsRoot / f"video{index}"
+    node.mkdir(parents=True)
+    (node / "name").write_text(name + "\n")
+    (node / "index").write_text(f"{nodeIndex}\n")
+    os.symlink(interface, node / "device")
+
+
+def _makeSysfs(tmp_path):
+    sysfsRoot, usbRoot = tmp_path / "video4linux", tmp_path / "usb"
+    _addCamera(sysfsRoot, usbRoot, 0, "Integrated Webcam", "1-1", vendor="046d")
+    _addCamera(sysfsRoot, usbRoot, 1, "Integrated Webcam", "1-1", vendor="046d", nodeIndex=1)
+    _addCamera(sysfsRoot, usbRoot, 2, "Arducam OV9281", "1-2")
+    _addCamera(sysfsRoot, usbRoot, 4, "Arducam OV9281", "1-3")
+    return sysfsRoot, usbRoot
+
+
+def test_list_devices_from_sysfs(tmp_path):
+    sysfsRoot, _ = _makeSysfs(tmp_path)
+    devices = discovery.listV4L2Devices(str(sysfsRoot))
+    assert [device.index for device in devices] == [0, 1, 2, 4]
+    assert devices[2].name == "Arducam OV9281" and devices[2].usbPort == "1-2" and devices[2].vendorId == "0c45"
+    assert devices[1].nodeIndex == 1
+    assert discovery.listV4L2Devices(str(tmp_path / "missing")) == []
+
+
+def test_metadata_match_probe_and_cache(tmp_path, monkeypatch):
+    sysfsRoot, usbRoot = _makeSysfs(tmp_path)
+    cachePath = str(tmp_path / "cache.json")
+    probed = []
+
+    def fakeProbe(index, expectedRes):
+        probed.append(index)
+        if index == 2:
+            time.sleep(10) # a stuck device
+        return index == 4
+
+    monkeypatch.setattr(discovery, "_probe", fakeProbe)
+
+    def find():
+        return discovery.findCamera(
+            expectedRes=(800, 1280, 3), name="arducam", timeoutS=0.3, sysfsRoot=str(sysfsRoot), cachePath=cachePath
+        )
+
+    start = time.monotonic()
+    assert find() == 4
+    # only the arducams were opened, concurrently, and the stuck one did not hold things up past the timeout
+    assert sorted(probed) == [2, 4]
+    assert time.monotonic() - start < 2
+
+    # same usb topology, nothing is opened
+    probed.clear()
+    assert find() == 4
+    assert probed == []
+
+    # a camera moved to another port, so the cache is stale
+    _addCamera(sysfsRoot, usbRoot, 6, "Arducam OV9281", "1-4")
+    probed.clear()
+    assert find() == 4
+    assert sorted(probed) == [2, 4, 6]
+
+
+def test_no_candidates(tmp_path, monkeypatch):
+    sysfsRoot, _ = _makeSysfs(tmp_path)
+    monkeypatch.setattr(discovery, "_probe", lambda index, expectedRes: True)
+    assert discovery.findCamera(name="realsense", sysfsRoot=str(sysfsRoot), useCache=False) is None
+    # metadata alone is enough without an expected resolution
+    assert discovery.findCamera(usbPort="1-3", sysfsRoot=str(sysfsRoot), useCache=False) == 4
@@ -0,0 +1,147 @@
+import time
+
+import cv2
+import numpy as np
+
+from Alt.Cameras.Captures.OpenCVCapture import OpenCVCapture
+from Alt.Cameras.Captures.tools.frameGrabber import FrameGrabber
+
+
+class SyntheticSource:
+    """Produces frames filled with an increasing counter, at a fixed rate"""
+
+    def __init__(self, fps=200, shape=(48, 64, 3)):
+        self.period = 1 / fps
+        self.shape = shape
+        self.count = 0
+
+    def grab(self):
+        time.sleep(self.period)
+        self.count += 1
+        return True
+
+    def retrieve(self, image=None):
+        if image is None:
+            image = np.empty(self.shape, dtype=np.uint8)
+        image[:] = self.count % 256
+        return True, image
+
+
+def test_latest_frame_and_stats():
+    source = SyntheticSource()
+    grabber = FrameGrabber(source, source.shape)
+    grabber.start()
+
+    frame, timestamp, sequence = grabber.getLatest()
+    assert frame.shape == source.shape
+    assert timestamp <= time.monotonic()
+
+    # a slow reader skips frames, and always gets the newest one
+    time.sleep(0.1)
+    frame, _, newSequence = grabber.getLatest()
+    assert newSequence > sequence + 1
+    assert frame[0, 0, 0] == newSequence % 256
+
+    grabber.stop()
+    stats = grabber.getStats()
+    assert stats["grabbed"] >= newSequence
+    assert stats["dropped"] > 0
+
+    # nothing new once stopped, the last frame is handed out again
+    _, _, last = grabber.getLatest(timeoutS=0)
+    _, _, again = grabber.getLatest(timeoutS=0)
+    assert again == last
+    assert grabber.getStats()["duplicates"] == 1
+
+
+def test_returned_buffer_is_not_overwritten():
+    source = SyntheticSource(fps=1000)
+    grabber = FrameGrabber(source, source.shape)
+    grabber.start()
+
+    frame, _, sequence = grabber.getLatest()
+    time.sleep(0.05)
+    # the grabber kept going, but never wrote into the buffer we hold
+    assert np.all(frame == sequence % 256)
+    grabber.stop()
+
+
+def test_opencv_capture_thread_from_video(tmp_path):
+    videoPath = str(tmp_path / "synthetic.avi")
+    writer = cv2.VideoWriter(videoPath, cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48))
+    for i in range(60):
+        writer.write(np.full((48, 64, 3), i * 4, dtype=np.uint8))
+    writer.release()
+
+    capture = OpenCVCapture("test", videoPath, useV4L2Backend=False, useCaptureThread=True)
+    capture.create()
+
+    frame = capture.getMainFrame()
+    assert frame.shape == (48, 64, 3)
+    assert capture.getCaptureTimestamp() > 0
+    assert capture.getCaptureStats()["grabbed"] >= 1
+
+    capture.close()
+
+
+def test_opencv_capture_copy_frames(tmp_path):
+    videoPath = str(tmp_path / "synthetic.avi")
+    writer = cv2.VideoWriter(videoPath, cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48))
+    for i in range(60):
+        writer.write(np.full((48, 64, 3), i * 4, dtype=np.uint8))
+    writer.release()
+
+    capture = OpenCVCapture("test", videoPath, useV4L2Backend=False, useCaptureThread=True, copyFrames=True)
+    capture.create()
+
+    first = capture.getMainFrame()
+    second = capture.getMainFrame()
+    # copies never share memory with the grabber's buffers, or with each other
+    assert not np.shares_memory(first, second)
+
+    capture.close()
+
+
+def test_opencv_capture_sequence_numbers(tmp_path):
+    videoPath = str(tmp_path / "synthetic.avi")
+    writer = cv2.VideoWriter(videoPath, cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48))
+    for i in range(10):
+        writer.write(np.full((48, 64, 3), i * 4, dtype=np.uint8))
+    writer.release()
+
+    capture = OpenCVCapture("test", videoPath, useV4L2Backend=False)
+    capture.create()
+    assert capture.getSequenceNumber() == 0
+
+    before = time.monotonic()
+    capture.getMainFrame()
+    first = capture.getSequenceNumber()
+    assert capture.getCaptureTimestamp() >= before
+
+    assert capture.grab() and capture.retrieve() is not None
+    assert capture.getSequenceNumber() == first + 1
+    capture.close()
+
+
+def test_opencv_capture_read_into(tmp_path):
+    videoPath = str(tmp_path / "synthetic.avi")
+    writer = cv2.VideoWriter(videoPath, cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48))
+    for i in range(10):
+        writer.write(np.full((48, 64, 3), i * 20, dtype=np.uint8))
+    writer.release()
+
+    # stream options a video file does not support are only warned about
+    capture = OpenCVCapture("test", videoPath, useV4L2Backend=False, bufferSize=1, fourcc="MJPG")
+    capture.create()
+
+    buffer = np.empty((48, 64, 3), dtype=np.uint8)
+    frame = capture.readInto(buffer)
+    assert frame is buffer
+    sequence = capture.getSequenceNumber()
+    assert capture.readInto(buffer) is buffer
+    assert capture.getSequenceNumber() == sequence + 1
+
+    # an array that does not fit is replaced, not written out of bounds
+    small = np.empty((4, 4, 3), dtype=np.uint8)
+    assert capture.readInto(small).shape == (48, 64, 3)
+    capture.close()
@@ -0,0 +1,17 @@
+from Alt.Cameras.Captures.tools.latency import LatencyHistogram
+
+
+def test_buckets_and_percentiles():
+    histogram = LatencyHistogram(bucketsMs=(1, 10, 100), window=4)
+    assert histogram.getPercentiles() == {}
+
+    for latencyMs in (0.5, 1, 5, 50, 500):
+        histogram.add(latencyMs)
+
+    # a sample on an edge counts into that edge's bucket, the last bucket is everything above
+    assert histogram.getCounts() == [2, 1, 1, 1]
+
+    # percentiles only cover the window
+    percentiles = histogram.getPercentiles()
+    assert percentiles["maxMs"] == 500
+    assert 1 <= percentiles["p50Ms"] <= 50
@@ -0,0 +1,31 @@
+import numpy as np
+
+from Alt.Cameras.Captures.tools.overlay import FrameOverlay
+
+
+def test_annotations_are_scaled_to_the_rendered_frame():
+    overlay = FrameOverlay()
+    overlay.box((100, 100, 300, 200), color=(0, 0, 255))
+    overlay.point((400, 50), color=(0, 255, 0), radius=2)
+
+    source = np.zeros((480, 640, 3), dtype=np.uint8)
+    stream = np.zeros((240, 320, 3), dtype=np.uint8)
+    annotations = overlay.getAnnotations()
+    overlay.clear()
+    assert overlay.isEmpty()
+
+    overlay.render(stream, source.shape, annotations)
+    # box corners land at half the coordinates, the source frame is never drawn on
+    assert tuple(stream[50, 50]) == (0, 0, 255) and tuple(stream[100, 150]) == (0, 0, 255)
+    assert not stream[75, 100].any()
+    assert tuple(stream[25, 200]) == (0, 255, 0)
+    assert not source.any()
+
+
+def test_labels_stay_inside_the_frame():
+    overlay = FrameOverlay()
+    overlay.box((0, 0, 50, 50), label="note")
+    overlay.text("fps", (10, 20))
+    frame = overlay.render(np.zeros((100, 100, 3), dtype=np.uint8), (100, 100))
+    # the label of a box at the top edge is drawn inside the box instead of above the frame
+    assert frame[:12, :30].any()
@@ -0,0 +1,96 @@
+import json
+import time
+
+import cv2
+import numpy as np
+
+from Alt.Cameras.Captures.ReplayCapture import ReplayCapture, ReplayMode
+
+NUMFRAMES = 20
+SHAPE = (48, 64)
+
+
+def writeSegment(path, firstFrame=0, fps=20):
+    """A session segment where frame i has color value i * 10 and depth value i"""
+    path.mkdir()
+    writer = cv2.VideoWriter(str(path / "color.avi"), cv2.VideoWriter_fourcc(*"MJPG"), fps, SHAPE[::-1])
+    depth = np.empty((NUMFRAMES,) + SHAPE, dtype=np.uint16)
+    with open(path / "timestamps.csv", "w") as f:
+        for i in range(NUMFRAMES):
+            index = firstFrame + i
+            writer.write(np.full(SHAPE + (3,), (index * 10) % 256, dtype=np.uint8))
+            depth[i] = index
+            f.write(f"{100 + index / fps}\n")
+    writer.release()
+    depth.tofile(path / "depth.u16")
+
+    meta = {"fps": fps, "colorFile": "color.avi", "depthFile": "depth.u16", "depthShape": list(SHAPE), "frameCount": NUMFRAMES}
+    with open(path / "meta.json", "w") as f:
+        json.dump(meta, f)
+
+
+def frameIndex(color):
+    return int(round(color.mean() / 10))
+
+
+def test_fast_replay_is_deterministic(tmp_path):
+    writeSegment(tmp_path / "segment_000")
+    writeSegment(tmp_path / "segment_001", firstFrame=NUMFRAMES)
+
+    capture = ReplayCapture("replay", str(tmp_path))
+    capture.create()
+    assert capture.getFrameCount() == 2 * NUMFRAMES
+    assert capture.getFrameShape() == SHAPE + (3,)
+
+    for i in range(2 * NUMFRAMES):
+        depth, color = capture.getDepthAndColorFrame()
+        assert frameIndex(color) == i % 26
+        assert depth.dtype == np.uint16 and depth[0, 0] == i
+        assert abs(capture.getFrameTimestamp() - i / 20) < 1e-6
+
+    # plays to the end, then closes
+    assert capture.getMainFrame() is None
+    assert not capture.isOpen()
+    capture.close()
+
+
+def test_seek_and_loop(tmp_path):
+    writeSegment(tmp_path / "segment")
+    capture = ReplayCapture("replay", str(tmp_path / "segment"), loop=True)
+    capture.create()
+
+    capture.seek(15)
+    assert capture.getDepthFrame()[0, 0] == 15
+    capture.seekTime(0.5)
+    assert capture.getDepthFrame()[0, 0] == 10
+    capture.seek(5)
+    assert capture.getDepthFrame()[0, 0] == 5
+
+    capture.seek(NUMFRAMES - 1)
+    capture.getMainFrame()
+    # wraps around instead of ending
+    assert capture.getDepthFrame()[0, 0] == 0
+    assert capture.isOpen()
+    capture.close()
+
+
+def test_realtime_skips_and_fixed_rate_paces(tmp_path):
+    writeSegment(tmp_path / "segment", fps=50)
+
+    capture = ReplayCapture("replay", str(tmp_path / "segment"), mode=ReplayMode.REALTIME)
+    capture.create()
+    capture.getMainFrame()
+    time.sleep(0.2)
+    capture.getMainFrame()
+    # a slow reader gets the newest frame, like from a live camera
+    assert capture.getFrameIndex() >= 9
+    capture.close()
+
+    capture = ReplayCapture("replay", str(tmp_path / "segment"), mode=ReplayMode.FIXEDRATE, fps=100)
+    capture.create()
+    start = time.monotonic()
+    for i in range(10):
+        capture.getMainFrame()
+        assert capture.getFrameIndex() == i
+    assert time.monotonic() - start >= 0.09
+    capture.close()
@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+
+from Alt.Cameras.Captures.ReplayCapture import ReplayCapture
+from Alt.Cameras.Captures.tools.session import SessionRecorder
+
+SHAPE = (48, 64)
+
+
+def test_recording_replays(tmp_path):
+    recorder = SessionRecorder(str(tmp_path), fps=10, segmentSeconds=1)
+    recorder.start()
+    for i in range(25):
+        color = np.full(SHAPE + (3,), i * 10, dtype=np.uint8)
+        depth = np.full(SHAPE, 1000 + i, dtype=np.uint16)
+        assert recorder.record(color, depth, timestamp=50 + i / 10)
+    recorder.stop()
+
+    stats = recorder.getStats()
+    assert stats["recorded"] == 25 and stats["dropped"] == 0
+    # 2.5 seconds of capture time in 1 second segments
+    assert stats["segments"] == 3
+    assert sorted(os.listdir(tmp_path)) == ["segment_0000", "segment_0001", "segment_0002"]
+
+    capture = ReplayCapture("replay", str(tmp_path))
+    capture.create()
+    assert capture.getFrameCount() == 25
+    for i in range(25):
+        depth, color = capture.getDepthAndColorFrame()
+        # depth is lossless, color close enough after jpeg
+        assert depth[0, 0] == 1000 + i
+        assert abs(int(color.mean()) - i * 10) <= 2
+        assert abs(capture.getFrameTimestamp() - i / 10) < 1e-6
+    capture.close()
+
+
+def test_drop_policy(tmp_path):
+    for policy in (SessionRecorder.DROPOLDEST, SessionRecorder.DROPNEWEST):
+        # not started, so nothing is written and the queue fills up
+        recorder = SessionRecorder(str(tmp_path / policy), fps=10, queueSize=4, dropPolicy=policy)
+        accepted = [recorder.record(np.zeros(SHAPE + (3,), dtype=np.uint8)) for _ in range(10)]
+
+        assert recorder.getStats()["dropped"] == 6
+        assert recorder.getStats()["queued"] == 4
+        if policy == SessionRecorder.DROPNEWEST:
+            assert accepted == [True] * 4 + [False] * 6
+        else:
+            assert all(accepted)
@@ -0,0 +1,77 @@
+import os
+
+import numpy as np
+
+from Alt.Cameras.Parameters.CameraCalibration import CameraCalibration
+
+CAMERAMATRIX = np.array([[500.0, 0, 320], [0, 500.0, 240], [0, 0, 1]])
+DISTORTION = np.array([[-0.3, 0.1, 0, 0, 0]])
+
+
+def makeCalibration(tmp_path, monkeypatch, cropToRoi=False):
+    monkeypatch.setattr(CameraCalibration, "MAPCACHEDIR", str(tmp_path))
+    return CameraCalibration(CAMERAMATRIX, DISTORTION, (640, 480), cropToRoi=cropToRoi)
+
+
+def test_points_match_frame(tmp_path, monkeypatch):
+    calibration = makeCalibration(tmp_path, monkeypatch)
+
+    # a single bright pixel should land where undistortPoints says it does
+    frame = np.zeros((480, 640), dtype=np.uint8)
+    frame[100:103, 100:103] = 255
+    undistorted = calibration.undistortFrame(frame)
+
+    ys, xs = np.nonzero(undistorted > 64)
+    point = calibration.undistortPoints(np.array([[101, 101]]))[0]
+    assert abs(xs.mean() - point[0]) < 1.5
+    assert abs(ys.mean() - point[1]) < 1.5
+
+
+def test_maps_are_fixed_point_and_cached(tmp_path, monkeypatch):
+    calibration = makeCalibration(tmp_path, monkeypatch)
+    map1, map2 = calibration.getMapXY()
+    assert map1.dtype == np.int16 and map1.shape == (480, 640, 2)
+    assert len(list(tmp_path.iterdir())) == 1
+
+    # a new instance of the same calibration loads the persisted maps
+    cached1, cached2 = makeCalibration(tmp_path, monkeypatch).getMapXY()
+    assert np.array_equal(cached1, map1) and np.array_equal(cached2, map2)
+
+
+def test_cache_is_written_through_a_per_process_temp_file(tmp_path, monkeypatch):
+    written = []
+    savez = np.savez
+    monkeypatch.setattr(np, "savez", lambda path, **arrays: (written.append(path), savez(path, **arrays)))
+
+    makeCalibration(tmp_path, monkeypatch).getMapXY()
+    # another agent caching the same maps at the same time writes its own temp file
+    assert len(written) == 1 and f".{os.getpid()}.tmp" in written[0]
+    assert [path.suffix for path in tmp_path.iterdir()] == [".npz"] and not os.path.exists(written[0])
+
+
+def test_crop_and_other_resolution(tmp_path, monkeypatch):
+    calibration = makeCalibration(tmp_path, monkeypatch, cropToRoi=True)
+    cropped = calibration.undistortFrame(np.zeros((480, 640, 3), dtype=np.uint8))
+    assert cropped.shape[0] < 480 and cropped.shape[1] < 640
+
+    half = calibration.undistortFrame(np.zeros((240, 320, 3), dtype=np.uint8))
+    assert half.shape[0] < 240 and half.shape[1] < 320
+
+
+def test_set_crop_to_roi(tmp_path, monkeypatch):
+    calibration = makeCalibration(tmp_path, monkeypatch)
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    assert calibration.undistortFrame(frame).shape == frame.shape
+
+    calibration.setCropToRoi(True)
+    assert calibration.undistortFrame(frame).shape[1] < 640
+
+
+def test_undistort_into_dst(tmp_path, monkeypatch):
+    calibration = makeCalibration(tmp_path, monkeypatch, cropToRoi=True)
+    frame = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+
+    w, h = calibration.getUndistortedResolution((640, 480))
+    dst = np.empty((h, w, 3), dtype=np.uint8)
+    assert calibration.undistortFrame(frame, dst=dst) is dst
+    assert np.array_equal(dst, calibration.undistortFrame(frame))
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from Alt.Cameras.Proto.FramePacket import FramePacket
+
+
+def _roundTrip(packet):
+    return FramePacket.fromBytes(FramePacket.toBytes(packet))
+
+
+def test_lossless_codecs_round_trip() -> None:
+    frame = np.random.randint(0, 255, (48, 64, 3), dtype=np.uint8)
+    for codec in (FramePacket.PNG, FramePacket.RAW):
+        received = _roundTrip(FramePacket.createPacket(1.5, "Frame", frame, codec=codec))
+        assert received.frame.width == 64
+        assert received.frame.height == 48
+        assert received.frame.channels == 3
+        assert received.timestamp == 1.5
+        np.testing.assert_array_equal(FramePacket.getFrame(received), frame)
+
+
+def test_jpeg_round_trip() -> None:
+    frame = np.full((48, 64, 3), 120, dtype=np.uint8)
+    received = FramePacket.fromBase64(FramePacket.toBase64(FramePacket.createPacket(0, "Frame", frame)))
+    assert str(received.frame.codec) == FramePacket.JPEG
+    assert received.frame.quality == FramePacket.DEFAULTJPEGQUALITY
+    decoded = FramePacket.getFrame(received)
+    assert decoded.shape == frame.shape
+    assert np.abs(decoded.astype(int) - frame).max() <= 2
+
+
+def test_depth_frames_keep_their_dtype() -> None:
+    depth = np.random.randint(0, 65535, (48, 64), dtype=np.uint16)
+    for codec in (FramePacket.PNG, FramePacket.RAW):
+        decoded = FramePacket.getFrame(_roundTrip(FramePacket.createPacket(0, "Depth", depth, codec=codec)))
+        assert decoded.dtype == np.uint16
+        np.testing.assert_array_equal(decoded, depth)
+
+
+def test_unknown_codec() -> None:
+    with pytest.raises(ValueError):
+        FramePacket.createPacket(0, "Frame", np.zeros((4, 4, 3), dtype=np.uint8), codec="webp")
+
+
+def test_decoded_frames_are_writable() -> None:
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    for codec in (FramePacket.JPEG, FramePacket.PNG, FramePacket.RAW):
+        decoded = FramePacket.getFrame(_roundTrip(FramePacket.createPacket(0, "Frame", frame, codec=codec)))
+        assert decoded.flags.writeable
+        # eg drawing boxes on it
+        decoded[0, 0] = 255
+
+    # a raw view of the packet is read only
+    view = FramePacket.getFrame(_roundTrip(FramePacket.createPacket(0, "Frame", frame, codec=FramePacket.RAW)), copy=False)
+    assert not view.flags.writeable
+    np.testing.assert_array_equal(view, frame)
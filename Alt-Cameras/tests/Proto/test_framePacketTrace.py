@@ -0,0 +1,24 @@
+import numpy as np
+from Alt.Core.Utils.frameTrace import FrameTrace
+
+from Alt.Cameras.Proto.FramePacket import FramePacket
+
+
+def test_trace_survives_frame_packet() -> None:
+    trace = FrameTrace()
+    with trace.span("capture"):
+        pass
+    trace.mark("send")
+
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    packet = FramePacket.createPacket(0, "Frame", frame, trace=trace)
+
+    received = FramePacket.getTrace(FramePacket.fromBase64(FramePacket.toBase64(packet)))
+    assert received is not None
+    assert received.traceId == trace.traceId
+    assert received.spans == trace.spans
+
+
+def test_untraced_frame_packet() -> None:
+    packet = FramePacket.createPacket(0, "Frame", np.zeros((48, 64, 3), dtype=np.uint8))
+    assert FramePacket.getTrace(FramePacket.fromBytes(packet.to_bytes())) is None
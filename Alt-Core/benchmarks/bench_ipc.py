@@ -0,0 +1,246 @@
+"""bench_ipc.py
+
+Throughput and latency benchmarks for the data paths agents use to talk to Neo and each other.
+
+Measured:
+    stream: StreamProxy.put from an agent process, StreamProxy.get in Neo (as the mjpeg server does), at several
+        resolutions. Frames/s for both sides, and put to get latency percentiles.
+    share: ShareOperator put/get ops/s from an agent process.
+    logs: Lines/s through a log stream queue, agent process to Neo.
+    properties: PropertyOperator puts/s against an in memory XTables stand in, so only the operator overhead is
+        measured and not the network.
+
+Everything is printed as json (and optionally written to a file), so runs can be diffed.
+
+Usage:
+    python bench_ipc.py --seconds 5 --output results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+from flask import Flask
+
+from Alt.Core.Operators.ConfigOperator import ConfigOperator
+from Alt.Core.Operators.LogStreamOperator import LogStreamOperator
+from Alt.Core.Operators.PropertyOperator import PropertyOperator
+from Alt.Core.Operators.ShareOperator import ShareOperator
+from Alt.Core.Operators.StreamOperator import StreamOperator
+from Alt.Core.Operators.StreamProxy import StreamProxy
+
+RESOLUTIONS: Sequence[Tuple[int, int]] = ((320, 240), (640, 480), (1280, 720), (1920, 1080))
+
+
+def _percentiles(samplesMs: List[float]) -> Dict[str, float]:
+    if not samplesMs:
+        return {}
+    p50, p90, p99 = np.percentile(samplesMs, [50, 90, 99])
+    return {
+        "p50Ms": round(float(p50), 3),
+        "p90Ms": round(float(p90), 3),
+        "p99Ms": round(float(p99), 3),
+        "maxMs": round(float(max(samplesMs)), 3),
+    }
+
+
+def _stampFrame(frame: np.ndarray) -> None:
+    # first 8 bytes of the frame carry the put time, monotonic clock is shared across processes
+    frame.reshape(-1)[:8].view(np.int64)[0] = time.monotonic_ns()
+
+
+def _readStamp(frame: np.ndarray) -> int:
+    return int(frame.reshape(-1)[:8].view(np.int64)[0])
+
+
+def _streamProducer(proxy: StreamProxy, shape: Tuple[int, int, int], seconds: float, results: Any) -> None:
+    frame = np.random.randint(0, 255, shape, dtype=np.uint8)
+    putMs: List[float] = []
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        _stampFrame(frame)
+        start = time.perf_counter()
+        proxy.put(frame)
+        putMs.append((time.perf_counter() - start) * 1000)
+    results.put(putMs)
+
+
+def benchStream(manager: Any, seconds: float) -> List[Dict[str, Any]]:
+    streamOp = StreamOperator(Flask(__name__), manager)
+    out = []
+    for width, height in RESOLUTIONS:
+        proxy = streamOp.register_stream(f"bench_{width}x{height}")
+        results: Any = mp.Queue()
+        producer = mp.Process(
+            target=_streamProducer, args=(proxy, (height, width, 3), seconds, results)
+        )
+        producer.start()
+
+        latencyMs: List[float] = []
+        getMs: List[float] = []
+        lastStamp = None
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            start = time.perf_counter()
+            frame = proxy.get()
+            if frame is None:
+                # producer still starting
+                continue
+            getMs.append((time.perf_counter() - start) * 1000)
+            stamp = _readStamp(frame)
+            if stamp != lastStamp:
+                lastStamp = stamp
+                latencyMs.append((time.monotonic_ns() - stamp) / 1e6)
+
+        putMs = results.get()
+        producer.join()
+
+        out.append(
+            {
+                "resolution": f"{width}x{height}",
+                "putFps": round(len(putMs) / seconds, 1),
+                "uniqueFramesReceivedFps": round(len(latencyMs) / seconds, 1),
+                "put": _percentiles(putMs),
+                "get": _percentiles(getMs),
+                "putToGetLatency": _percentiles(latencyMs),
+            }
+        )
+    return out
+
+
+def _shareWorker(shareOp: ShareOperator, seconds: float, results: Any) -> None:
+    puts = gets = 0
+    end = time.monotonic() + seconds / 2
+    while time.monotonic() < end:
+        shareOp.put("bench", puts)
+        puts += 1
+    end = time.monotonic() + seconds / 2
+    while time.monotonic() < end:
+        shareOp.get("bench")
+        gets += 1
+    results.put((puts, gets))
+
+
+def benchShare(manager: Any, seconds: float) -> Dict[str, Any]:
+    shareOp = ShareOperator(manager.dict())
+    results: Any = mp.Queue()
+    worker = mp.Process(target=_shareWorker, args=(shareOp, seconds, results))
+    worker.start()
+    puts, gets = results.get()
+    worker.join()
+    return {
+        "putOpsPerS": round(puts / (seconds / 2), 1),
+        "getOpsPerS": round(gets / (seconds / 2), 1),
+    }
+
+
+def _logWorker(logQueue: Any, seconds: float, results: Any) -> None:
+    lines = 0
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        logQueue.put(f"INFO:bench:log line number {lines}")
+        lines += 1
+    results.put(lines)
+
+
+def benchLogs(manager: Any, seconds: float) -> Dict[str, Any]:
+    logQueue = LogStreamOperator(Flask(__name__), manager).register_log_stream("bench")
+    results: Any = mp.Queue()
+    worker = mp.Process(target=_logWorker, args=(logQueue, seconds, results))
+    worker.start()
+
+    # drain like the sse generator does
+    received = 0
+    start = time.monotonic()
+    while worker.is_alive() or not logQueue.empty():
+        try:
+            logQueue.get(timeout=0.1)
+            received += 1
+        except Exception:
+            continue
+    drainS = time.monotonic() - start
+
+    sent = results.get()
+    worker.join()
+    return {
+        "sentLinesPerS": round(sent / seconds, 1),
+        "receivedLinesPerS": round(received / drainS, 1),
+    }
+
+
+class LocalXTables:
+    """In memory stand in for XTablesClient, puts just store the value"""
+
+    def __init__(self) -> None:
+        self.values: Dict[str, Any] = {}
+        self.puts = 0
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("put"):
+
+            def put(key: str, value: Any) -> bool:
+                self.values[key] = value
+                self.puts += 1
+                return True
+
+            return put
+        raise AttributeError(name)
+
+    def subscribe(self, key: str, consumer: Any) -> bool:
+        return True
+
+    def unsubscribe(self, key: str, consumer: Any) -> bool:
+        return True
+
+
+def benchProperties(seconds: float) -> Dict[str, Any]:
+    xclient = LocalXTables()
+    propertyOp = PropertyOperator(xclient, ConfigOperator(), prefix="bench")  # type: ignore[arg-type]
+    out: Dict[str, Any] = {}
+    for typeName, value in (("float", 1.5), ("int", 1), ("str", "value"), ("floatList", [1.0, 2.0, 3.0])):
+        prop = propertyOp.createReadOnlyProperty(f"bench_{typeName}", value)
+        puts = 0
+        end = time.monotonic() + seconds / 4
+        while time.monotonic() < end:
+            prop.set(value)
+            puts += 1
+        out[f"{typeName}PutsPerS"] = round(puts / (seconds / 4), 1)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=3, help="Duration of each measurement")
+    parser.add_argument("--output", type=str, default=None, help="Also write the json here")
+    args = parser.parse_args()
+
+    with mp.Manager() as manager:
+        results = {
+            "system": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "stream": benchStream(manager, args.seconds),
+            "share": benchShare(manager, args.seconds),
+            "logs": benchLogs(manager, args.seconds),
+            "properties": benchProperties(args.seconds),
+        }
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""bench_xtablesBroker.py
+
+Compares every agent process opening its own XTablesClient against sharing one through the XTablesBroker.
+
+Spawns N fake agent processes that each subscribe to a few keys and poll TEAM like AgentBase does, then reports
+the number of real XTables connections, total cpu time used and request latency for both modes.
+Connections are counted from the established tcp sockets to the XTables ports that each process (agents and the
+broker) holds, read from /proc, so this runs on linux only.
+Needs a running XTables server (one is started with ensureXTablesServer if possible).
+
+Usage:
+    python bench_xtablesBroker.py --agents 8 --seconds 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import resource
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from JXTABLES.XTablesClient import XTablesClient
+
+from Alt.Core.Operators.XTablesBroker import BrokerInfo, XTablesBroker, XTablesBrokerClient
+from Alt.Core.TestUtils.ensureXTablesServer import ensureXTablesServer
+
+SUBSCRIBEDKEYS = ["TEAM", "robot_pose", "device_name"]
+XTABLESPORTS = (48800, 48801, 48802)  # push, request, subscribe. XTablesClient defaults
+TCPESTABLISHED = "01"
+
+
+def countXTablesSockets(pid: int) -> int:
+    """
+    Counts the established tcp connections to the XTables ports that a process has open.
+
+    Args:
+        pid (int): The process to inspect.
+
+    Returns:
+        int: Number of sockets connected to the XTables server.
+    """
+    socketInodes = set()
+    fdDir = f"/proc/{pid}/fd"
+    for fd in os.listdir(fdDir):
+        try:
+            target = os.readlink(os.path.join(fdDir, fd))
+        except OSError:
+            continue  # closed while listing
+        if target.startswith("socket:["):
+            socketInodes.add(target[len("socket:[") : -1])
+
+    count = 0
+    # the tables list every socket in the network namespace, only the ones this process holds are counted
+    for table in ("tcp", "tcp6"):
+        try:
+            with open(f"/proc/{pid}/net/{table}") as f:
+                lines = f.readlines()[1:]
+        except OSError:
+            continue
+        for line in lines:
+            fields = line.split()
+            remotePort = int(fields[2].rsplit(":", 1)[1], 16)
+            state, inode = fields[3], fields[9]
+            if state == TCPESTABLISHED and remotePort in XTABLESPORTS and inode in socketInodes:
+                count += 1
+    return count
+
+
+def _fakeAgent(
+    brokerInfo: Optional[BrokerInfo], seconds: float, results: Any
+) -> None:
+    if brokerInfo is None:
+        xclient: Any = XTablesClient(debug_mode=False)
+    else:
+        xclient = XTablesBrokerClient(brokerInfo)
+
+    updates = 0
+
+    def consumer(update: Any) -> None:
+        nonlocal updates
+        updates += 1
+
+    for key in SUBSCRIBEDKEYS:
+        xclient.subscribe(key, consumer)
+
+    latenciesMs: List[float] = []
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        start = time.perf_counter()
+        xclient.getString("TEAM")
+        latenciesMs.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.01)  # roughly an agent tick
+
+    xclient.shutdown()
+    results.put((latenciesMs, updates))
+
+
+def runMode(useBroker: bool, agents: int, seconds: float) -> Dict[str, Any]:
+    broker = None
+    brokerInfo = None
+    if useBroker:
+        broker = XTablesBroker(XTablesClient(debug_mode=False))
+        broker.start()
+        brokerInfo = broker.getBrokerInfo()
+
+    results: Any = mp.Queue()
+    cpuBefore = resource.getrusage(resource.RUSAGE_CHILDREN)
+    selfBefore = resource.getrusage(resource.RUSAGE_SELF)
+
+    processes = [
+        mp.Process(target=_fakeAgent, args=(brokerInfo, seconds, results))
+        for _ in range(agents)
+    ]
+    for process in processes:
+        process.start()
+
+    # let all agents connect before counting
+    time.sleep(min(1.0, seconds / 2))
+    brokerClients = broker.getConnectionCount() if broker is not None else 0
+    agentSockets = sum(countXTablesSockets(process.pid) for process in processes)
+    # the broker runs in this process
+    brokerSockets = countXTablesSockets(os.getpid())
+
+    latenciesMs: List[float] = []
+    for _ in processes:
+        agentLatencies, _ = results.get()
+        latenciesMs.extend(agentLatencies)
+    for process in processes:
+        process.join()
+
+    cpuAfter = resource.getrusage(resource.RUSAGE_CHILDREN)
+    selfAfter = resource.getrusage(resource.RUSAGE_SELF)
+    if broker is not None:
+        broker.shutdown()
+
+    cpuS = (cpuAfter.ru_utime + cpuAfter.ru_stime) - (
+        cpuBefore.ru_utime + cpuBefore.ru_stime
+    )
+    # the broker runs in this process
+    cpuS += (selfAfter.ru_utime + selfAfter.ru_stime) - (
+        selfBefore.ru_utime + selfBefore.ru_stime
+    )
+
+    result = {
+        "mode": "broker" if useBroker else "direct",
+        "agents": agents,
+        "xtablesSockets": agentSockets + brokerSockets,
+        "agentXTablesSockets": agentSockets,
+        "brokerXTablesSockets": brokerSockets,
+        "cpuSeconds": round(cpuS, 3),
+        "requests": len(latenciesMs),
+        "latencyMsP50": round(float(np.percentile(latenciesMs, 50)), 3),
+        "latencyMsP99": round(float(np.percentile(latenciesMs, 99)), 3),
+    }
+    if useBroker:
+        result["brokerClients"] = brokerClients
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--agents", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    ensureXTablesServer()
+    results = [
+        runMode(False, args.agents, args.seconds),
+        runMode(True, args.agents, args.seconds),
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,14 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 from logging import Logger
-from typing import Any, Dict, Optional, Protocol, TypeVar, TYPE_CHECKING
+from typing import Any, Dict, Optional, Protocol, Tuple, TypeVar, TYPE_CHECKING
 
 from JXTABLES.XTablesClient import XTablesClient
 
 from ..Utils.network import DEVICEIP
 from ..Operators.LogStreamOperator import LOGPATH
 from ..Operators.StreamProxy import StreamProxy
+from ..Operators.MetadataOperator import MetadataOperator
 
 
 if TYPE_CHECKING:
@@ -32,6 +33,7 @@ class Agent(Protocol):
     configOperator: ConfigOperator
     updateOp: UpdateOperator
     timeOp: TimeOperator
+    metadataOp: MetadataOperator
     Sentinel: Logger
     timer: Timer
 
@@ -47,6 +49,7 @@ class Agent(Protocol):
         configOperator: ConfigOperator,  # new
         updateOperator: UpdateOperator,  # new
         timeOperator: TimeOperator,  # new
+        metadataOperator: MetadataOperator,  # new
         logger: Logger,  # static/new
     ) -> None:
         ...
@@ -66,6 +69,15 @@ class Agent(Protocol):
     def getTeam(self) -> Optional[TEAM]:
         ...
 
+    def getDeviceName(self) -> str:
+        ...
+
+    def getFieldDimensions(self) -> Tuple[float, float]:
+        ...
+
+    def getRobotPoseOffset(self) -> Tuple[float, float, float]:
+        ...
+
     def _runOwnCreate(self):
         ...
 
@@ -106,6 +118,13 @@ class Agent(Protocol):
     def _getProxyRequests(cls) -> Dict[str, ProxyType]:
         ...
 
+    @classmethod
+    def isProxyNeeded(cls, proxyName: str, bindings: Dict[str, Any]) -> bool:
+        ...
+
+    def _getBindings(self) -> Dict[str, Any]:
+        ...
+
 
 TAgent = TypeVar("TAgent", bound=Agent)
 
@@ -127,6 +146,7 @@ class AgentBase(ABC):
         self.isMainThread: bool = False
         self.agentName = ""
         self.__proxies: Dict[str, Proxy] = {}
+        self.metadataOp: Optional[MetadataOperator] = None
 
     def _injectCore(
         self, shareOperator: ShareOperator, isMainThread: bool, agentName: str
@@ -148,6 +168,7 @@ class AgentBase(ABC):
         configOperator: ConfigOperator,  # new
         updateOperator: UpdateOperator,  # new
         timeOperator: TimeOperator,  # new
+        metadataOperator: MetadataOperator,  # new
         logger: Logger,  # static/new
     ) -> None:
         """
@@ -160,6 +181,7 @@ class AgentBase(ABC):
         self.configOperator = configOperator
         self.updateOp = updateOperator
         self.timeOp = timeOperator
+        self.metadataOp = metadataOperator
         self.Sentinel = logger
         self.timer = self.timeOp.getTimer(self.TIMERS)
         # other than setting variables, nothing should go here
@@ -189,6 +211,8 @@ class AgentBase(ABC):
         # self.xclient.shutdown()
         self.propertyOperator.deregisterAll()
         self.updateOp.deregister()
+        if self.metadataOp is not None:
+            self.metadataOp.deregisterAll()
 
     def getTimer(self) -> Timer:
         """Use only when needed, and only when associated with agent"""
@@ -198,18 +222,27 @@ class AgentBase(ABC):
         return self.timer
 
     def getTeam(self) -> Optional[TEAM]:
-        """Fetches team from XTables, dont trust at the start when everything is initializing"""
-        if self.xclient is None:
-            raise ValueError("XTablesClient not initialized")
+        """Team from XTables, cached locally and kept up to date by a subscription.
+        Dont trust at the start when everything is initializing"""
+        return self.__getMetadataOp().getTeam()
+
+    def getDeviceName(self) -> str:
+        """Name of this device from XTables (cached), defaults to the hostname"""
+        return self.__getMetadataOp().getDeviceName()
+
+    def getFieldDimensions(self) -> Tuple[float, float]:
+        """Field (width, height) in meters from XTables (cached), defaults to the built in field size"""
+        return self.__getMetadataOp().getFieldDimensions()
+
+    def getRobotPoseOffset(self) -> Tuple[float, float, float]:
+        """Offset of this device from the robot, (x (m), y (m), yaw (rad)) from XTables (cached)"""
+        return self.__getMetadataOp().getRobotPoseOffset()
 
-        team: Optional[str] = self.xclient.getString("TEAM")
-        if team is None:
-            return None
+    def __getMetadataOp(self) -> MetadataOperator:
+        if self.metadataOp is None:
+            raise ValueError("MetadataOperator not initialized")
 
-        if team.lower() == "blue":
-            return TEAM.BLUE
-        else:
-            return TEAM.RED
+        return self.metadataOp
 
     def _runOwnCreate(self):
         """The agent wants to do its own stuff too... okay."""
@@ -281,6 +314,7 @@ class AgentBase(ABC):
         for proxyName, _ in self._getProxyRequests().items():
             if (
                 proxyName not in self.__proxies
+                and self.isProxyNeeded(proxyName, self._getBindings())
             ):
                 raise RuntimeError(
                     f"Agent proxies are not correcty initialized!\n{self._getProxyRequests()=}\n{self.__proxies.items()=}"
@@ -301,3 +335,14 @@ class AgentBase(ABC):
     @classmethod
     def _getProxyRequests(cls) -> Dict[str, ProxyType]:
         return getattr(cls, "_proxyRequests", {})
+
+    @classmethod
+    def isProxyNeeded(cls, proxyName: str, bindings: Dict[str, Any]) -> bool:
+        """Override to leave out a requested proxy, eg a stream only some bound arguments produce.
+        Proxies are made before the agent is, so this only sees the keyword arguments it was bound with (see BindableAgent)
+        """
+        return True
+
+    def _getBindings(self) -> Dict[str, Any]:
+        """The bound keyword arguments isProxyNeeded looks at, so a created agent can check its proxies. Override with it"""
+        return {}
@@ -13,6 +13,7 @@ if TYPE_CHECKING:
 class ProxyType(Enum):
 
     STREAM = "stream_proxy"
+    DEPTHSTREAM = "depth_stream_proxy"
     LOG = "log_proxy"
 
     @property
@@ -21,6 +22,7 @@ class ProxyType(Enum):
 
     @staticmethod
     def getProxyRequests(agentClass) -> Dict[str, "ProxyType"]:
+        """The proxies to make for an agent, leaving out those it does not need with the arguments it was bound with"""
         if isinstance(agentClass, partial):
             return ProxyType.__getPartialProxyRequests(agentClass)
 
@@ -33,12 +35,20 @@ class ProxyType(Enum):
         from Alt.Core.Agents import Agent
         agentClassType = cast(Agent, agentClass.func)
         agentClassType.requestProxies()
-        return agentClassType._getProxyRequests()
+        return {
+            proxyName: proxyType
+            for proxyName, proxyType in agentClassType._getProxyRequests().items()
+            if agentClassType.isProxyNeeded(proxyName, agentClass.keywords)
+        }
 
     @staticmethod
     def __getAgentProxyRequests(agentClass: Agent) -> Dict[str, "ProxyType"]:
         agentClass.requestProxies()
-        return agentClass._getProxyRequests()
+        return {
+            proxyName: proxyType
+            for proxyName, proxyType in agentClass._getProxyRequests().items()
+            if agentClass.isProxyNeeded(proxyName, {})
+        }
 
 
 class Proxy:
@@ -15,12 +15,14 @@ from __future__ import annotations
 import os
 import signal
 from multiprocessing import Manager
+from typing import Optional
 from JXTABLES.TempConnectionManager import TempConnectionManager as tcm
 from .Operators.FlaskOperator import FlaskOperator
 from .Operators.AgentOperator import AgentOperator
 from .Operators.ShareOperator import ShareOperator
 from .Operators.StreamOperator import StreamOperator
 from .Operators.LogStreamOperator import LogStreamOperator
+from .Operators.XTablesBroker import XTablesBroker
 from .Operators import LogOperator
 from .Agents.Agent import Agent
 
@@ -47,15 +49,20 @@ class Neo:
         __streamOp (StreamOperator): Handles generic stream operations.
         __logStreamOp (LogStreamOperator): Manages log streams.
         __agentOp (AgentOperator): Boots and monitors Matrix agents.
+        __xtablesBroker (Optional[XTablesBroker]): Shared XTables connection for all agents, if enabled.
         __isShutdown (bool): Tracks whether Neo has shut down.
         __isDashboardRunning (bool): Indicates if the dashboard is running.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, useXTablesBroker: bool = False) -> None:
         """
         Initializes the Neo orchestrator, setting up all core operators, intercepting shutdown
         signals, and starting the Flask server and other services.
 
+        Args:
+            useXTablesBroker (bool, optional): If True, Neo hosts a single XTables connection that every agent
+                process shares over a local socket, instead of each agent opening its own. Defaults to False.
+
         Raises:
             Exception: If any operator fails to initialize.
         """
@@ -80,9 +87,22 @@ class Neo:
         self.__logStreamOp = LogStreamOperator(
             app=self.__flaskOp.getApp(), manager=self.__manager
         )
+        self.__xtablesBroker: Optional[XTablesBroker] = None
+        if useXTablesBroker:
+            Sentinel.info("Creating XTables broker")
+            self.__xtablesBroker = XTablesBroker()
+            self.__xtablesBroker.start()
         Sentinel.info("Creating Agent operator")
         self.__agentOp = AgentOperator(
-            self.__manager, self.__shareOp, self.__streamOp, self.__logStreamOp
+            self.__manager,
+            self.__shareOp,
+            self.__streamOp,
+            self.__logStreamOp,
+            brokerInfo=(
+                self.__xtablesBroker.getBrokerInfo()
+                if self.__xtablesBroker is not None
+                else None
+            ),
         )
         self.__isShutdown = False
         self.__isDashboardRunning = False
@@ -194,6 +214,8 @@ class Neo:
         self.__agentOp.waitForAgentsToFinish()
         self.__manager.shutdown()
         self.__agentOp.shutDownNow()
+        if self.__xtablesBroker is not None:
+            self.__xtablesBroker.shutdown()
 
     def isShutdown(self) -> bool:
         """
@@ -29,6 +29,7 @@ from typing import Optional, Callable, Union
 from JXTABLES.XTablesClient import XTablesClient
 
 from .ConfigOperator import ConfigOperator
+from .MetadataOperator import MetadataOperator
 from .ShareOperator import ShareOperator
 from .StreamOperator import StreamOperator
 from .TimeOperator import TimeOperator, Timer
@@ -36,6 +37,7 @@ from .UpdateOperator import UpdateOperator
 from .LogStreamOperator import LogStreamOperator
 from ..Agents import Agent, BindableAgent, TAgent
 from .PropertyOperator import LambdaHandler, PropertyOperator, ReadonlyProperty
+from .XTablesBroker import BrokerInfo, XTablesBrokerClient
 from .LogOperator import getChildLogger
 from ..Constants.AgentConstants import ProxyType
 
@@ -70,6 +72,7 @@ class AgentOperator:
         shareOp: ShareOperator,
         streamOp: StreamOperator,
         logStreamOp: LogStreamOperator,
+        brokerInfo: Optional[BrokerInfo] = None,
     ) -> None:
         """
         Initializes the AgentOperator.
@@ -79,6 +82,7 @@ class AgentOperator:
             shareOp (ShareOperator): Operator for shared data.
             streamOp (StreamOperator): Operator for stream proxies.
             logStreamOp (LogStreamOperator): Operator for log stream proxies.
+            brokerInfo (Optional[BrokerInfo]): If given, agents connect to this XTables broker instead of XTables directly.
         """
         self.__executor: ProcessPoolExecutor = ProcessPoolExecutor()
         self.__stop: threading.Event = manager.Event()  # flag
@@ -89,6 +93,7 @@ class AgentOperator:
         self.streamOp = streamOp
         self.logStreamOp = logStreamOp
         self.manager = manager
+        self.brokerInfo = brokerInfo
 
     def __setStop(self, stop: bool):
         """
@@ -173,6 +178,8 @@ class AgentOperator:
             # TODO add more
             if proxyType is ProxyType.STREAM:
                 proxyDict[requestName] = self.streamOp.register_stream(agentName)
+            elif proxyType is ProxyType.DEPTHSTREAM:
+                proxyDict[requestName] = self.streamOp.register_depth_stream(agentName)
 
         # always create log queue
         logProxy = self.logStreamOp.register_log_stream(agentName)
@@ -205,6 +212,7 @@ class AgentOperator:
                 proxies,
                 logProxy,
                 runOnCreate=self.__setMainAgent,
+                brokerInfo=self.brokerInfo,
             )
         else:
             # set new logger before fork
@@ -225,6 +233,8 @@ class AgentOperator:
                         self.__stop,
                         proxies,
                         logProxy,
+                        None,
+                        self.brokerInfo,
                     )
                 )
             except Exception as e:
@@ -266,6 +276,7 @@ class AgentOperator:
         proxies: multiprocessing.managers.DictProxy,
         logProxy: queue.Queue,
         isMainThread: bool,
+        brokerInfo: Optional[BrokerInfo] = None,
     ) -> Agent:
         """
         Injects core dependencies and logging into the agent.
@@ -277,6 +288,7 @@ class AgentOperator:
             proxies (DictProxy): The proxy dictionary.
             logProxy (queue.Queue): The log proxy queue.
             isMainThread (bool): Whether running in the main thread.
+            brokerInfo (Optional[BrokerInfo]): XTables broker to connect to, or None to connect directly.
 
         Returns:
             Agent: The injected agent.
@@ -285,7 +297,7 @@ class AgentOperator:
         # injecting stuff shared from core
         agent._injectCore(shareOperator, isMainThread, agentName)
         # creating new operators just for this agent and injecting them
-        AgentOperator._injectNewOperators(agent, agentName, logProxy)
+        AgentOperator._injectNewOperators(agent, agentName, logProxy, brokerInfo)
 
         agent._setProxies(proxies)
 
@@ -306,7 +318,10 @@ class AgentOperator:
 
     @staticmethod
     def _injectNewOperators(
-        agent: Agent, agentName: str, logProxy: queue.Queue
+        agent: Agent,
+        agentName: str,
+        logProxy: queue.Queue,
+        brokerInfo: Optional[BrokerInfo] = None,
     ) -> None:
         """
         Injects new operator instances and logging handlers into the agent.
@@ -315,8 +330,14 @@ class AgentOperator:
             agent (Agent): The agent instance.
             agentName (str): The agent's unique name.
             logProxy (queue.Queue): The log proxy queue.
+            brokerInfo (Optional[BrokerInfo]): XTables broker to connect to, or None to connect directly.
         """
-        client = XTablesClient(debug_mode=True)  # one per process
+        client: XTablesClient
+        if brokerInfo is not None:
+            # share neo's connection
+            client = XTablesBrokerClient(brokerInfo)  # type: ignore[assignment]
+        else:
+            client = XTablesClient(debug_mode=True)  # one per process
         client.add_client_version_property(f"MATRIX-ALT-{agentName}")
 
         configOp = (
@@ -325,6 +346,7 @@ class AgentOperator:
         propertyOp = PropertyOperator(client, configOp, prefix=agentName)
         updateOp = UpdateOperator(client, propertyOp)
         timeOp = TimeOperator(propertyOp)
+        metadataOp = MetadataOperator(client)
         logger = getChildLogger(agentName)
 
         # add sse handling automatically
@@ -354,6 +376,7 @@ class AgentOperator:
             configOperator=configOp,
             updateOperator=updateOp,
             timeOperator=timeOp,
+            metadataOperator=metadataOp,
             logger=logger,
         )
 
@@ -367,6 +390,7 @@ class AgentOperator:
         proxies: multiprocessing.managers.DictProxy,
         logProxy: queue.Queue,
         runOnCreate: Optional[Callable[[Agent], None]] = None,
+        brokerInfo: Optional[BrokerInfo] = None,
     ) -> None:
         """
         Main agent loop that manages agent lifecycle, including creation, running,
@@ -381,6 +405,7 @@ class AgentOperator:
             proxies (DictProxy): The proxy dictionary.
             logProxy (queue.Queue): The log proxy queue.
             runOnCreate (Optional[Callable[[Agent], None]]): Optional callback to run on agent creation.
+            brokerInfo (Optional[BrokerInfo]): XTables broker to connect to, or None to connect directly.
         """
         if not isMainThread:
             signal.signal(signal.SIGINT, signal.SIG_IGN)
@@ -460,7 +485,13 @@ class AgentOperator:
 
             """Initialization part #3. Inject objects in agent"""
             AgentOperator._injectAgent(
-                agent, agentName, shareOperator, proxies, logProxy, isMainThread
+                agent,
+                agentName,
+                shareOperator,
+                proxies,
+                logProxy,
+                isMainThread,
+                brokerInfo,
             )
             """ On main thread this is how its set as main agent"""
             if isMainThread and runOnCreate is not None:
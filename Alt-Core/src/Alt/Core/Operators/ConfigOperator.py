@@ -18,6 +18,8 @@ from __future__ import annotations
 import os
 import json
 import codecs
+import threading
+import time
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 import numpy as np
@@ -150,12 +152,20 @@ class ConfigOperator:
         (".npy", ConfigType.NUMPY),
         (".json", ConfigType.JSON),
     )
+    PROPERTY_SAVE_DEBOUNCE_S: float = 1.0  # how long property changes must settle before being written
 
     def __init__(self) -> None:
         """
         Initialize the ConfigOperator and load configuration files from all read paths.
         """
         self.configMap: Dict[str, Any] = {}
+        # debounced property persistence, filename -> latest content
+        self.__pendingPropertySaves: Dict[str, Any] = {}
+        self.__lastPropertyScheduleTime: float = 0.0
+        self.__pendingLock = threading.Lock()
+        self.__writeLock = threading.Lock()
+        self.__saveRequested = threading.Event()
+        self.__saveThread: Optional[threading.Thread] = None
         for path in self.READPATHS:
             self.__loadFromPath(path)
         # loading override second means that it will overwrite anything set by default.
@@ -206,9 +216,79 @@ class ConfigOperator:
             filePath = os.path.join(f"{path}/PROPERTIES", filename)
             self.__saveToFileJSON(filePath, content)
 
+    def schedulePropertySave(self, filename: str, content: Any) -> None:
+        """
+        Queue property content to be saved once changes have settled. Never blocks on disk io.
+
+        Repeated calls for the same filename before the write happens are merged, so only the latest
+        content is written. All pending files are written together by a background thread after
+        PROPERTY_SAVE_DEBOUNCE_S seconds without any new changes.
+
+        Args:
+            filename (str): Name of the property file to save.
+            content (Any): Data to save as JSON. Pass a copy if the caller keeps mutating it.
+        """
+        with self.__pendingLock:
+            self.__pendingPropertySaves[filename] = content
+            self.__lastPropertyScheduleTime = time.monotonic()
+            if self.__saveThread is None:
+                self.__saveThread = threading.Thread(
+                    target=self.__propertySaveLoop, name="PropertySaver", daemon=True
+                )
+                self.__saveThread.start()
+        self.__saveRequested.set()
+
+    def flushPropertySaves(self) -> None:
+        """
+        Immediately write any pending property saves, eg on shutdown.
+        """
+        # swap while holding the write lock, so an older batch can never be written after a newer one
+        with self.__writeLock:
+            with self.__pendingLock:
+                pending = self.__pendingPropertySaves
+                self.__pendingPropertySaves = {}
+
+            for filename, content in pending.items():
+                self.savePropertyToFileJSON(filename, content)
+
+    def hasPendingPropertySaves(self) -> bool:
+        """
+        Check if any property saves are waiting to be written.
+
+        Returns:
+            bool: True if there are pending saves, False otherwise.
+        """
+        with self.__pendingLock:
+            return bool(self.__pendingPropertySaves)
+
+    def __propertySaveLoop(self) -> None:
+        """
+        Background loop that waits for property changes to settle and then flushes them.
+        """
+        while True:
+            self.__saveRequested.wait()
+            self.__saveRequested.clear()
+
+            # debounce, keep waiting while changes are still coming in
+            while True:
+                with self.__pendingLock:
+                    settleTime = (
+                        self.__lastPropertyScheduleTime + self.PROPERTY_SAVE_DEBOUNCE_S
+                    )
+                remaining = settleTime - time.monotonic()
+                if remaining <= 0:
+                    break
+                time.sleep(remaining)
+
+            try:
+                self.flushPropertySaves()
+            except Exception as agentSmith:
+                Sentinel.error(f"Failed to save properties! {agentSmith}")
+
     def __saveToFileJSON(self, filepath: str, content: Any) -> bool:
         """
         Save content to a JSON file at the specified path.
+        The file is written to a temporary file first and then swapped in, so a reader never sees a partial file.
 
         Args:
             filepath (str): Full path to save the file.
@@ -224,8 +304,10 @@ class ConfigOperator:
             if not os.path.exists(directoryPath):
                 os.mkdir(directoryPath)  # only one level
                 Sentinel.debug(f"Created PROPERTIES path in {directoryPath}")
-            with open(filepath, "w") as file:
+            tmpPath = f"{filepath}.tmp"
+            with open(tmpPath, "w") as file:
                 json.dump(content, file)
+            os.replace(tmpPath, filepath)
             return True
         except Exception as agentSmith:
             Sentinel.debug(agentSmith)
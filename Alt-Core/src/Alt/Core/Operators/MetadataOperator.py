@@ -0,0 +1,272 @@
+"""MetadataOperator.py
+
+Keeps a local, subscription backed copy of slow changing metadata on XTables (team, device name, field dimensions,
+robot pose offsets), so agents can read it every loop without a blocking network request.
+
+Each value is fetched once on first use, and after that is kept up to date by an XTables subscription.
+
+Classes:
+    CachedMetadata: A single cached XTables value with optional update callbacks.
+    MetadataOperator: Creates and owns the cached values for one agent.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from JXTABLES.XTablesClient import XTablesClient
+from JXTABLES.XTablesByteUtils import XTablesByteUtils
+
+from ..Constants.Teams import TEAM
+from ..Constants.field import Field
+from ..Units import Types
+from ..Utils.network import DEVICEHOSTNAME
+from .LogOperator import getChildLogger
+
+Sentinel = getChildLogger("Metadata_Operator")
+
+
+class CachedMetadata:
+    """
+    A locally cached XTables value. get() is a plain attribute read.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        getterName: str,
+        decode: Callable[[bytes], Any],
+        default: Any = None,
+        minLength: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            key (str): The XTables key.
+            getterName (str): XTablesClient getter used for the first fetch (eg getString).
+            decode (Callable[[bytes], Any]): Converts the raw bytes of a subscription update.
+            default (Any, optional): Value used until XTables has one.
+            minLength (int, optional): For list values, shorter (or non list) values are rejected and the default is used.
+        """
+        self.key = key
+        self.getterName = getterName
+        self.decode = decode
+        self.default = default
+        self.minLength = minLength
+        self.__value: Any = default
+        self.__callbacks: List[Callable[[Any], None]] = []
+        # the first fetch and subscription updates race, an update always wins over the fetched value
+        self.__setLock = threading.RLock()
+        self.__hasUpdate = False
+        self.__ready = threading.Event()
+
+    def get(self) -> Any:
+        """
+        Returns:
+            Any: The latest known value, or the default if XTables has none.
+        """
+        return self.__value
+
+    def addCallback(self, callback: Callable[[Any], None]) -> None:
+        """
+        Register a callback that is run with the new value whenever it changes.
+        NOTE: callbacks run on the XTables subscriber thread, keep them short.
+
+        Args:
+            callback (Callable[[Any], None]): The callback.
+        """
+        self.__callbacks.append(callback)
+
+    def _set(self, value: Any) -> None:
+        if value is None:
+            value = self.default
+        elif not isinstance(value, (str, bytes)) and hasattr(value, "__iter__"):
+            # lists come back as protobuf containers, keep an immutable copy
+            value = tuple(value)
+
+        if (
+            self.minLength is not None
+            and value is not self.default
+            and (not isinstance(value, tuple) or len(value) < self.minLength)
+        ):
+            Sentinel.warning(
+                f"Invalid value for {self.key}: {value}, expected at least {self.minLength} values. Using the default"
+            )
+            value = self.default
+
+        if value == self.__value:
+            return
+
+        self.__value = value
+        for callback in self.__callbacks:
+            try:
+                callback(value)
+            except Exception as agentSmith:
+                Sentinel.error(f"Metadata callback for {self.key} failed: {agentSmith}")
+
+    def _onUpdate(self, ret: Any) -> None:
+        try:
+            value = self.decode(ret.value)
+        except Exception as agentSmith:
+            Sentinel.warning(f"Could not decode update for {self.key}, using the default: {agentSmith}")
+            value = None
+        with self.__setLock:
+            self.__hasUpdate = True
+            self._set(value)
+
+    def _setFetched(self, value: Any) -> None:
+        """Apply the value of the first fetch, unless an update already arrived while it was in flight"""
+        with self.__setLock:
+            if not self.__hasUpdate:
+                self._set(value)
+
+    def _markReady(self) -> None:
+        self.__ready.set()
+
+    def _waitReady(self, timeoutS: Optional[float] = None) -> bool:
+        """
+        Wait for the first fetch to finish.
+
+        Returns:
+            bool: False if it did not finish within timeoutS.
+        """
+        return self.__ready.wait(timeoutS)
+
+
+class MetadataOperator:
+    """
+    Creates cached metadata values for an agent, and removes their subscriptions when the agent is done.
+
+    Attributes:
+        TEAMKEY (str): XTables key for the alliance color.
+        DEVICENAMEKEY (str): XTables key (under the device hostname) for this devices name.
+        FIELDDIMENSIONSKEY (str): XTables key for the field [width, height] in meters.
+        ROBOTPOSEOFFSETKEY (str): XTables key (under the device hostname) for the [x (m), y (m), yaw (rad)] pose offset.
+        FIRSTFETCHTIMEOUTS (float): How long other callers wait for the first fetch of a key.
+    """
+
+    TEAMKEY = "TEAM"
+    DEVICENAMEKEY = "DEVICE_NAME"
+    FIELDDIMENSIONSKEY = "FIELD_DIMENSIONS_M"
+    ROBOTPOSEOFFSETKEY = "ROBOT_POSE_OFFSET"
+    FIRSTFETCHTIMEOUTS = 5.0  # longer than a XTables request timeout
+
+    def __init__(self, xclient: XTablesClient) -> None:
+        """
+        Nothing is fetched or subscribed to until a value is first used.
+
+        Args:
+            xclient (XTablesClient): The XTables client instance.
+        """
+        self.__xclient = xclient
+        self.__cache: Dict[str, CachedMetadata] = {}
+        self.__lock = threading.Lock()
+
+    def getCachedValue(
+        self,
+        key: str,
+        getterName: str = "getString",
+        decode: Callable[[bytes], Any] = XTablesByteUtils.to_string,
+        default: Any = None,
+        minLength: Optional[int] = None,
+    ) -> CachedMetadata:
+        """
+        Get (or create) the cached value for an XTables key. The first call fetches the current value and subscribes.
+
+        Args:
+            key (str): The XTables key.
+            getterName (str, optional): XTablesClient getter used for the first fetch. Defaults to getString.
+            decode (Callable[[bytes], Any], optional): Converts subscription update bytes. Defaults to a string.
+            default (Any, optional): Value used until XTables has one.
+            minLength (int, optional): Minimum length of a list value, shorter values fall back to the default.
+
+        Returns:
+            CachedMetadata: The cached value.
+        """
+        with self.__lock:
+            cached = self.__cache.get(key)
+            isFirst = cached is None
+            if isFirst:
+                cached = CachedMetadata(key, getterName, decode, default, minLength)
+                self.__cache[key] = cached
+
+        if not isFirst:
+            # another caller is still fetching, wait for it rather than handing out the default
+            if not cached._waitReady(self.FIRSTFETCHTIMEOUTS):
+                Sentinel.warning(f"First fetch of {key} did not finish in time, using the current value")
+            return cached
+
+        try:
+            # subscribe before fetching, so an update in between is not missed
+            self.__xclient.subscribe(key, cached._onUpdate)
+            try:
+                cached._setFetched(getattr(self.__xclient, getterName)(key))
+            except Exception as agentSmith:
+                Sentinel.debug(f"Could not fetch {key}, using default: {agentSmith}")
+        finally:
+            cached._markReady()
+
+        return cached
+
+    def getTeam(self) -> Optional[TEAM]:
+        """
+        Returns:
+            Optional[TEAM]: The alliance color, None if not set yet.
+        """
+        team: Optional[str] = self.getCachedValue(self.TEAMKEY).get()
+        if team is None:
+            return None
+
+        if team.lower() == "blue":
+            return TEAM.BLUE
+        else:
+            return TEAM.RED
+
+    def getDeviceName(self) -> str:
+        """
+        Returns:
+            str: The name set for this device on XTables, or the hostname if none.
+        """
+        return self.getCachedValue(
+            f"{DEVICEHOSTNAME}.{self.DEVICENAMEKEY}", default=DEVICEHOSTNAME
+        ).get()
+
+    def getFieldDimensions(self) -> Tuple[float, float]:
+        """
+        Returns:
+            Tuple[float, float]: The field (width, height) in meters.
+        """
+        field = Field.getInstance()
+        dimensions = self.getCachedValue(
+            self.FIELDDIMENSIONSKEY,
+            getterName="getDoubleList",
+            decode=XTablesByteUtils.to_double_list,
+            default=(field.getWidth(Types.Length.M), field.getHeight(Types.Length.M)),
+            minLength=2,
+        ).get()
+        return (dimensions[0], dimensions[1])
+
+    def getRobotPoseOffset(self) -> Tuple[float, float, float]:
+        """
+        Returns:
+            Tuple[float, float, float]: This devices pose offset from the robot, (x (m), y (m), yaw (rad)).
+        """
+        offset = self.getCachedValue(
+            f"{DEVICEHOSTNAME}.{self.ROBOTPOSEOFFSETKEY}",
+            getterName="getDoubleList",
+            decode=XTablesByteUtils.to_double_list,
+            default=(0.0, 0.0, 0.0),
+            minLength=3,
+        ).get()
+        return (offset[0], offset[1], offset[2])
+
+    def deregisterAll(self) -> None:
+        """
+        Removes all subscriptions, values are no longer kept up to date after this.
+        """
+        with self.__lock:
+            cache = list(self.__cache.values())
+            self.__cache.clear()
+
+        for cached in cache:
+            self.__xclient.unsubscribe(cached.key, cached._onUpdate)
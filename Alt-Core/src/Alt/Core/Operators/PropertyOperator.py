@@ -11,6 +11,7 @@ Classes:
 """
 
 import logging
+import threading
 from typing import Sequence
 from typing import Dict, List, Any, Optional, Callable
 from JXTABLES.XTablesClient import XTablesClient
@@ -84,6 +85,9 @@ class PropertyOperator:
         )
 
         self.__children: List["PropertyOperator"] = []
+        # callbacks run on the xtables thread, and can still be in flight while deregistering
+        self.__updateLock = threading.Lock()
+        self.__deregistered: bool = False
 
     def getFullPrefix(self) -> str:
         """
@@ -101,8 +105,16 @@ class PropertyOperator:
         Args:
             ret (Any): The update result object.
         """
-        self.__propertyValueMap[ret.key] = self.__getRealValue(ret.type, ret.value)
-        # Sentinel.debug(f"Property updated | Name: {ret.key} Value : {ret.value}")
+        with self.__updateLock:
+            if self.__deregistered:
+                # late update, saving now would overwrite the file with whatever is left in the map
+                return
+            self.__propertyValueMap[ret.key] = self.__getRealValue(ret.type, ret.value)
+            # Sentinel.debug(f"Property updated | Name: {ret.key} Value : {ret.value}")
+            # persist in the background once changes settle
+            self.__configOp.schedulePropertySave(
+                self.__getSaveFile(), dict(self.__propertyValueMap)
+            )
 
     def createReadExistingNetworkValueProperty(
         self, propertyTable: str, propertyDefault: Any = None
@@ -492,29 +504,39 @@ class PropertyOperator:
         PropertyOperator.__OPERATORS[fullPrefix] = child
         return child
 
-    def deregisterAll(self) -> bool:
+    def deregisterAll(self, flushSaves: bool = True) -> bool:
         """
         Unsubscribe from all property callbacks and clear property values.
 
+        Args:
+            flushSaves (bool): Whether to write the saved properties of this operator and all its children now.
+                Children are deregistered with this False, so everything is written together once at the top.
+
         Returns:
             bool: True if all were removed, False otherwise.
         """
+        with self.__updateLock:
+            self.__deregistered = True
+
         wasAllRemoved = True
-        for propertyTable in self.__propertyValueMap.keys():
+        for propertyTable in list(self.__propertyValueMap.keys()):
             wasAllRemoved &= self.__xclient.unsubscribe(
                 propertyTable, self.__updatePropertyCallback
             )
 
         # save property values
-        self.__configOp.savePropertyToFileJSON(
-            self.__getSaveFile(), self.__propertyValueMap
+        self.__configOp.schedulePropertySave(
+            self.__getSaveFile(), dict(self.__propertyValueMap)
         )
         # now clear
         self.__propertyValueMap.clear()
 
         for child in self.__children:
             # "recursively" go through each child and deregister them too
-            wasAllRemoved &= child.deregisterAll()
+            wasAllRemoved &= child.deregisterAll(flushSaves=False)
+
+        if flushSaves:
+            self.__configOp.flushPropertySaves()
         return wasAllRemoved
 
 
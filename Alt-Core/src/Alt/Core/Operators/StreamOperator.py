@@ -4,29 +4,71 @@ It allows the registration and management of multiple video streams,
 handling frame capture and serving them as MJPEG over HTTP.
 The StreamOperator class manages the streams, while the StreamProxy
 class serves as a wrapper for accessing and manipulating the stream data between processes.
+Depth streams carry raw 16 bit frames, and are only colormapped when served.
+Every stream also has a snapshot route, and all streams are tiled into a single thumbnail stream.
 """
 
 from __future__ import annotations
 
 import functools
+import math
 import multiprocessing
+import threading
 import time
+import uuid
 import cv2
-from typing import Dict
-from flask import Flask, Response, stream_with_context
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+from flask import Flask, Response, request, stream_with_context
 from .LogOperator import getChildLogger
-from .StreamProxy import StreamProxy
+from .StreamProxy import DepthStreamProxy, StreamProxy
 from ..Utils.network import DEVICEIP
 
 Sentinel = getChildLogger("Stream_Operator")
 
 
+@functools.lru_cache(maxsize=8)
+def getDepthColorLut(minMm: int, maxMm: int, colormap: int = cv2.COLORMAP_JET) -> np.ndarray:
+    """Builds a lookup table from every 16 bit depth value to a color, so frames are colormapped
+    with a single lookup instead of being normalized every frame. Cached per range and colormap.
+
+    Args:
+        minMm (int): Depth at the start of the colormap.
+        maxMm (int): Depth at the end of the colormap.
+        colormap (int): An OpenCV colormap.
+
+    Returns:
+        np.ndarray: (65536, 3) BGR colors. Zero (no depth) is black.
+    """
+    depths = np.arange(65536, dtype=np.float32)
+    scaled = np.clip((depths - minMm) * (255 / (maxMm - minMm)), 0, 255).astype(np.uint8)
+    lut = cv2.applyColorMap(scaled.reshape(-1, 1), colormap).reshape(65536, 3)
+    lut[0] = 0
+    return lut
+
+
+def colorizeDepth(frame: np.ndarray, depthRangeMm: tuple, colormap: int = cv2.COLORMAP_JET) -> np.ndarray:
+    """Colormaps a 16 bit depth frame with the cached lookup table of its range.
+
+    Args:
+        frame (np.ndarray): The depth frame (uint16, mm).
+        depthRangeMm (tuple): (min, max) depth of the colormap.
+        colormap (int): An OpenCV colormap.
+
+    Returns:
+        np.ndarray: The BGR frame.
+    """
+    lut = getDepthColorLut(int(depthRangeMm[0]), int(depthRangeMm[1]), colormap)
+    return np.take(lut, frame.astype(np.uint16, copy=False), axis=0)
+
+
 class StreamOperator:
     """Handles the management of multiple MJPEG video streams.
 
     Responsibilities include:
     - Registering new streams with unique names.
-    - Serving video frames as MJPEG over HTTP.
+    - Serving video frames as MJPEG over HTTP, and the latest frame as a jpeg snapshot.
+    - Serving a thumbnail mosaic of every stream, so an overview needs one connection.
     - Managing the lifecycle of the streams, including starting,
       stopping, and closing them.
 
@@ -39,6 +81,13 @@ class StreamOperator:
     """
 
     STREAMPATH = "stream.mjpg"
+    DEPTHSTREAMPATH = "depth.mjpg"
+    SNAPSHOTPATH = "snapshot.jpg"
+    DEPTHSNAPSHOTPATH = "depth.jpg"
+    THUMBNAILPATH = "thumbnails.mjpg"
+    THUMBNAILSIZE = (160, 120)  # (width, height) of each stream in the thumbnail mosaic
+    THUMBNAILFPS = 5  # max rate the thumbnail mosaic is rebuilt
+    SNAPSHOTLEASES = 2.0  # how long producers keep publishing after a snapshot request (seconds)
 
     def __init__(self, app: Flask, manager: multiprocessing.managers.SyncManager):
         """Initializes a StreamOperator instance.
@@ -51,6 +100,19 @@ class StreamOperator:
         self.streams: Dict[str, StreamProxy] = {}  # Dictionary to store streams
         self.manager = manager  # Multiprocessing Manager
         self.running = True
+        self.__subscriberLock = threading.Lock()  # clients are served on separate threads
+        self.__toImage: Dict[str, Callable[[np.ndarray], np.ndarray]] = {}
+        self.__encoded: Dict[str, Tuple[int, bytes]] = {}  # latest jpeg of each stream, shared by its clients
+        self.__encodeLocks: Dict[str, threading.Lock] = {}
+        self.__etagPrefix = uuid.uuid4().hex[:8]  # frame counts restart with the server, etags must not match old ones
+        self.__thumbnailLock = threading.Lock()
+        self.__thumbnailTime: float = 0
+        self.__thumbnails: Tuple[tuple, bytes] = ((), b"")
+
+        self.app.add_url_rule(
+            f"/{self.THUMBNAILPATH}",
+            view_func=self._create_view_func(self.__generateThumbnails, "thumbnails"),
+        )
 
     def register_stream(self, name: str) -> "StreamProxy":
         """Creates and registers a new stream, returning a StreamProxy for frame updates.
@@ -72,6 +134,63 @@ class StreamOperator:
         streamProxy = StreamProxy(self.manager.dict(), streamPath)
 
         self.streams[name] = streamProxy
+        self.__addRoute(name, self.STREAMPATH, self.SNAPSHOTPATH, name, name, lambda frame: frame)
+        return streamProxy
+
+    def register_depth_stream(self, name: str, decimation: int = 2) -> "DepthStreamProxy":
+        """Creates and registers a new depth stream, returning a DepthStreamProxy for frame updates.
+
+        Producers put raw 16 bit depth, which is only colormapped when a frame is served.
+
+        Args:
+            name (str): Unique name for the stream, the same name as a color stream is fine.
+            decimation (int): Only every decimation'th pixel in each direction is streamed.
+
+        Returns:
+            DepthStreamProxy: The proxy handling the stream's frame data.
+        """
+        key = f"{name}/{self.DEPTHSTREAMPATH}"
+        if key in self.streams:
+            Sentinel.info(f"Depth stream {name} already exists.")
+            return self.streams[key]
+
+        streamPath = f"http://{DEVICEIP}:5000/{key}"
+        streamProxy = DepthStreamProxy(self.manager.dict(), streamPath, decimation=decimation)
+
+        self.streams[key] = streamProxy
+        self.__addRoute(
+            name,
+            self.DEPTHSTREAMPATH,
+            self.DEPTHSNAPSHOTPATH,
+            f"{name}_depth",
+            key,
+            # the range is read per frame, so producers can change it while streaming
+            lambda frame: colorizeDepth(frame, streamProxy.getDepthRange()),
+        )
+        return streamProxy
+
+    def __addRoute(
+        self,
+        name: str,
+        path: str,
+        snapshotPath: str,
+        viewName: str,
+        key: str,
+        toImage: Callable[[np.ndarray], np.ndarray],
+    ) -> None:
+        """Serves a registered stream as MJPEG at /name/path, and its latest frame at /name/snapshotPath.
+
+        Args:
+            name (str): Unique name for the stream.
+            path (str): File part of the MJPEG URL.
+            snapshotPath (str): File part of the snapshot URL.
+            viewName (str): Unique name of the Flask views.
+            key (str): Key of the stream in self.streams.
+            toImage (Callable): Turns a frame into the image that is encoded, only called when a frame is served.
+        """
+        self.__toImage[key] = toImage
+        self.__encodeLocks[key] = threading.Lock()
+        streamProxy = self.streams[key]
 
         def generate_frames(streamProxy: StreamProxy):
             """Generator function to yield MJPEG frames from the stream proxy.
@@ -79,33 +198,163 @@ class StreamOperator:
             This function continuously retrieves frames from the stream
             until the operation is explicitly stopped.
 
+            The client is counted as a subscriber while connected, so producers only publish frames when someone is watching.
+
             Args:
                 streamProxy (StreamProxy): The proxy to fetch frames from.
             """
-            lastCountF = None
-            while self.running:
-                frame = streamProxy.get()
-                countF = streamProxy.getFrameCount()
-                if frame is None or countF == lastCountF:
-                    time.sleep(0.01)
-                    continue
-                lastCountF = countF
-                ret, jpeg = cv2.imencode(".jpg", frame)
-                if not ret:
-                    continue
-                yield (
-                    b"--frame\r\n"
-                    b"Content-Type: image/jpeg\r\n\r\n" + jpeg.tobytes() + b"\r\n\r\n"
-                )
+            with self.__subscriberLock:
+                streamProxy._addSubscriber()
+            try:
+                lastCountF = None
+                while self.running:
+                    encoded = self.__getEncoded(key)
+                    if encoded is None or encoded[0] == lastCountF:
+                        time.sleep(0.01)
+                        continue
+                    lastCountF = encoded[0]
+                    yield self.__toMultipart(encoded[1])
+            finally:
+                # runs when the client disconnects and the generator is closed
+                with self.__subscriberLock:
+                    streamProxy._removeSubscriber()
+
+        def snapshot_view():
+            # keeps the producer publishing for a while, so polling clients get fresh frames
+            streamProxy._touchSnapshot(self.SNAPSHOTLEASES)
+            encoded = self.__getEncoded(key)
+            if encoded is None:
+                return Response("No frame yet", status=503, headers={"Retry-After": "1"})
+
+            response = Response(encoded[1], mimetype="image/jpeg")
+            response.set_etag(f"{self.__etagPrefix}-{encoded[0]}")
+            response.headers["Cache-Control"] = "no-cache"
+            # 304 without a body if the client already has this frame
+            return response.make_conditional(request)
+
+        snapshot_view.__name__ = f"snapshot_{viewName}_view"
 
         self.app.add_url_rule(
-            f"/{name}/{self.STREAMPATH}",
+            f"/{name}/{path}",
             view_func=self._create_view_func(
-                lambda: generate_frames(streamProxy), name
+                lambda: generate_frames(streamProxy), viewName
             ),
         )
-        Sentinel.info(f"Registered new stream: {name} at '{name}/{self.STREAMPATH}'")
-        return streamProxy
+        self.app.add_url_rule(f"/{name}/{snapshotPath}", view_func=snapshot_view)
+        Sentinel.info(f"Registered new stream: {name} at '{name}/{path}'")
+
+    @staticmethod
+    def __toMultipart(jpeg: bytes) -> bytes:
+        return b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + jpeg + b"\r\n\r\n"
+
+    def __getEncoded(self, key: str) -> Optional[Tuple[int, bytes]]:
+        """Gets the latest frame of a stream as a jpeg, encoded once per frame no matter how many clients are served.
+
+        Args:
+            key (str): Key of the stream in self.streams.
+
+        Returns:
+            Optional[Tuple[int, bytes]]: (frame count, jpeg), or None if there is no frame.
+        """
+        streamProxy = self.streams.get(key)
+        if streamProxy is None:
+            return None
+
+        countF = streamProxy.getFrameCount()
+        with self.__encodeLocks[key]:
+            cached = self.__encoded.get(key)
+            if cached is not None and cached[0] == countF:
+                return cached
+
+            frame = streamProxy.get()
+            if frame is None:
+                return None
+            ret, jpeg = cv2.imencode(".jpg", self.__toImage[key](frame))
+            if not ret:
+                return None
+            cached = (countF, jpeg.tobytes())
+            self.__encoded[key] = cached
+            return cached
+
+    def __generateThumbnails(self):
+        """Generator function to yield a mosaic of every stream as MJPEG, at most THUMBNAILFPS times a second.
+
+        The client counts as a subscriber of every stream while connected, as it is watching all of them.
+        """
+        subscribed: Dict[str, StreamProxy] = {}
+        try:
+            lastSignature = None
+            while self.running:
+                with self.__subscriberLock:
+                    for key, streamProxy in list(self.streams.items()):
+                        if key not in subscribed:
+                            streamProxy._addSubscriber()
+                            subscribed[key] = streamProxy
+
+                signature, jpeg = self.__getThumbnails()
+                if jpeg and signature != lastSignature:
+                    lastSignature = signature
+                    yield self.__toMultipart(jpeg)
+                time.sleep(1 / self.THUMBNAILFPS)
+        finally:
+            with self.__subscriberLock:
+                for streamProxy in subscribed.values():
+                    streamProxy._removeSubscriber()
+
+    def __getThumbnails(self) -> Tuple[tuple, bytes]:
+        """Gets the thumbnail mosaic, rebuilt at most once per tick and only when a stream has a new frame.
+        Every client of the thumbnail stream shares it.
+
+        Returns:
+            Tuple[tuple, bytes]: (signature of the frames in it, jpeg). The jpeg is empty if no stream has a frame.
+        """
+        with self.__thumbnailLock:
+            now = time.monotonic()
+            if now - self.__thumbnailTime < 1 / self.THUMBNAILFPS:
+                return self.__thumbnails
+            self.__thumbnailTime = now
+
+            keys = sorted(self.streams)
+            signature = tuple((key, self.streams[key].getFrameCount()) for key in keys)
+            if signature == self.__thumbnails[0]:
+                return self.__thumbnails
+
+            tiles = []
+            for key in keys:
+                frame = self.streams[key].get()
+                if frame is not None:
+                    tiles.append((key, self.__toImage[key](frame)))
+
+            jpeg = b""
+            if tiles:
+                ret, encoded = cv2.imencode(".jpg", self.__buildMosaic(tiles))
+                if ret:
+                    jpeg = encoded.tobytes()
+            self.__thumbnails = (signature, jpeg)
+            return self.__thumbnails
+
+    def __buildMosaic(self, tiles: List[Tuple[str, np.ndarray]]) -> np.ndarray:
+        """Tiles downscaled images into a grid, each labeled with its stream name.
+
+        Args:
+            tiles (List[Tuple[str, np.ndarray]]): (stream key, image) pairs.
+
+        Returns:
+            np.ndarray: The BGR mosaic.
+        """
+        tileW, tileH = self.THUMBNAILSIZE
+        cols = math.ceil(math.sqrt(len(tiles)))
+        rows = math.ceil(len(tiles) / cols)
+        mosaic = np.zeros((rows * tileH, cols * tileW, 3), dtype=np.uint8)
+
+        for idx, (key, image) in enumerate(tiles):
+            y, x = (idx // cols) * tileH, (idx % cols) * tileW
+            tile = cv2.resize(image, (tileW, tileH), interpolation=cv2.INTER_AREA)
+            if tile.ndim == 2:
+                tile = cv2.cvtColor(tile, cv2.COLOR_GRAY2BGR)
+            mosaic[y : y + tileH, x : x + tileW] = tile
+            cv2.putText(mosaic, key, (x + 4, y + 14), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
+        return mosaic
 
     def _create_view_func(self, generate_frames_func, name: str):
         """Creates and returns a view function that serves video stream frames.
@@ -143,10 +392,11 @@ class StreamOperator:
         """Closes a specific stream and releases associated resources.
 
         Args:
-            name (str): The unique name of the stream to close.
+            name (str): The unique name of the stream to close (name/depth.mjpg for depth streams).
         """
         if name in self.streams:
             del self.streams[name]
+            self.__encoded.pop(name, None)
             Sentinel.info(f"Closed stream: {name}")
 
 
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+import time
 import numpy as np
 from multiprocessing import managers
-from typing import Optional
+from typing import Optional, Tuple
 from .LogOperator import getChildLogger
 from ..Constants.AgentConstants import Proxy
 
@@ -29,6 +30,7 @@ class StreamProxy(Proxy):
         self.__streamDict = streamDict
         self.__streamDict["stream_path"] = streamPath
         self.__streamDict["frame_count"] = 0
+        self.__streamDict["subscribers"] = 0
 
     def put(self, frame: np.ndarray) -> None:
         """Stores a new video frame in the proxy.
@@ -55,6 +57,36 @@ class StreamProxy(Proxy):
         """
         return self.__streamDict["frame_count"]
 
+    def getSubscriberCount(self) -> int:
+        """Gets the number of clients currently watching the stream.
+
+        Returns:
+            int: The number of connected stream clients.
+        """
+        return self.__streamDict.get("subscribers", 0)
+
+    def hasSubscribers(self) -> bool:
+        """Checks if anyone is watching the stream, so producers can skip work when nobody is.
+
+        A recent snapshot request counts as someone watching.
+
+        Returns:
+            bool: True if at least one client is connected.
+        """
+        return self.getSubscriberCount() > 0 or time.time() < self.__streamDict.get("snapshot_until", 0)
+
+    def _addSubscriber(self) -> None:
+        """Called by the StreamOperator when a client connects."""
+        self.__streamDict["subscribers"] = self.getSubscriberCount() + 1
+
+    def _touchSnapshot(self, leaseS: float) -> None:
+        """Called by the StreamOperator when a snapshot is requested, counts as watching for leaseS seconds."""
+        self.__streamDict["snapshot_until"] = time.time() + leaseS
+
+    def _removeSubscriber(self) -> None:
+        """Called by the StreamOperator when a client disconnects."""
+        self.__streamDict["subscribers"] = max(0, self.getSubscriberCount() - 1)
+
     def getStreamPath(self) -> str:
         """Gets the URL path of the video stream.
 
@@ -80,3 +112,80 @@ class StreamProxy(Proxy):
             state (dict): The state to restore from.
         """
         self.__streamDict = state
+
+
+class DepthStreamProxy(StreamProxy):
+    """Wrapper for a stream of raw depth frames.
+
+    Producers put 16 bit depth frames, which are decimated before crossing the process boundary.
+    The StreamOperator only colormaps them for connected clients, so an unwatched depth stream costs nothing
+    but the put.
+    """
+
+    DEFAULTDEPTHRANGEMM = (200, 10000)  # depth mapped onto the colormap, anything outside is clamped
+
+    def __init__(
+        self,
+        streamDict: managers.DictProxy,
+        streamPath: str,
+        decimation: int = 2,
+        depthRangeMm: Tuple[int, int] = DEFAULTDEPTHRANGEMM,
+    ):
+        """Initializes a DepthStreamProxy instance.
+
+        Args:
+            streamDict (managers.DictProxy): Proxy for accessing shared data.
+            streamPath (str): URL path of the video stream.
+            decimation (int): Only every decimation'th pixel in each direction is streamed.
+            depthRangeMm (Tuple[int, int]): Depth (mm) at the start and end of the colormap.
+        """
+        super().__init__(streamDict, streamPath)
+        self.__streamDict = streamDict
+        self.__streamDict["decimation"] = max(1, int(decimation))
+        self.setDepthRange(*depthRangeMm)
+
+    def put(self, frame: np.ndarray) -> None:
+        """Stores a new depth frame in the proxy, decimated.
+
+        Args:
+            frame (np.ndarray): The depth frame (uint16, mm).
+        """
+        decimation = self.getDecimation()
+        if decimation > 1:
+            # a strided view, pickling it into the manager is the only copy
+            frame = frame[::decimation, ::decimation]
+        super().put(frame)
+
+    def getDecimation(self) -> int:
+        """Gets how much depth frames are decimated by.
+
+        Returns:
+            int: The step between streamed pixels.
+        """
+        return self.__streamDict.get("decimation", 1)
+
+    def setDepthRange(self, minMm: int, maxMm: int) -> None:
+        """Sets the depth range the colormap spans.
+
+        Args:
+            minMm (int): Depth at the start of the colormap.
+            maxMm (int): Depth at the end of the colormap.
+        """
+        self.__streamDict["depth_range"] = (int(minMm), max(int(maxMm), int(minMm) + 1))
+
+    def getDepthRange(self) -> Tuple[int, int]:
+        """Gets the depth range the colormap spans.
+
+        Returns:
+            Tuple[int, int]: (min, max) depth in mm.
+        """
+        return self.__streamDict.get("depth_range", self.DEFAULTDEPTHRANGEMM)
+
+    def __getstate__(self):
+        """Returns the underlying stream dictionary proxy, like StreamProxy."""
+        return self.__streamDict
+
+    def __setstate__(self, state):
+        """Restores both this and the StreamProxy's reference to the stream dictionary."""
+        super().__setstate__(state)
+        self.__streamDict = state
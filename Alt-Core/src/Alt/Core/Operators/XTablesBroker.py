@@ -0,0 +1,517 @@
+"""XTablesBroker.py
+
+Provides a local multiplexing broker for XTables, so every agent process on a device can share a single
+XTables connection hosted by Neo instead of opening its own.
+
+Agents talk to the broker over a local unix socket (named pipe on windows) using multiprocessing connections.
+The broker de-duplicates subscriptions, so a key that many agents subscribe to (eg TEAM) is only subscribed to once
+on the real client, and fans any updates out to the subscribed agents.
+
+Classes:
+    XTablesBroker: Owns the real XTablesClient and serves agent processes. Runs inside Neo.
+    XTablesBrokerClient: Drop in replacement for XTablesClient used by agents to talk to the broker.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import queue
+import sys
+import threading
+from collections import defaultdict
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Callable, DefaultDict, Dict, List, Optional, Set, Tuple
+
+from JXTABLES.XTablesClient import XTablesClient
+from JXTABLES import XTableProto_pb2 as XTableProto
+
+from .LogOperator import getChildLogger
+
+Sentinel = getChildLogger("XTables_Broker")
+
+# (address, authkey) needed by agents to connect to the broker
+BrokerInfo = Tuple[str, bytes]
+
+# message kinds sent over the local connection
+_CALL = "call"
+_PUT = "put"
+_SUBSCRIBE = "subscribe"
+_UNSUBSCRIBE = "unsubscribe"
+_RESULT = "result"
+_UPDATE = "update"
+_CLOSE = "close"  # either side is going away, the reader should stop and close its end
+
+# subscription key used for subscribe_all, same as XTablesClient
+_ALLKEYS = ""
+
+
+class XTablesBroker:
+    """
+    Hosts a single XTablesClient and shares it with agent processes over a local transport.
+
+    Attributes:
+        FAMILY (str): The multiprocessing connection family used for the local transport.
+    """
+
+    FAMILY = "AF_PIPE" if sys.platform == "win32" else "AF_UNIX"
+
+    def __init__(self, xclient: Optional[XTablesClient] = None) -> None:
+        """
+        Initializes the broker. Call start() to begin accepting agents.
+
+        Args:
+            xclient (XTablesClient, optional): The client to share. If None, a new one is created.
+        """
+        if xclient is None:
+            xclient = XTablesClient(debug_mode=True)
+            xclient.add_client_version_property("MATRIX-ALT-BROKER")
+
+        self.__xclient = xclient
+        self.__authkey = os.urandom(16)
+        self.__listener = Listener(family=self.FAMILY, authkey=self.__authkey)
+        self.__running = False
+
+        self.__lock = threading.Lock()
+        # the client's request and push sockets are not thread safe, and every agent is served on its own thread
+        self.__clientLock = threading.Lock()
+        self.__connections: Set[Connection] = set()
+        self.__sendLocks: Dict[Connection, threading.Lock] = {}
+        self.__subscribers: DefaultDict[str, Set[Connection]] = defaultdict(set)
+
+    def start(self) -> None:
+        """
+        Starts accepting agent connections on a background thread.
+        """
+        self.__running = True
+        threading.Thread(
+            target=self.__acceptLoop, name="XTablesBroker-Accept", daemon=True
+        ).start()
+        Sentinel.info(f"XTables broker listening at {self.__listener.address}")
+
+    def getBrokerInfo(self) -> BrokerInfo:
+        """
+        Returns what an agent process needs to connect to this broker. Picklable.
+
+        Returns:
+            BrokerInfo: (address, authkey)
+        """
+        return (self.__listener.address, self.__authkey)
+
+    def getConnectionCount(self) -> int:
+        """
+        Returns:
+            int: Number of currently connected agent processes.
+        """
+        with self.__lock:
+            return len(self.__connections)
+
+    def getSubscribedKeys(self) -> List[str]:
+        """
+        Returns:
+            List[str]: Keys currently subscribed to on the real client.
+        """
+        with self.__lock:
+            return list(self.__subscribers.keys())
+
+    def shutdown(self) -> None:
+        """
+        Stops the broker, closing all agent connections. The shared client is shut down too.
+        """
+        self.__running = False
+        try:
+            self.__listener.close()
+        except OSError:
+            pass
+
+        with self.__lock:
+            connections = list(self.__connections)
+        for conn in connections:
+            self.__dropConnection(conn)
+
+        with self.__clientLock:
+            self.__xclient.shutdown()
+        Sentinel.info("XTables broker stopped.")
+
+    def __acceptLoop(self) -> None:
+        """
+        Accepts new agent connections, each one is served on its own thread.
+        """
+        while self.__running:
+            try:
+                conn = self.__listener.accept()
+            except Exception as agentSmith:
+                if self.__running:
+                    Sentinel.debug(f"Broker accept failed: {agentSmith}")
+                continue
+
+            with self.__lock:
+                self.__connections.add(conn)
+                self.__sendLocks[conn] = threading.Lock()
+
+            threading.Thread(
+                target=self.__serve, args=(conn,), name="XTablesBroker-Serve", daemon=True
+            ).start()
+
+    def __serve(self, conn: Connection) -> None:
+        """
+        Handles requests from a single agent connection until it is closed.
+
+        Args:
+            conn (Connection): The agent connection.
+        """
+        while self.__running:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+
+            kind = message[0]
+            if kind == _PUT:
+                _, methodName, args = message
+                try:
+                    self.__callClient(methodName, *args)
+                except Exception as agentSmith:
+                    Sentinel.error(f"Broker {methodName} failed: {agentSmith}")
+            elif kind == _CALL:
+                _, requestId, methodName, args = message
+                try:
+                    result = self.__callClient(methodName, *args)
+                    error = None
+                except Exception as agentSmith:
+                    result = None
+                    error = agentSmith
+                self.__send(conn, (_RESULT, requestId, result, error))
+            elif kind == _SUBSCRIBE:
+                self.__subscribe(conn, message[1])
+            elif kind == _UNSUBSCRIBE:
+                self.__unsubscribe(conn, message[1])
+            elif kind == _CLOSE:
+                break
+            else:
+                Sentinel.warning(f"Unknown broker message: {kind}")
+
+        self.__dropConnection(conn)
+
+    def __callClient(self, methodName: str, *args: Any) -> Any:
+        """
+        Calls a method of the shared client, one call at a time.
+
+        Args:
+            methodName (str): The XTablesClient method.
+            *args: Its arguments.
+
+        Returns:
+            Any: What the method returned.
+        """
+        with self.__clientLock:
+            return getattr(self.__xclient, methodName)(*args)
+
+    def __subscribe(self, conn: Connection, key: str) -> None:
+        with self.__lock:
+            isFirst = not self.__subscribers.get(key)
+            self.__subscribers[key].add(conn)
+        if isFirst:
+            # only one real subscription per key, no matter how many agents want it
+            if key == _ALLKEYS:
+                self.__callClient("subscribe_all", self.__fanOutAll)
+            else:
+                self.__callClient("subscribe", key, self.__fanOut)
+
+    def __unsubscribe(self, conn: Connection, key: str) -> None:
+        with self.__lock:
+            subscribed = self.__subscribers.get(key)
+            if subscribed is None:
+                return
+            subscribed.discard(conn)
+            isLast = not subscribed
+            if isLast:
+                del self.__subscribers[key]
+        if isLast:
+            if key == _ALLKEYS:
+                self.__callClient("unsubscribe_all", self.__fanOutAll)
+            else:
+                self.__callClient("unsubscribe", key, self.__fanOut)
+
+    def __fanOut(self, update: Any) -> None:
+        """
+        Forwards an update from the real client to every agent subscribed to its key.
+
+        Args:
+            update (XTableUpdate): The update from XTables.
+        """
+        self.__sendUpdate(update.key, update)
+
+    def __fanOutAll(self, update: Any) -> None:
+        """
+        Forwards an update from the real client to every agent subscribed to all keys.
+
+        Args:
+            update (XTableUpdate): The update from XTables.
+        """
+        self.__sendUpdate(_ALLKEYS, update)
+
+    def __sendUpdate(self, subscribedKey: str, update: Any) -> None:
+        with self.__lock:
+            connections = list(self.__subscribers.get(subscribedKey, ()))
+        if not connections:
+            return
+
+        # serialize once, however many agents are listening
+        # the subscription is sent along, so an agent subscribed to both the key and all keys can tell them apart
+        message = (_UPDATE, subscribedKey, update.SerializeToString())
+        for conn in connections:
+            self.__send(conn, message)
+
+    def __send(self, conn: Connection, message: tuple) -> None:
+        sendLock = self.__sendLocks.get(conn)
+        if sendLock is None:
+            return
+        try:
+            with sendLock:
+                conn.send(message)
+        except (BrokenPipeError, EOFError, OSError):
+            self.__dropConnection(conn)
+
+    def __dropConnection(self, conn: Connection) -> None:
+        """
+        Removes a connection and any subscriptions it held.
+
+        Args:
+            conn (Connection): The agent connection.
+        """
+        with self.__lock:
+            if conn not in self.__connections:
+                return
+            self.__connections.discard(conn)
+            sendLock = self.__sendLocks.pop(conn)
+            keys = [key for key, conns in self.__subscribers.items() if conn in conns]
+
+        for key in keys:
+            self.__unsubscribe(conn, key)
+
+        try:
+            # let the agent know, as closing does not wake up its blocked reader
+            # a fan out that got the send lock before it was removed might still be sending
+            with sendLock:
+                conn.send((_CLOSE,))
+        except (BrokenPipeError, EOFError, OSError):
+            pass
+        try:
+            conn.close()
+        except OSError:
+            pass
+
+
+class XTablesBrokerClient:
+    """
+    Stand in for XTablesClient that forwards everything to the XTablesBroker hosted by Neo.
+
+    Get methods are request/response, put methods are fire and forget like their XTables counterparts.
+    Subscription consumers receive the same XTableUpdate messages they would from XTablesClient. They are called
+    on their own thread, so a consumer can make requests to the broker.
+
+    Attributes:
+        REQUESTTIMEOUTS (float): How long to wait for the broker to answer a request before returning None.
+    """
+
+    REQUESTTIMEOUTS = 3.0  # matches the XTablesClient request socket timeout
+
+    def __init__(self, brokerInfo: BrokerInfo) -> None:
+        """
+        Connects to the broker.
+
+        Args:
+            brokerInfo (BrokerInfo): What XTablesBroker.getBrokerInfo() returned.
+        """
+        address, authkey = brokerInfo
+        self.__conn = Client(address, family=XTablesBroker.FAMILY, authkey=authkey)
+        self.__sendLock = threading.Lock()
+        self.__requestIds = itertools.count()
+        self.__pendingLock = threading.Lock()
+        self.__pending: Dict[int, queue.Queue] = {}
+        self.__consumerLock = threading.Lock()
+        self.__consumers: Dict[str, List[Callable]] = {}
+        # (subscribedKey, update) waiting for the consumers, None once the connection is closed
+        self.__updates: queue.Queue = queue.Queue()
+        self.__closed = False
+
+        threading.Thread(
+            target=self.__readLoop, name="XTablesBrokerClient-Read", daemon=True
+        ).start()
+        threading.Thread(
+            target=self.__dispatchLoop, name="XTablesBrokerClient-Dispatch", daemon=True
+        ).start()
+
+    def __getattr__(self, name: str) -> Callable:
+        """
+        Forwards any other XTablesClient method (putString, getDouble, ...) to the broker.
+        """
+        if name.startswith("_") or not hasattr(XTablesClient, name):
+            raise AttributeError(name)
+
+        if name.startswith("put"):
+            return lambda *args: self.__put(name, args)
+        return lambda *args: self.__call(name, args)
+
+    def subscribe(self, key: str, consumer: Callable) -> bool:
+        """
+        Subscribes a consumer to a key. Only the first consumer for a key reaches the broker.
+
+        Args:
+            key (str): The key to subscribe to.
+            consumer (Callable): Called with each XTableUpdate for the key.
+
+        Returns:
+            bool: True if the subscription was added.
+        """
+        with self.__consumerLock:
+            consumers = self.__consumers.setdefault(key, [])
+            consumers.append(consumer)
+            isFirst = len(consumers) == 1
+        if isFirst:
+            return self.__sendMessage((_SUBSCRIBE, key))
+        return True
+
+    def unsubscribe(self, key: str, consumer: Callable) -> bool:
+        """
+        Removes a consumer from a key.
+
+        Args:
+            key (str): The key to unsubscribe from.
+            consumer (Callable): The consumer that was subscribed.
+
+        Returns:
+            bool: True if the consumer was removed, False otherwise.
+        """
+        with self.__consumerLock:
+            consumers = self.__consumers.get(key)
+            if consumers is None or consumer not in consumers:
+                return False
+            consumers.remove(consumer)
+            isLast = not consumers
+            if isLast:
+                del self.__consumers[key]
+        if isLast:
+            self.__sendMessage((_UNSUBSCRIBE, key))
+        return True
+
+    def subscribe_all(self, consumer: Callable) -> bool:
+        """
+        Subscribes a consumer to updates for every key.
+
+        Args:
+            consumer (Callable): Called with each XTableUpdate.
+
+        Returns:
+            bool: True if the subscription was added.
+        """
+        return self.subscribe(_ALLKEYS, consumer)
+
+    def unsubscribe_all(self, consumer: Callable) -> bool:
+        """
+        Removes a consumer subscribed with subscribe_all.
+
+        Args:
+            consumer (Callable): The consumer that was subscribed.
+
+        Returns:
+            bool: True if the consumer was removed, False otherwise.
+        """
+        return self.unsubscribe(_ALLKEYS, consumer)
+
+    def add_client_version_property(self, value: str) -> None:
+        """The broker owns the real client, so the version property is not forwarded."""
+        pass
+
+    def shutdown(self) -> None:
+        """
+        Closes the connection to the broker. The broker drops any subscriptions this client held.
+        """
+        # the broker answers with a close of its own, which stops the read loop and closes the connection
+        self.__sendMessage((_CLOSE,))
+        self.__closed = True
+
+    def __put(self, methodName: str, args: tuple) -> bool:
+        return self.__sendMessage((_PUT, methodName, args))
+
+    def __call(self, methodName: str, args: tuple) -> Any:
+        requestId = next(self.__requestIds)
+        response: queue.Queue = queue.Queue(maxsize=1)
+        with self.__pendingLock:
+            self.__pending[requestId] = response
+
+        try:
+            if not self.__sendMessage((_CALL, requestId, methodName, args)):
+                return None
+            result, error = response.get(timeout=self.REQUESTTIMEOUTS)
+        except queue.Empty:
+            Sentinel.warning(f"XTables broker did not answer {methodName}{args}")
+            return None
+        finally:
+            with self.__pendingLock:
+                self.__pending.pop(requestId, None)
+
+        if error is not None:
+            raise error
+        return result
+
+    def __sendMessage(self, message: tuple) -> bool:
+        if self.__closed:
+            return False
+        try:
+            with self.__sendLock:
+                self.__conn.send(message)
+            return True
+        except (BrokenPipeError, EOFError, OSError):
+            Sentinel.error("Lost connection to the XTables broker!")
+            return False
+
+    def __readLoop(self) -> None:
+        """
+        Receives request results and subscription updates from the broker.
+        """
+        while True:
+            try:
+                message = self.__conn.recv()
+            except (EOFError, OSError):
+                break
+
+            if message[0] == _CLOSE:
+                break
+            elif message[0] == _RESULT:
+                _, requestId, result, error = message
+                with self.__pendingLock:
+                    response = self.__pending.get(requestId)
+                if response is not None:
+                    response.put((result, error))
+            elif message[0] == _UPDATE:
+                # consumers are not run here, this thread has to stay free to deliver request results
+                _, subscribedKey, updateBytes = message
+                self.__updates.put((subscribedKey, updateBytes))
+
+        self.__closed = True
+        self.__updates.put(None)
+        try:
+            self.__conn.close()
+        except OSError:
+            pass
+
+    def __dispatchLoop(self) -> None:
+        """
+        Runs the subscription consumers for each update received from the broker.
+        """
+        while True:
+            item = self.__updates.get()
+            if item is None:
+                break
+
+            subscribedKey, updateBytes = item
+            update = XTableProto.XTableMessage.XTableUpdate.FromString(updateBytes)
+            with self.__consumerLock:
+                consumers = list(self.__consumers.get(subscribedKey, ()))
+            for consumer in consumers:
+                try:
+                    consumer(update)
+                except Exception as agentSmith:
+                    Sentinel.error(f"Subscriber for {update.key} failed: {agentSmith}")
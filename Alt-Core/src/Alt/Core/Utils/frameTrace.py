@@ -0,0 +1,218 @@
+"""frameTrace.py
+
+Lightweight per frame tracing across agents, processes and devices.
+
+A FrameTrace is started when a frame is captured and carries a trace id and a list of timed spans (capture, inference,
+encode...). It is serialized into the capnp packets (FramePacket, DetectionPacket) the frame's results travel in,
+so the receiving agent can keep adding spans. Finished traces are collected by a TraceRecorder and exported in the
+Chrome trace-event format (open with chrome://tracing or https://ui.perfetto.dev).
+
+Span times use the monotonic clock, so durations are exact. Each span also stores its process's offset from wall
+time, so spans recorded on different devices can be lined up on one timeline (as well as the device clocks agree).
+
+This module provides:
+- TraceSpan: A single named, timed stage.
+- FrameTrace: The spans for one frame.
+- TraceRecorder: Collects finished traces and exports them.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, NamedTuple, Optional
+
+from .network import DEVICEHOSTNAME
+
+# computed once per process, wall time = monotonic time + offset
+_CLOCKOFFSETNS = time.time_ns() - time.monotonic_ns()
+
+
+def _processLabel() -> str:
+    return f"{DEVICEHOSTNAME}:{os.getpid()}"
+
+
+class TraceSpan(NamedTuple):
+    name: str
+    startNs: int  # monotonic
+    endNs: int  # monotonic
+    process: str
+    clockOffsetNs: int
+
+    def getWallStartNs(self) -> int:
+        return self.startNs + self.clockOffsetNs
+
+
+class FrameTrace:
+    """
+    The trace of a single frame. Cheap enough to create for every frame.
+    """
+
+    def __init__(
+        self, traceId: Optional[int] = None, spans: Optional[List[TraceSpan]] = None
+    ) -> None:
+        """
+        Args:
+            traceId (int, optional): Id of the frame. A new random id is used if None.
+            spans (List[TraceSpan], optional): Spans already recorded, eg by another process.
+        """
+        self.traceId: int = traceId if traceId is not None else random.getrandbits(63)
+        self.spans: List[TraceSpan] = spans if spans is not None else []
+        self.__process = _processLabel()
+
+    def addSpan(self, name: str, startNs: int, endNs: int) -> None:
+        """
+        Record a stage that ran between two time.monotonic_ns() timestamps.
+
+        Args:
+            name (str): Name of the stage.
+            startNs (int): Monotonic start time in ns.
+            endNs (int): Monotonic end time in ns.
+        """
+        self.spans.append(
+            TraceSpan(name, startNs, endNs, self.__process, _CLOCKOFFSETNS)
+        )
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """
+        Time the enclosed block as a stage.
+
+        Args:
+            name (str): Name of the stage.
+        """
+        startNs = time.monotonic_ns()
+        try:
+            yield
+        finally:
+            self.addSpan(name, startNs, time.monotonic_ns())
+
+    def mark(self, name: str) -> None:
+        """
+        Record a point in time (eg a frame being received) as a zero length stage.
+
+        Args:
+            name (str): Name of the event.
+        """
+        nowNs = time.monotonic_ns()
+        self.addSpan(name, nowNs, nowNs)
+
+    def getTotalMs(self) -> float:
+        """
+        Returns:
+            float: Wall time from the start of the first stage to the end of the last, in ms.
+        """
+        if not self.spans:
+            return 0.0
+        start = min(span.getWallStartNs() for span in self.spans)
+        end = max(span.endNs + span.clockOffsetNs for span in self.spans)
+        return (end - start) / 1e6
+
+    def writeTo(self, traceBuilder: Any) -> None:
+        """
+        Write into a capnp FrameTrace struct builder, eg packet.init("trace").
+
+        Args:
+            traceBuilder (Any): The capnp builder.
+        """
+        traceBuilder.traceId = self.traceId
+        spansBuilder = traceBuilder.init("spans", len(self.spans))
+        for spanBuilder, span in zip(spansBuilder, self.spans):
+            spanBuilder.name = span.name
+            spanBuilder.startNs = span.startNs
+            spanBuilder.endNs = span.endNs
+            spanBuilder.process = span.process
+            spanBuilder.clockOffsetNs = span.clockOffsetNs
+
+    @staticmethod
+    def readFrom(traceReader: Any) -> FrameTrace:
+        """
+        Read from a capnp FrameTrace struct, eg packet.trace.
+
+        Args:
+            traceReader (Any): The capnp reader.
+
+        Returns:
+            FrameTrace: A trace that can be extended in this process.
+        """
+        spans = [
+            TraceSpan(
+                span.name, span.startNs, span.endNs, span.process, span.clockOffsetNs
+            )
+            for span in traceReader.spans
+        ]
+        return FrameTrace(traceReader.traceId, spans)
+
+
+class TraceRecorder:
+    """
+    Keeps the most recent finished traces, and exports them as Chrome trace events.
+    """
+
+    def __init__(self, maxTraces: int = 1000) -> None:
+        """
+        Args:
+            maxTraces (int, optional): Oldest traces are dropped past this many. Defaults to 1000.
+        """
+        self.__traces: Deque[FrameTrace] = deque(maxlen=maxTraces)
+
+    def add(self, trace: FrameTrace) -> None:
+        self.__traces.append(trace)
+
+    def getTraces(self) -> List[FrameTrace]:
+        return list(self.__traces)
+
+    def toChromeTrace(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: The traces in Chrome trace-event json format. Each process gets its own row,
+            and every event has the frame's trace id in its args.
+        """
+        events: List[Dict[str, Any]] = []
+        pids: Dict[str, int] = {}
+        for trace in self.__traces:
+            for span in trace.spans:
+                pid = pids.get(span.process)
+                if pid is None:
+                    pid = len(pids) + 1
+                    pids[span.process] = pid
+                    events.append(
+                        {
+                            "name": "process_name",
+                            "ph": "M",
+                            "pid": pid,
+                            "args": {"name": span.process},
+                        }
+                    )
+
+                event: Dict[str, Any] = {
+                    "name": span.name,
+                    "cat": "frame",
+                    "pid": pid,
+                    "tid": pid,
+                    "ts": span.getWallStartNs() / 1000,  # us
+                    "args": {"traceId": str(trace.traceId)},
+                }
+                if span.endNs == span.startNs:
+                    event["ph"] = "i"
+                    event["s"] = "p"
+                else:
+                    event["ph"] = "X"
+                    event["dur"] = (span.endNs - span.startNs) / 1000
+                events.append(event)
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def save(self, path: str) -> None:
+        """
+        Write the Chrome trace json to a file.
+
+        Args:
+            path (str): File to write.
+        """
+        with open(path, "w") as f:
+            json.dump(self.toChromeTrace(), f)
@@ -0,0 +1,53 @@
+import json
+import os
+import time
+
+from Alt.Core.Operators.ConfigOperator import ConfigOperator
+
+
+def test_debounced_property_save(tmp_path, monkeypatch):
+    monkeypatch.setattr(ConfigOperator, "SAVEPATHS", [str(tmp_path)])
+    monkeypatch.setattr(ConfigOperator, "PROPERTY_SAVE_DEBOUNCE_S", 0.2)
+    configOp = ConfigOperator()
+
+    writes = []
+    realSave = configOp.savePropertyToFileJSON
+
+    def countingSave(filename, content):
+        writes.append(filename)
+        realSave(filename, content)
+
+    monkeypatch.setattr(configOp, "savePropertyToFileJSON", countingSave)
+
+    # many quick changes across two "child" files
+    for i in range(20):
+        configOp.schedulePropertySave("agent.saved_properties.json", {"a": i})
+        configOp.schedulePropertySave("agent.timers.saved_properties.json", {"b": i})
+
+    # nothing should be written while changes are still settling
+    assert writes == []
+
+    time.sleep(1)
+
+    assert not configOp.hasPendingPropertySaves()
+    # only the latest content of each file is written, once
+    assert sorted(writes) == [
+        "agent.saved_properties.json",
+        "agent.timers.saved_properties.json",
+    ]
+    with open(os.path.join(tmp_path, "PROPERTIES", "agent.saved_properties.json")) as f:
+        assert json.load(f) == {"a": 19}
+
+
+def test_flush_property_saves(tmp_path, monkeypatch):
+    monkeypatch.setattr(ConfigOperator, "SAVEPATHS", [str(tmp_path)])
+    configOp = ConfigOperator()
+
+    configOp.schedulePropertySave("agent.saved_properties.json", {"a": 1})
+    configOp.flushPropertySaves()
+
+    propertyDir = os.path.join(tmp_path, "PROPERTIES")
+    # no temporary files should be left behind
+    assert os.listdir(propertyDir) == ["agent.saved_properties.json"]
+    with open(os.path.join(propertyDir, "agent.saved_properties.json")) as f:
+        assert json.load(f) == {"a": 1}
@@ -0,0 +1,127 @@
+import threading
+
+from JXTABLES import XTableProto_pb2 as XTableProto
+
+from Alt.Core.Constants.Teams import TEAM
+from Alt.Core.Operators.MetadataOperator import MetadataOperator
+
+
+class CountingXTables:
+    """Stand in that counts blocking gets and lets the test push subscription updates"""
+
+    def __init__(self, values):
+        self.values = values
+        self.consumers = {}
+        self.gets = 0
+
+    def getString(self, key):
+        self.gets += 1
+        return self.values.get(key)
+
+    def getDoubleList(self, key):
+        self.gets += 1
+        return self.values.get(key)
+
+    def subscribe(self, key, consumer):
+        self.consumers.setdefault(key, []).append(consumer)
+        return True
+
+    def unsubscribe(self, key, consumer):
+        self.consumers[key].remove(consumer)
+        if not self.consumers[key]:
+            del self.consumers[key]
+        return True
+
+    def pushString(self, key, value):
+        update = XTableProto.XTableMessage.XTableUpdate(
+            key=key,
+            type=XTableProto.XTableMessage.Type.STRING,
+            value=value.encode("utf-8"),
+        )
+        for consumer in list(self.consumers.get(key, [])):
+            consumer(update)
+
+
+def test_team_is_cached_and_updated():
+    xclient = CountingXTables({"TEAM": "blue"})
+    metadataOp = MetadataOperator(xclient)
+
+    for _ in range(100):
+        assert metadataOp.getTeam() == TEAM.BLUE
+    # only the first read goes over the network
+    assert xclient.gets == 1
+
+    changes = []
+    metadataOp.getCachedValue(MetadataOperator.TEAMKEY).addCallback(changes.append)
+    xclient.pushString("TEAM", "red")
+
+    assert metadataOp.getTeam() == TEAM.RED
+    assert changes == ["red"]
+    assert xclient.gets == 1
+
+    metadataOp.deregisterAll()
+    assert xclient.consumers == {}
+
+
+def test_defaults_when_not_on_xtables():
+    xclient = CountingXTables({})
+    metadataOp = MetadataOperator(xclient)
+
+    assert metadataOp.getTeam() is None
+    assert metadataOp.getRobotPoseOffset() == (0.0, 0.0, 0.0)
+    width, height = metadataOp.getFieldDimensions()
+    assert width > height > 0
+
+
+def test_malformed_lists_fall_back_to_default():
+    xclient = CountingXTables({MetadataOperator.FIELDDIMENSIONSKEY: [16.5]})
+    metadataOp = MetadataOperator(xclient)
+
+    # too short to be a field size
+    width, height = metadataOp.getFieldDimensions()
+    assert width > height > 0
+
+    # a bad update keeps the default too
+    xclient.pushString(MetadataOperator.FIELDDIMENSIONSKEY, "not a list")
+    assert metadataOp.getFieldDimensions() == (width, height)
+
+
+class SlowXTables(CountingXTables):
+    """The first get blocks until the test lets it return"""
+
+    def __init__(self, values):
+        super().__init__(values)
+        self.fetching = threading.Event()
+        self.release = threading.Event()
+
+    def getString(self, key):
+        value = super().getString(key)
+        self.fetching.set()
+        self.release.wait(2)
+        return value
+
+
+def test_first_fetch_races():
+    xclient = SlowXTables({"TEAM": "blue"})
+    metadataOp = MetadataOperator(xclient)
+
+    first = threading.Thread(target=metadataOp.getTeam)
+    first.start()
+    assert xclient.fetching.wait(2)
+
+    # a second caller waits for the fetch instead of getting the default
+    seen = []
+    second = threading.Thread(target=lambda: seen.append(metadataOp.getTeam()))
+    second.start()
+    second.join(0.1)
+    assert second.is_alive()
+
+    # an update while the fetch is in flight is newer than what the fetch returns
+    xclient.pushString("TEAM", "red")
+    xclient.release.set()
+    first.join(2)
+    second.join(2)
+
+    assert seen == [TEAM.RED]
+    assert metadataOp.getTeam() == TEAM.RED
+    assert xclient.gets == 1
@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+from JXTABLES import XTableProto_pb2 as XTableProto
+
+from Alt.Core.Operators.ConfigOperator import ConfigOperator
+from Alt.Core.Operators.PropertyOperator import PropertyOperator
+
+
+class FakeXTables:
+    """Stores puts, and keeps the subscribed consumers so updates can be sent by hand"""
+
+    def __init__(self):
+        self.consumers = {}
+
+    def __getattr__(self, name):
+        if name.startswith("put"):
+            return lambda key, value: True
+        raise AttributeError(name)
+
+    def subscribe(self, key, consumer):
+        self.consumers[key] = consumer
+        return True
+
+    def unsubscribe(self, key, consumer):
+        return True
+
+
+def test_late_update_after_deregister_is_dropped(tmp_path, monkeypatch):
+    monkeypatch.setattr(ConfigOperator, "SAVEPATHS", [str(tmp_path)])
+    configOp = ConfigOperator()
+    xclient = FakeXTables()
+    propertyOp = PropertyOperator(xclient, configOp, prefix="late")  # type: ignore[arg-type]
+
+    propertyOp.createProperty("a", 1)
+    propertyOp.createProperty("b", 2)
+    (tableA, callback), = [(key, c) for key, c in xclient.consumers.items() if key.endswith(".a")]
+
+    propertyOp.deregisterAll()
+    saves = []
+    monkeypatch.setattr(configOp, "schedulePropertySave", lambda *args: saves.append(args))
+
+    # an update that was already in flight while deregistering
+    callback(SimpleNamespace(key=tableA, type=XTableProto.XTableMessage.Type.UNKNOWN, value=5))
+    assert saves == []
@@ -0,0 +1,110 @@
+import multiprocessing
+
+import cv2
+import numpy as np
+from flask import Flask
+
+from Alt.Core.Operators.StreamOperator import StreamOperator, getDepthColorLut
+
+
+def test_subscribers_are_counted():
+    with multiprocessing.Manager() as manager:
+        app = Flask(__name__)
+        streamOp = StreamOperator(app, manager)
+        proxy = streamOp.register_stream("test")
+        assert not proxy.hasSubscribers()
+
+        proxy.put(np.zeros((48, 64, 3), dtype=np.uint8))
+
+        response = app.test_client().get(f"/test/{StreamOperator.STREAMPATH}", buffered=False)
+        chunk = next(response.response)
+        assert chunk.startswith(b"--frame")
+        assert proxy.getSubscriberCount() == 1
+
+        # client disconnects
+        response.close()
+        assert proxy.getSubscriberCount() == 0
+        streamOp.shutdown()
+
+
+def test_depth_stream_is_decimated_and_colormapped():
+    with multiprocessing.Manager() as manager:
+        app = Flask(__name__)
+        streamOp = StreamOperator(app, manager)
+        proxy = streamOp.register_depth_stream("test", decimation=2)
+        proxy.setDepthRange(0, 1000)
+
+        depth = np.zeros((48, 64), dtype=np.uint16)
+        depth[:, 32:] = 1000
+        proxy.put(depth)
+        assert proxy.get().shape == (24, 32)
+
+        response = app.test_client().get(f"/test/{StreamOperator.DEPTHSTREAMPATH}", buffered=False)
+        chunk = next(response.response)
+        jpeg = chunk[chunk.index(b"\xff\xd8"):]
+        image = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+        assert image.shape == (24, 32, 3)
+        # no depth is black, the far end of the range is colored
+        assert image[:, :12].max() < 16
+        assert image[:, 20:].max() > 100
+        response.close()
+        streamOp.shutdown()
+
+
+def test_depth_lut_matches_range():
+    lut = getDepthColorLut(1000, 2000)
+    assert lut.shape == (65536, 3) and lut.dtype == np.uint8
+    assert not lut[0].any()
+    # clamped outside the range
+    assert np.array_equal(lut[500], lut[1000]) and np.array_equal(lut[2000], lut[60000])
+    assert getDepthColorLut(1000, 2000) is lut
+
+
+def test_snapshot_etag():
+    with multiprocessing.Manager() as manager:
+        app = Flask(__name__)
+        streamOp = StreamOperator(app, manager)
+        proxy = streamOp.register_stream("test")
+        client = app.test_client()
+
+        assert client.get(f"/test/{StreamOperator.SNAPSHOTPATH}").status_code == 503
+        # a snapshot request makes the producer publish, even without stream clients
+        assert proxy.hasSubscribers()
+
+        proxy.put(np.zeros((48, 64, 3), dtype=np.uint8))
+        response = client.get(f"/test/{StreamOperator.SNAPSHOTPATH}")
+        assert response.status_code == 200 and response.mimetype == "image/jpeg"
+        etag = response.headers["ETag"]
+
+        notModified = client.get(f"/test/{StreamOperator.SNAPSHOTPATH}", headers={"If-None-Match": etag})
+        assert notModified.status_code == 304 and not notModified.data
+
+        proxy.put(np.full((48, 64, 3), 255, dtype=np.uint8))
+        changed = client.get(f"/test/{StreamOperator.SNAPSHOTPATH}", headers={"If-None-Match": etag})
+        assert changed.status_code == 200 and changed.headers["ETag"] != etag
+        streamOp.shutdown()
+
+
+def test_thumbnails_tile_every_stream():
+    with multiprocessing.Manager() as manager:
+        app = Flask(__name__)
+        streamOp = StreamOperator(app, manager)
+        first = streamOp.register_stream("first")
+        second = streamOp.register_stream("second")
+        first.put(np.full((480, 640, 3), 255, dtype=np.uint8))
+        second.put(np.zeros((240, 320, 3), dtype=np.uint8))
+
+        response = app.test_client().get(f"/{StreamOperator.THUMBNAILPATH}", buffered=False)
+        chunk = next(response.response)
+        # watching the overview counts as watching every stream
+        assert first.getSubscriberCount() == 1 and second.getSubscriberCount() == 1
+
+        jpeg = chunk[chunk.index(b"\xff\xd8"):]
+        mosaic = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+        tileW, tileH = StreamOperator.THUMBNAILSIZE
+        assert mosaic.shape == (tileH, 2 * tileW, 3)
+        assert mosaic[tileH - 10, 10].mean() > 200 and mosaic[tileH - 10, tileW + 10].mean() < 50
+
+        response.close()
+        assert first.getSubscriberCount() == 0 and second.getSubscriberCount() == 0
+        streamOp.shutdown()
@@ -0,0 +1,183 @@
+import threading
+import time
+
+from JXTABLES import XTableProto_pb2 as XTableProto
+
+from Alt.Core.Operators.XTablesBroker import XTablesBroker, XTablesBrokerClient
+
+
+class LocalXTables:
+    """Minimal in memory stand in for the few XTablesClient methods the broker uses"""
+
+    def __init__(self):
+        self.values = {}
+        self.consumers = {}
+        self.subscribeCalls = 0
+        self.requestLock = threading.Lock()
+        self.requesting = False
+        self.overlapping = False
+
+    def putString(self, key, value):
+        self.values[key] = value
+        update = XTableProto.XTableMessage.XTableUpdate(
+            key=key,
+            type=XTableProto.XTableMessage.Type.STRING,
+            value=value.encode("utf-8"),
+        )
+        for consumer in list(self.consumers.get(key, [])) + list(self.consumers.get("", [])):
+            consumer(update)
+        return True
+
+    def getString(self, key):
+        return self.values.get(key)
+
+    def getDouble(self, key):
+        """Like the real client's REQ socket, a second request while one is in flight breaks it"""
+        with self.requestLock:
+            if self.requesting:
+                self.overlapping = True
+            self.requesting = True
+        time.sleep(0.005)
+        with self.requestLock:
+            self.requesting = False
+        return float(key)
+
+    def subscribe(self, key, consumer):
+        self.subscribeCalls += 1
+        self.consumers.setdefault(key, []).append(consumer)
+        return True
+
+    def subscribe_all(self, consumer):
+        return self.subscribe("", consumer)
+
+    def unsubscribe_all(self, consumer):
+        return self.unsubscribe("", consumer)
+
+    def unsubscribe(self, key, consumer):
+        self.consumers[key].remove(consumer)
+        if not self.consumers[key]:
+            del self.consumers[key]
+        return True
+
+    def shutdown(self):
+        pass
+
+
+def waitFor(condition, timeoutS=2):
+    start = time.time()
+    while not condition():
+        assert time.time() - start < timeoutS
+        time.sleep(0.01)
+
+
+def test_broker_dedupes_subscriptions_and_fans_out():
+    local = LocalXTables()
+    broker = XTablesBroker(xclient=local)
+    broker.start()
+
+    clients = [XTablesBrokerClient(broker.getBrokerInfo()) for _ in range(4)]
+    received = []
+    lock = threading.Lock()
+
+    def consumer(update):
+        with lock:
+            received.append((update.key, update.value.decode("utf-8")))
+
+    for client in clients:
+        client.subscribe("TEAM", consumer)
+        # a connection's messages are handled in order, so once a request returns its subscribe went through
+        client.getString("TEAM")
+
+    waitFor(lambda: broker.getConnectionCount() == 4 and "TEAM" in local.consumers)
+    waitFor(lambda: broker.getSubscribedKeys() == ["TEAM"])
+    # four agents, one real subscription
+    assert local.subscribeCalls == 1
+
+    clients[0].putString("TEAM", "blue")
+    waitFor(lambda: len(received) == 4)
+    assert received == [("TEAM", "blue")] * 4
+
+    # requests go through the shared connection
+    assert clients[1].getString("TEAM") == "blue"
+
+    for client in clients:
+        client.unsubscribe("TEAM", consumer)
+    waitFor(lambda: "TEAM" not in local.consumers)
+
+    for client in clients:
+        client.shutdown()
+    waitFor(lambda: broker.getConnectionCount() == 0)
+    broker.shutdown()
+
+
+def test_consumers_can_make_requests():
+    local = LocalXTables()
+    broker = XTablesBroker(xclient=local)
+    broker.start()
+    client = XTablesBrokerClient(broker.getBrokerInfo())
+
+    seen = []
+
+    def consumer(update):
+        # the real client allows this, so the broker client must too
+        seen.append(client.getString(update.key))
+
+    client.subscribe("TEAM", consumer)
+    waitFor(lambda: "TEAM" in local.consumers)
+    local.putString("TEAM", "red")
+    waitFor(lambda: seen == ["red"], timeoutS=XTablesBrokerClient.REQUESTTIMEOUTS / 2)
+
+    client.shutdown()
+    waitFor(lambda: broker.getConnectionCount() == 0)
+    broker.shutdown()
+
+
+def test_subscribe_all():
+    local = LocalXTables()
+    broker = XTablesBroker(xclient=local)
+    broker.start()
+    client = XTablesBrokerClient(broker.getBrokerInfo())
+
+    everything = []
+    onlyTeam = []
+    assert client.subscribe_all(lambda update: everything.append(update.key))
+    client.subscribe("TEAM", lambda update: onlyTeam.append(update.key))
+    waitFor(lambda: "" in local.consumers and "TEAM" in local.consumers)
+
+    local.putString("TEAM", "red")
+    local.putString("OTHER", "value")
+    waitFor(lambda: len(everything) == 2)
+    # each subscription gets the update once
+    assert everything == ["TEAM", "OTHER"]
+    assert onlyTeam == ["TEAM"]
+
+    client.shutdown()
+    waitFor(lambda: "" not in local.consumers)
+    broker.shutdown()
+
+
+def test_concurrent_calls_are_serialized():
+    local = LocalXTables()
+    broker = XTablesBroker(xclient=local)
+    broker.start()
+    clients = [XTablesBrokerClient(broker.getBrokerInfo()) for _ in range(4)]
+
+    results = {}
+
+    def request(idx, client):
+        results[idx] = [client.getDouble(str(idx * 10 + n)) for n in range(5)]
+
+    threads = [threading.Thread(target=request, args=(idx, client)) for idx, client in enumerate(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # every agent got its own answers, and the client never saw two requests at once
+    assert results == {idx: [float(idx * 10 + n) for n in range(5)] for idx in range(4)}
+    assert not local.overlapping
+
+    for client in clients:
+        client.shutdown()
+    waitFor(lambda: broker.getConnectionCount() == 0)
+    broker.shutdown()
@@ -0,0 +1,147 @@
+"""bench_batchInference.py
+
+Compares running N camera frames through an ONNX model one at a time (what MultiInferencer.run does per frame)
+against one batch (what MultiInferencer.runBatch does), on the CPU execution provider.
+
+Measured, per batch size N:
+    batch1: N letterbox + preprocess + session.run calls of batch size 1.
+    batchN: one letterboxBatch + one session.run of batch size N.
+Both report p50/p99 per set of N frames and frames per second.
+
+The model needs a dynamic batch dimension. Without --model a small synthetic conv net is built (needs the onnx
+package), which only shows the call and preprocessing overhead. Use a real exported yolo model for real numbers.
+
+Everything is printed as json (and optionally written to a file), so runs can be diffed.
+
+Usage:
+    python bench_batchInference.py --model yolo11n_dynamic.onnx --batches 1 2 4 --output results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+import cv2
+import numpy as np
+import onnxruntime as ort
+
+from Alt.ObjectLocalization.Inference.backends import utils
+
+INPUTSIZE = (640, 640)
+
+
+def _timeMs(func: Callable[[], Any], iterations: int) -> Dict[str, float]:
+    func()  # warmup
+    samplesMs = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samplesMs.append((time.perf_counter() - start) * 1000)
+    p50, p99 = np.percentile(samplesMs, [50, 99])
+    return {"p50Ms": round(float(p50), 4), "p99Ms": round(float(p99), 4)}
+
+
+def buildSyntheticModel(path: str) -> None:
+    """A few strided convolutions, with a dynamic batch dimension"""
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    rng = np.random.default_rng(0)
+    channels = [3, 16, 32, 64]
+    nodes, weights = [], []
+    previous = "images"
+    for idx in range(len(channels) - 1):
+        weight = rng.standard_normal((channels[idx + 1], channels[idx], 3, 3)).astype(np.float32) * 0.1
+        weights.append(numpy_helper.from_array(weight, f"w{idx}"))
+        nodes.append(helper.make_node("Conv", [previous, f"w{idx}"], [f"conv{idx}"], strides=[2, 2], pads=[1, 1, 1, 1]))
+        nodes.append(helper.make_node("Relu", [f"conv{idx}"], [f"relu{idx}"]))
+        previous = f"relu{idx}"
+
+    graph = helper.make_graph(
+        nodes,
+        "synthetic",
+        [helper.make_tensor_value_info("images", TensorProto.FLOAT, ["batch", 3, INPUTSIZE[1], INPUTSIZE[0]])],
+        [helper.make_tensor_value_info(previous, TensorProto.FLOAT, ["batch", channels[-1], None, None])],
+        initializer=weights,
+    )
+    onnx.save(helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)]), path)
+
+
+def preprocessSingle(frame: np.ndarray) -> np.ndarray:
+    """What onnxInferencer.preprocessFrame does"""
+    tensor = np.transpose(utils.letterbox_image(frame.copy(), INPUTSIZE), (2, 0, 1))
+    tensor = np.expand_dims(tensor, axis=0).astype(np.float32)
+    tensor /= 255
+    return tensor
+
+
+def benchBatchSize(session: ort.InferenceSession, batchSize: int, iterations: int) -> Dict[str, Any]:
+    inputName = session.get_inputs()[0].name
+    # cameras of different resolutions, like a robot with a mix of cameras would have
+    shapes = [(480, 640, 3), (720, 1280, 3)]
+    frames: List[np.ndarray] = [
+        np.random.randint(0, 255, shapes[idx % len(shapes)], dtype=np.uint8) for idx in range(batchSize)
+    ]
+
+    def runOneByOne() -> None:
+        for frame in frames:
+            session.run(None, {inputName: preprocessSingle(frame)})
+
+    def runBatched() -> None:
+        session.run(None, {inputName: utils.letterboxBatch(frames, INPUTSIZE)})
+
+    batch1 = _timeMs(runOneByOne, iterations)
+    batchN = _timeMs(runBatched, iterations)
+    for timings in (batch1, batchN):
+        timings["fps"] = round(batchSize * 1000 / timings["p50Ms"], 2)
+
+    return {"batchSize": batchSize, "batch1": batch1, "batchN": batchN}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", type=str, default=None, help="ONNX model with a dynamic batch dimension")
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 2, 4], help="Batch sizes to compare")
+    parser.add_argument("--iterations", type=int, default=30, help="Runs of each mode")
+    parser.add_argument("--threads", type=int, default=0, help="Intra op threads, 0 lets onnxruntime decide")
+    parser.add_argument("--output", type=str, default=None, help="Also write the json here")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as modelDir:
+        modelPath = args.model
+        if modelPath is None:
+            modelPath = os.path.join(modelDir, "synthetic.onnx")
+            buildSyntheticModel(modelPath)
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = args.threads
+        session = ort.InferenceSession(modelPath, sess_options=options, providers=["CPUExecutionProvider"])
+
+        results = {
+            "system": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "opencv": cv2.__version__,
+                "onnxruntime": ort.__version__,
+                "model": args.model or "synthetic",
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "inference": [benchBatchSize(session, batchSize, args.iterations) for batchSize in args.batches],
+        }
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
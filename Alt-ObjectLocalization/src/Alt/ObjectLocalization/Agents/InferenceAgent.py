@@ -1,11 +1,13 @@
-from typing import Any
+from typing import Any, List, Optional
 
 from Alt.Core.Agents import BindableAgent
 from Alt.Cameras.Agents.CameraUsingAgentBase import CameraUsingAgentBase
 from Alt.Cameras.Captures import Capture
 
+from ..Detections.DetectionResult import DetectionResult
 from ..Inference.ModelConfig import ModelConfig
 from ..Inference.MultiInferencer import MultiInferencer
+from ..Inference.PipelinedInferencer import InferenceResult, PipelinedInferencer
 
 
 class InferenceAgent(CameraUsingAgentBase, BindableAgent):
@@ -13,16 +15,38 @@ class InferenceAgent(CameraUsingAgentBase, BindableAgent):
     Adds inference capabilites to an agent, processing frames
     """
     @classmethod
-    def bind(cls, 
+    def bind(cls,
         capture: Capture,
         modelConfig: ModelConfig,
         showFrames: bool = False,
+        asyncInference: bool = False,
+        maxInFlight: int = 3,
     ):
-        return cls._getBindedAgent(capture=capture, modelConfig=modelConfig, showFrames=showFrames)
+        return cls._getBindedAgent(
+            capture=capture,
+            modelConfig=modelConfig,
+            showFrames=showFrames,
+            asyncInference=asyncInference,
+            maxInFlight=maxInFlight,
+        )
 
-    def __init__(self, modelConfig : ModelConfig, **kwargs: Any) -> None:
+    def __init__(
+        self, modelConfig : ModelConfig, asyncInference: bool = False, maxInFlight: int = 3, **kwargs: Any
+    ) -> None:
+        """
+        Args:
+            modelConfig: The model to run
+            asyncInference: Run preprocess, inference and postprocess on their own threads (see PipelinedInferencer).
+                Results then lag the latest frame by up to maxInFlight frames, self.latestResult says which frame they are of.
+            maxInFlight: Frames in the inference pipeline at once, when asyncInference is set
+        """
         super().__init__(**kwargs)
         self.modelConfig = modelConfig
+        self.asyncInference = asyncInference
+        self.maxInFlight = maxInFlight
+        self.results: Optional[List[DetectionResult]] = None
+        self.latestResult: Optional[InferenceResult] = None # when asyncInference is set, tagged with the frame's trace
+        self.pipelinedInf: Optional[PipelinedInferencer] = None
 
     def create(self) -> None:
         super().create()
@@ -41,13 +65,82 @@ class InferenceAgent(CameraUsingAgentBase, BindableAgent):
         )
         self.drawBoxes = self.propertyOperator.createProperty("Draw_Boxes", self.showFrames) # if the camera using agent has show frames, then draw as default
 
+        if self.asyncInference:
+            self.pipelinedInf = PipelinedInferencer(self.inf, maxInFlight=self.maxInFlight)
+            self.pipelinedInf.start()
+            self.stageTimings = {
+                stage: self.propertyOperator.createReadOnlyProperty(f"inference.{stage}Ms", 0.0)
+                for stage in PipelinedInferencer.STAGES + ("latency",)
+            }
+            self.inFlight = self.propertyOperator.createReadOnlyProperty("inference.inFlight", 0)
+
     def runPeriodic(self) -> None:
         super().runPeriodic()
 
+        if self.pipelinedInf is not None:
+            with self.timer.run("inference"):
+                self.__runPipelined()
+            return
+
         with self.timer.run("inference"):
             self.results = self.inf.run(
-                self.latestFrameMain, self.confidence.get(), self.drawBoxes.get()
+                self.latestFrameMain, self.confidence.get(), self.drawBoxes.get(), overlay=self.overlay
             )
 
+    def __runPipelined(self) -> None:
+        frame = self.latestFrameMain
+        if frame is None:
+            return
+
+        if self.framePool.owns(frame):
+            # the pipeline holds the frame past this iteration, the next ingest must not recycle it
+            self.framePool.retain(frame)
+        else:
+            # may be a buffer the capture reads the next frame into
+            frame = frame.copy()
+
+        # a slot is only freed by taking a result, so wait for the oldest frame when full. This keeps the agent at the
+        # pace of the slowest stage
+        taken = []
+        while self.pipelinedInf.getInFlight() >= self.maxInFlight:
+            result = self.pipelinedInf.getResult()
+            if result is not None:
+                taken.append(result)
+        if not self.pipelinedInf.submit(frame, self.confidence.get(), tag=self.latestFrameTrace, timeout=0):
+            # not taken, so nothing will hand the frame back with a result
+            self.framePool.release(frame)
+        taken.extend(self.pipelinedInf.getResults())
+
+        for result in taken[:-1]:
+            self.framePool.release(result.frame)
+        if taken:
+            self.__takeResult(taken[-1])
+
+        stats = self.pipelinedInf.getStageStats()
+        for stage, prop in self.stageTimings.items():
+            prop.set(stats.get(f"{stage}Ms", 0.0))
+        self.inFlight.set(self.pipelinedInf.getInFlight())
+
+    def __takeResult(self, result: InferenceResult) -> None:
+        """Newest result of this iteration, its frame is held until the next one replaces it"""
+        if self.latestResult is not None:
+            self.framePool.release(self.latestResult.frame)
+        self.latestResult = result
+        self.results = result.detections
+
+        if self.drawBoxes.get() and result.detections is not None:
+            # the boxes are of a frame a few behind, the overlay draws them on the latest one
+            slowestMs = max(result.preprocessMs, result.inferenceMs, result.postprocessMs)
+            self.inf.drawResults(result.frame, result.detections, 1000 / max(slowestMs, 1e-3), overlay=self.overlay)
+
+    def onClose(self) -> None:
+        if self.pipelinedInf is not None:
+            self.pipelinedInf.stop()
+            for result in self.pipelinedInf.getResults():
+                self.framePool.release(result.frame)
+            if self.latestResult is not None:
+                self.framePool.release(self.latestResult.frame)
+        super().onClose()
+
     def getDescription(self) -> str:
         return "Ingest_Camera_Run_Ai_Model"
@@ -6,6 +6,7 @@ from Alt.Core import DEVICEHOSTNAME
 from Alt.Core.Agents import BindableAgent
 from Alt.Core.Agents.PositionLocalizingAgentBase import PositionLocalizingAgentBase
 from Alt.Core.Units.Poses import Pose2d
+from Alt.Core.Utils.frameTrace import FrameTrace
 from Alt.Cameras.Agents.CameraUsingAgentBase import CameraUsingAgentBase
 from Alt.Cameras.Captures import CaptureWIntrinsics
 from Alt.Cameras.Parameters.CameraExtrinsics import CameraExtrinsics
@@ -56,20 +57,27 @@ class ObjectLocalizingStep1AgentBase(CameraUsingAgentBase, PositionLocalizingAge
         offsetYCm = self.positionOffsetYM.get() * 100
         offsetYawRAD = math.radians(self.positionOffsetYAWDEG.get())
 
-        with self.timer.run("frame-processing"):
+        trace = self.latestFrameTrace
+        if trace is None:
+            # frame came without a trace, start one here so the rest of the stages are still recorded
+            trace = FrameTrace()
+        with self.timer.run("frame-processing"), trace.span("frame-processing"):
             localizedresults = self.localPipeline.runStep1(
                 Pose2d(offsetXCm, offsetYCm, offsetYawRAD),
                 self.latestFrameMain,
                 self.latestFrameDEPTH,
-                drawBoxes=self.showFrames,
-                # if you are sending frames, you likely want to see bounding boxes aswell
+                # recorded into the overlay, which is only drawn when the frames are shown or streamed to someone
+                drawBoxes=True,
+                overlay=self.overlay,
             )
 
         timestampMs = time.time() * 1000
         deviceResult = DeviceLocalizationResult(localizedresults, DEVICEHOSTNAME)
 
+        # the encode and send time shows up as the gap between this and the receivers "received" mark
+        trace.mark("send")
         detectionPacket = DetectionPacket.createPacket(
-            deviceResult, "Detection", timestampMs
+            deviceResult, "Detection", timestampMs, trace=trace
         )
         self.updateOp.addGlobalUpdate(self.DETECTIONPOSTFIX, detectionPacket.to_bytes())
 
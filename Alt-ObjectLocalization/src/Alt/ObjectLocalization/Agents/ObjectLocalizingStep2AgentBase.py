@@ -3,6 +3,7 @@ import time
 
 from Alt.Core.Agents import Agent, BindableAgent
 from Alt.Core.Constants.Field import Field
+from Alt.Core.Utils.frameTrace import TraceRecorder
 
 from ..Detections.DetectionPacket import DetectionPacket
 from ..Inference.ModelConfig import ModelConfig
@@ -17,6 +18,7 @@ class ObjectLocalizingStep2AgentBase(Agent, BindableAgent):
     """
 
     DETECTIONPOSTFIX = "Detections"
+    TRACEFILE = "frame_traces.json" # chrome trace-event file written on close, when enabled
 
     # TODO this subscriber into a map then check if its updated and then grab latest from the map stuff (below), needs to be consolidated into a single class
 
@@ -40,6 +42,8 @@ class ObjectLocalizingStep2AgentBase(Agent, BindableAgent):
         self.iterationsPerUpdate = 50
         self.iter_count = 0
 
+        self.traceRecorder = TraceRecorder()
+
     def create(self) -> None:
         super().create()
 
@@ -48,8 +52,12 @@ class ObjectLocalizingStep2AgentBase(Agent, BindableAgent):
             self.field
         )
 
+        self.exportTraces = self.propertyOperator.createProperty(
+            "Export_Frame_Traces", propertyDefault=False
+        )
+
     def __addKeyObject(self, key):
-        self.objectupdateMap[key] = ([], 0)
+        self.objectupdateMap[key] = ([], 0, None)
         self.localObjectUpdateMap[key] = 0
 
     # handles a subscriber update from one of the cameras
@@ -57,14 +65,17 @@ class ObjectLocalizingStep2AgentBase(Agent, BindableAgent):
         val = ret.value
         key = ret.key
 
-        lastidx = self.objectupdateMap[key][2]
+        lastidx = self.objectupdateMap[key][1]
         lastidx += 1
         if not val or val == b"":
             return
         
         det_packet = DetectionPacket.fromBytes(val)
+        trace = DetectionPacket.getTrace(det_packet)
+        if trace is not None:
+            trace.mark("received")
         # print(f"{det_packet.timestamp=}")
-        packet = (DetectionPacket.toResults(det_packet), lastidx)
+        packet = (DetectionPacket.toResults(det_packet), lastidx, trace)
         self.objectupdateMap[key] = packet
 
     def __centralUpdate(self) -> None:
@@ -76,20 +87,28 @@ class ObjectLocalizingStep2AgentBase(Agent, BindableAgent):
         self.lastUpdateTimeMs = currentTime
 
         accumulatedObjectResults = []
+        accumulatedTraces = []
         for key in self.localObjectUpdateMap.keys():
             # objects
             localidx = self.localObjectUpdateMap[key]
-            resultpacket = self.objectupdateMap[key]
-            res, packetidx = resultpacket[:1], resultpacket[1]
+            res, packetidx, trace = self.objectupdateMap[key]
             if packetidx != localidx:
                 # only update if change
                 self.localObjectUpdateMap[key] = packetidx
                 accumulatedObjectResults.append(res)
+                if trace is not None:
+                    accumulatedTraces.append(trace)
 
         # update objects
+        startNs = time.monotonic_ns()
         self.finalPipeline.runStep2(
-            cameraResults=accumulatedObjectResults, timeStepMs=timePerLoopMS
+            deviceResults=accumulatedObjectResults, timeStepMs=timePerLoopMS
         )
+        endNs = time.monotonic_ns()
+
+        for trace in accumulatedTraces:
+            trace.addSpan("probmap", startNs, endNs)
+            self.traceRecorder.add(trace)
 
     def __periodicSubscribe(self):
         self.updateOp.subscribeAllGlobalUpdates(
@@ -113,6 +132,11 @@ class ObjectLocalizingStep2AgentBase(Agent, BindableAgent):
             ObjectLocalizingStep1AgentBase.DETECTIONPOSTFIX, self.__handleObjectUpdate
         )
 
+        if self.exportTraces.get() and self.traceRecorder.getTraces():
+            self.configOperator.saveToFileJSON(
+                f"{self.agentName}_{self.TRACEFILE}", self.traceRecorder.toChromeTrace()
+            )
+
     def getDescription(self):
         return "Central-Process-Accumulate-Results-Broadcast-Them"
 
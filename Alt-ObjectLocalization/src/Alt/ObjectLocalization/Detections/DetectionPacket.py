@@ -1,10 +1,12 @@
 import base64
+from typing import Optional
 
 # necessary for the below import of the detection packet!
 import capnp
 
 import numpy as np
 from Alt.Core.Units.Poses import Transform3d
+from Alt.Core.Utils.frameTrace import FrameTrace
 
 from ..Localization.LocalizationResult import DeviceLocalizationResult, LocalizationResult
 from . import detectionNetPacket_capnp
@@ -17,6 +19,7 @@ class DetectionPacket:
         result: DeviceLocalizationResult,
         message : str,
         timeStamp,
+        trace : Optional[FrameTrace] = None,
     ) -> detectionNetPacket_capnp.DataPacket:
         
         numDetections = len(result.localizedResults)
@@ -41,10 +44,20 @@ class DetectionPacket:
             packet_detection.classidx = int(localizedResult.class_idx)
 
             packet_features = packet_detection.init("features")
-            packet_features.init("data", len(localizedResult.features))[:] = localizedResult.features.astype(float)
+            packet_features.data = localizedResult.features.astype(float).tolist()
+
+        if trace is not None:
+            trace.writeTo(packet.init("trace"))
 
         return packet
 
+    @staticmethod
+    def getTrace(packet) -> Optional[FrameTrace]:
+        """Trace of the frame these detections came from, None if the sender did not trace it"""
+        if not packet._has("trace"):
+            return None
+        return FrameTrace.readFrom(packet.trace)
+
     @staticmethod
     def toBase64(packet):
         # Write the packet to a byte string directly
@@ -4,6 +4,7 @@ from typing import List, Optional
 import cv2
 import numpy as np
 from Alt.Core import getChildLogger
+from Alt.Cameras.Captures.tools.overlay import FrameOverlay
 
 from ..Constants.InferenceC import Backend, available_backends
 from ..Detections.DetectionResult import DetectionResult
@@ -73,7 +74,11 @@ class MultiInferencer:
         raise RuntimeError(f"Invalid backend provided: {backend}")
 
     def run(
-        self, frame: np.ndarray, minConf: float, drawBoxes: bool = False
+        self,
+        frame: np.ndarray,
+        minConf: float,
+        drawBoxes: bool = False,
+        overlay: Optional[FrameOverlay] = None,
     ) -> Optional[List[DetectionResult]]:
         """
         Run inference on a frame
@@ -82,6 +87,7 @@ class MultiInferencer:
             frame: The input frame to run inference on
             minConf: Minimum confidence threshold for detections
             drawBoxes: Whether to draw bounding boxes on the frame
+            overlay: Record the boxes here instead of drawing them on the frame (see FrameOverlay)
 
         Returns:
             A list of tuples containing (bbox, confidence, class_id) or None if inference fails
@@ -121,16 +127,75 @@ class MultiInferencer:
 
         # Draw detection boxes and performance metrics if requested
         if drawBoxes:
-            cv2.putText(
-                frame, f"FPS: {cumulativeFps:.1f}", (10, 20), 1, 1, (255, 255, 255), 1
-            )
+            self.drawResults(frame, processed, cumulativeFps, overlay)
 
-            for result in processed:
-                # Get the label for this detection
-                label = f"Id out of range!: {result.class_idx}"
-                if len(self.backend.objects) > result.class_idx:
-                    label = self.backend.objects[result.class_idx].name
+        return processed
+
+    def drawResults(
+        self,
+        frame: np.ndarray,
+        processed: List[DetectionResult],
+        fps: float,
+        overlay: Optional[FrameOverlay] = None,
+    ) -> None:
+        """
+        Draw detections and the inference fps
 
+        Args:
+            frame: The frame the detections are from, drawn on when there is no overlay
+            processed: The detections to draw
+            fps: Inference fps to show
+            overlay: Record the boxes here instead of drawing them on the frame (see FrameOverlay)
+        """
+        fpsText = f"FPS: {fps:.1f}"
+        if overlay is not None:
+            overlay.text(fpsText, (10, 20))
+        else:
+            cv2.putText(frame, fpsText, (10, 20), 1, 1, (255, 255, 255), 1)
+
+        for result in processed:
+            # Get the label for this detection
+            label = f"Id out of range!: {result.class_idx}"
+            if len(self.backend.objects) > result.class_idx:
+                label = self.backend.objects[result.class_idx].name
+
+            if overlay is not None:
+                overlay.box(result.bbox, f"{label} Conf:{result.conf:.2f}")
+            else:
                 utils.drawBox(frame, result.bbox, label, result.conf)
 
-        return processed
+    def runBatch(
+        self, frames: List[np.ndarray], minConf: float
+    ) -> List[Optional[List[DetectionResult]]]:
+        """
+        Run inference on several frames (eg one per camera) with as few model runs as the backend allows.
+        Backends without batch support run the frames one by one.
+
+        Args:
+            frames: The input frames, sizes can differ
+            minConf: Minimum confidence threshold for detections
+
+        Returns:
+            The detections of each frame (boxes in that frame's pixels), None for frames whose inference failed
+        """
+        if not frames:
+            return []
+
+        maxBatchSize = self.backend.getMaxBatchSize()
+        if maxBatchSize == 1:
+            return [self.run(frame, minConf) for frame in frames]
+
+        step = maxBatchSize or len(frames)
+        results: List[Optional[List[DetectionResult]]] = []
+        for start in range(0, len(frames), step):
+            batch = frames[start : start + step]
+
+            tensor = self.backend.preprocessBatch(batch)
+            outputs = self.backend.runInference(inputTensor=tensor) if tensor is not None else None
+            if outputs is None:
+                Sentinel.fatal("Inference Backend failed on a batch!")
+                results.extend([None] * len(batch))
+                continue
+
+            results.extend(self.backend.postProcessBatch(outputs, batch, minConf))
+        return results
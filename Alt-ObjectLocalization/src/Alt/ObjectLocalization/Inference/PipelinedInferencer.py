@@ -0,0 +1,218 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+from Alt.Core import getChildLogger
+
+from ..Detections.DetectionResult import DetectionResult
+from .MultiInferencer import MultiInferencer
+
+Sentinel = getChildLogger("Pipelined_Inferencer")
+
+
+class InferenceResult(NamedTuple):
+    tag: Any  # whatever was passed to submit()
+    frame: np.ndarray
+    detections: Optional[List[DetectionResult]]  # None if a stage failed
+    preprocessMs: float
+    inferenceMs: float
+    postprocessMs: float
+    latencyMs: float  # from submit() until the result was ready
+
+
+class _Job:
+    __slots__ = ("tag", "frame", "minConf", "data", "failed", "submitNs", "doneNs", "stageMs")
+
+    def __init__(self, tag: Any, frame: np.ndarray, minConf: float) -> None:
+        self.tag = tag
+        self.frame = frame
+        self.minConf = minConf
+        self.data: Any = None  # tensor, then raw outputs, then detections
+        self.failed = False
+        self.submitNs = time.perf_counter_ns()
+        self.doneNs = 0
+        self.stageMs: List[float] = []
+
+
+class PipelinedInferencer:
+    """
+    Runs a MultiInferencer's preprocess, inference and postprocess on a thread each, so preprocessing the next frame
+    and postprocessing the previous one overlap with the model running on the current one. Throughput then approaches
+    the slowest stage instead of the sum of all three.
+
+    At most maxInFlight frames are between submit() and getResult(), submit() waits (or gives up) until one is taken.
+    Results come out in the order the frames were submitted.
+
+    Frames are held until their result is taken, so they must not be written to in the meantime
+    (eg retain pool buffers, see FrameBufferPool).
+    """
+
+    STAGES = ("preprocess", "inference", "postprocess")
+
+    def __init__(self, inferencer: MultiInferencer, maxInFlight: int = 3, smoothing: float = 0.1) -> None:
+        """
+        Args:
+            inferencer: Runs the stages, its backend must not be thread bound
+            maxInFlight: Frames submitted but not yet taken with getResult()
+            smoothing: Weight of the newest sample in the averaged stage timings
+        """
+        if inferencer.backend.threadBound:
+            raise ValueError(f"{type(inferencer.backend).__name__} can only run inference on the thread that created it")
+        if maxInFlight < 1:
+            raise ValueError(f"maxInFlight must be at least 1, got {maxInFlight}")
+
+        self.inferencer = inferencer
+        self.maxInFlight = maxInFlight
+        self.smoothing = smoothing
+        self.__slots = threading.BoundedSemaphore(maxInFlight)
+        # one queue into each stage, and the results
+        self.__queues: List[queue.Queue] = [queue.Queue() for _ in range(len(self.STAGES) + 1)]
+        self.__lock = threading.Lock()
+        self.__averageMs: Dict[str, float] = {}
+        self.__completed = 0
+        self.__inFlight = 0
+        self.__threads: List[threading.Thread] = []
+        self.running = False
+
+    def start(self) -> None:
+        self.running = True
+        workers = [self.__preprocess, self.__infer, self.__postprocess]
+        self.__threads = [
+            threading.Thread(target=self.__stageLoop, args=(idx, worker), name=f"Inference_{stage}", daemon=True)
+            for idx, (stage, worker) in enumerate(zip(self.STAGES, workers))
+        ]
+        for thread in self.__threads:
+            thread.start()
+
+    def stop(self, timeout: float = 1) -> None:
+        """Stops the stage threads, frames still in flight are dropped"""
+        self.running = False
+        for thread in self.__threads:
+            thread.join(timeout=timeout)
+        self.__threads = []
+
+    def submit(self, frame: np.ndarray, minConf: float, tag: Any = None, timeout: Optional[float] = None) -> bool:
+        """
+        Queue a frame for inference
+
+        Args:
+            frame: The input frame, held until its result is taken
+            minConf: Minimum confidence threshold for detections
+            tag: Returned with the result, eg to match it to the frame's trace
+            timeout: How long to wait for a free slot, None waits forever and 0 not at all
+
+        Returns:
+            False if the frame was not taken because maxInFlight frames are already in flight
+        """
+        if not self.running:
+            raise RuntimeError("PipelinedInferencer is not running, call start() first")
+        if frame is None:
+            Sentinel.fatal("Frame is None!")
+            return False
+
+        if not self.__slots.acquire(blocking=timeout != 0, timeout=timeout if timeout else None):
+            return False
+        with self.__lock:
+            self.__inFlight += 1
+        self.__queues[0].put(_Job(tag, frame, minConf))
+        return True
+
+    def getResult(self, timeout: Optional[float] = None) -> Optional[InferenceResult]:
+        """
+        Take the result of the oldest submitted frame
+
+        Args:
+            timeout: How long to wait for it, None waits forever and 0 not at all
+
+        Returns:
+            The result, or None if it was not ready in time
+        """
+        try:
+            job = self.__queues[-1].get(block=timeout != 0, timeout=timeout if timeout else None)
+        except queue.Empty:
+            return None
+        self.__slots.release()
+
+        with self.__lock:
+            self.__inFlight -= 1
+
+        preprocessMs, inferenceMs, postprocessMs = job.stageMs
+        return InferenceResult(
+            job.tag,
+            job.frame,
+            None if job.failed else job.data,
+            preprocessMs,
+            inferenceMs,
+            postprocessMs,
+            (job.doneNs - job.submitNs) / 1e6,
+        )
+
+    def getResults(self) -> List[InferenceResult]:
+        """Take every result that is ready, oldest first"""
+        results = []
+        while (result := self.getResult(timeout=0)) is not None:
+            results.append(result)
+        return results
+
+    def getInFlight(self) -> int:
+        """Frames submitted and not yet taken, including results that are ready"""
+        with self.__lock:
+            return self.__inFlight
+
+    def getStageStats(self) -> Dict[str, float]:
+        """
+        Returns:
+            Averaged ms of each stage and of the latency, and frames completed since the start
+        """
+        with self.__lock:
+            stats = {f"{name}Ms": round(ms, 3) for name, ms in self.__averageMs.items()}
+            stats["completed"] = self.__completed
+        return stats
+
+    def __stageLoop(self, idx: int, worker: Callable[[_Job], Any]) -> None:
+        inQueue, outQueue = self.__queues[idx], self.__queues[idx + 1]
+        stage = self.STAGES[idx]
+        while self.running:
+            try:
+                job = inQueue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            # failed jobs still go through every stage, so results stay in order and their slot is freed
+            start = time.perf_counter_ns()
+            if not job.failed:
+                try:
+                    job.data = worker(job)
+                    if job.data is None:
+                        Sentinel.fatal(f"Inference Backend {stage} returned none!")
+                        job.failed = True
+                except Exception as e:
+                    Sentinel.error(f"Inference Backend {stage} failed: {e}")
+                    job.failed = True
+            end = time.perf_counter_ns()
+            job.stageMs.append((end - start) / 1e6)
+
+            if outQueue is self.__queues[-1]:
+                job.doneNs = end
+                self.__recordStats(job)
+            outQueue.put(job)
+
+    def __preprocess(self, job: _Job) -> Any:
+        return self.inferencer.backend.preprocessFrame(job.frame)
+
+    def __infer(self, job: _Job) -> Any:
+        return self.inferencer.backend.runInference(inputTensor=job.data)
+
+    def __postprocess(self, job: _Job) -> Optional[List[DetectionResult]]:
+        return self.inferencer.backend.postProcessBoxes(job.data, job.frame, job.minConf)
+
+    def __recordStats(self, job: _Job) -> None:
+        samples = dict(zip(self.STAGES, job.stageMs))
+        samples["latency"] = (job.doneNs - job.submitNs) / 1e6
+        with self.__lock:
+            for name, ms in samples.items():
+                previous = self.__averageMs.get(name)
+                self.__averageMs[name] = ms if previous is None else previous + self.smoothing * (ms - previous)
+            self.__completed += 1
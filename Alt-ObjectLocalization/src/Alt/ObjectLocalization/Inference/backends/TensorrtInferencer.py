@@ -15,6 +15,9 @@ EXPLICIT_BATCH = 1 << int(trt.NetworkDefinitionCreationFlag.EXPLICIT_BATCH)
 TRT_LOGGER = trt.Logger(trt.Logger.INFO)
 
 class TensorrtInferencer(InferencerBackend): 
+    # the pycuda context is current on the thread that created it
+    threadBound = True
+
     def __init__(self, modelConfig : ModelConfig) -> None:
         super().__init__(modelConfig)
         self.engine_path = modelConfig.getPath()
@@ -1,3 +1,5 @@
+from typing import Optional
+
 import numpy as np
 import onnxruntime as ort
 
@@ -19,8 +21,20 @@ class onnxInferencer(InferencerBackend):
             self.modelConfig.getPath(), sess_options=session_options, providers=providers
         )
         # Get input/output names from the ONNX model
-        self.inputName = self.session.get_inputs()[0].name
+        modelInput = self.session.get_inputs()[0]
+        self.inputName = modelInput.name
         self.outputName = self.session.get_outputs()[0].name
+        # a named (or missing) batch dimension means the model was exported with a dynamic batch size
+        batchDim = modelInput.shape[0] if modelInput.shape else 1
+        self.maxBatchSize: Optional[int] = batchDim if isinstance(batchDim, int) and batchDim > 0 else None
+        Sentinel.info(f"Model batch size: {self.maxBatchSize or 'dynamic'}")
+
+    def getMaxBatchSize(self) -> Optional[int]:
+        return self.maxBatchSize
+
+    def preprocessBatch(self, frames):
+        # a fixed batch size model needs the whole batch, the padding frames are ignored in postProcessBatch
+        return utils.letterboxBatch(frames, batchSize=self.maxBatchSize)
 
     def preprocessFrame(self, frame):
         input_frame = utils.letterbox_image(frame.copy())
@@ -39,3 +53,10 @@ class onnxInferencer(InferencerBackend):
         nmsResults = utils.non_max_suppression(adjusted, minConf)
 
         return [DetectionResult(nmsResult[0], nmsResult[1], nmsResult[2]) for nmsResult in nmsResults]
+
+    def postProcessBatch(self, results, frames, minConf) -> list[list[DetectionResult]]:
+        # each frame's slice keeps a batch dimension of 1, which is what postProcessBoxes expects
+        return [
+            self.postProcessBoxes([results[0][idx : idx + 1]], frame, minConf)
+            for idx, frame in enumerate(frames)
+        ]
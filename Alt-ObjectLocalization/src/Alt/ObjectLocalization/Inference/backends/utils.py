@@ -1,7 +1,7 @@
 import numpy as np
 import cv2
 import time
-from typing import List, Tuple, Callable, Union
+from typing import List, Optional, Tuple, Callable, Union
 
 from Alt.Core import getChildLogger
 from Alt.Core.Units import Conversions
@@ -61,6 +61,43 @@ def letterbox_image(
     return letterbox
 
 
+def letterboxBatch(
+    images: List[np.ndarray],
+    target_size: Tuple[int, int] = (640, 640),
+    batchSize: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Letterbox several images into one contiguous NCHW float32 batch tensor (0-1), ready to run through a model
+
+    Args:
+        images: Input images, sizes can differ (boxes are rescaled per image with rescaleBox)
+        target_size: Target size (width, height)
+        batchSize: Pad the batch with empty images up to this size, for models with a fixed batch size
+
+    Returns:
+        Batch tensor of shape (batchSize or len(images), 3, height, width)
+    """
+    target_width, target_height = target_size
+    batch = np.zeros((max(batchSize or 0, len(images)), target_height, target_width, 3), dtype=np.uint8)
+
+    for image, letterbox in zip(images, batch):
+        h, w = image.shape[:2]
+        # same placement as letterbox_image, so rescaleBox undoes it
+        scale = min(target_width / w, target_height / h)
+        new_width = int(w * scale)
+        new_height = int(h * scale)
+        x_offset = (target_width - new_width) // 2
+        y_offset = (target_height - new_height) // 2
+        letterbox[y_offset : y_offset + new_height, x_offset : x_offset + new_width] = cv2.resize(
+            image, (new_width, new_height)
+        )
+
+    # one conversion for the whole batch, NHWC uint8 -> contiguous NCHW float32
+    tensor = np.ascontiguousarray(batch.transpose(0, 3, 1, 2), dtype=np.float32)
+    tensor *= 1 / 255
+    return tensor
+
+
 def rescaleBox(
     box: List[float],
     img_shape: Tuple[int, ...],
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any, List, Callable
+from typing import Any, List, Callable, Optional
 
 import numpy as np
 
@@ -9,6 +9,9 @@ from .backends import utils
 
 
 class InferencerBackend(ABC):
+    # runInference() only works on the thread that called initialize() (eg a cuda context made current there)
+    threadBound: bool = False
+
     def __init__(self, modelConfig: ModelConfig) -> None:
         self.modelConfig = modelConfig
         self.objects = modelConfig.getObjects()
@@ -45,3 +48,21 @@ class InferencerBackend(ABC):
         What is returned should be a tensorlike object that can immediately be run through the backend
         """
         pass
+
+    def getMaxBatchSize(self) -> Optional[int]:
+        """How many frames one runInference() call can take, None for any number.\n
+        Backends that return something other than 1 must implement preprocessBatch() and postProcessBatch()
+        """
+        return 1
+
+    def preprocessBatch(self, frames: List[np.ndarray]) -> Any:
+        """Like preprocessFrame(), for several frames at once (at most getMaxBatchSize())\n
+        What is returned should be a single batch tensor that can immediately be run through the backend
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support batches")
+
+    def postProcessBatch(
+        self, results: Any, frames: List[np.ndarray], minConf: float
+    ) -> List[List[DetectionResult]]:
+        """Like postProcessBoxes(), splitting the raw output of a batch back into the results of each frame"""
+        raise NotImplementedError(f"{type(self).__name__} does not support batches")
@@ -1,5 +1,6 @@
 import time
 import random
+from typing import Optional
 
 import cv2
 import numpy as np
@@ -7,6 +8,7 @@ from Alt.Core import getChildLogger
 from Alt.Core.Units.Poses import Pose2d, Transform3d
 from Alt.Cameras.Parameters.CameraIntrinsics import CameraIntrinsics
 from Alt.Cameras.Parameters.CameraExtrinsics import CameraExtrinsics
+from Alt.Cameras.Captures.tools.overlay import FrameOverlay
 
 from ..Constants.InferenceC import DefaultConfigConstants
 from ..Inference.ModelConfig import ModelConfig
@@ -51,7 +53,12 @@ class PipelineStep1:
         minConf : float = DefaultConfigConstants.confThreshold,
         drawBoxes : bool = DefaultConfigConstants.drawBoxes,
         maxDetections : int = DefaultConfigConstants.maxDetection,
+        overlay : Optional[FrameOverlay] = None,
     ) -> list[LocalizationResult]:
+        """
+        Detect, track and localize objects in a frame.
+        With drawBoxes, annotations are recorded into overlay if given, otherwise drawn onto colorFrame
+        """
         startTime = time.time()
 
         # yolo inference
@@ -69,7 +76,7 @@ class PipelineStep1:
             if drawBoxes:
                 endTime = time.time()
                 fps = 1 / (endTime - startTime)
-                cv2.putText(colorFrame, f"FPS:{fps}", (10, 20), 0, 1, (0, 255, 0), 2)
+                self.__drawFps(colorFrame, fps, overlay)
             return []
 
         # id(unique),bbox,conf,isrobot,features,
@@ -84,7 +91,10 @@ class PipelineStep1:
                     label = f"{self.labelNames[labledResult.class_idx]} Id:{labledResult.deepsort_id}"
 
                 color = self.colors[labledResult.deepsort_id % len(self.colors)]
-                drawBox(colorFrame, labledResult.bbox, label, labledResult.conf, color)
+                if overlay is not None:
+                    overlay.box(labledResult.bbox, f"{label} Conf:{labledResult.conf:.2f}", color)
+                else:
+                    drawBox(colorFrame, labledResult.bbox, label, labledResult.conf, color)
 
         finalResults = []
         for labledResult in labledResults:
@@ -100,7 +110,14 @@ class PipelineStep1:
 
         if drawBoxes:
             # add final fps
-            cv2.putText(colorFrame, f"FPS:{fps}", (10, 20), 0, 1, (0, 255, 0), 2)
+            self.__drawFps(colorFrame, fps, overlay)
 
         return finalResults
 
+    @staticmethod
+    def __drawFps(colorFrame : np.ndarray, fps : float, overlay : Optional[FrameOverlay]) -> None:
+        if overlay is not None:
+            overlay.text(f"FPS:{fps:.1f}", (10, 20), (0, 255, 0))
+        else:
+            cv2.putText(colorFrame, f"FPS:{fps}", (10, 20), 0, 1, (0, 255, 0), 2)
+
@@ -0,0 +1,56 @@
+import numpy as np
+
+from Alt.ObjectLocalization.Inference.MultiInferencer import MultiInferencer
+from Alt.ObjectLocalization.Inference.backends import utils
+
+
+class FakeBatchBackend:
+    """Finds one box in the middle of each letterboxed frame, remembers the batches it ran"""
+
+    def __init__(self, maxBatchSize):
+        self.maxBatchSize = maxBatchSize
+        self.batches = []
+
+    def getMaxBatchSize(self):
+        return self.maxBatchSize
+
+    def preprocessBatch(self, frames):
+        return utils.letterboxBatch(frames, batchSize=self.maxBatchSize)
+
+    def runInference(self, inputTensor):
+        self.batches.append(inputTensor.shape[0])
+        return inputTensor
+
+    def postProcessBatch(self, results, frames, minConf):
+        return [[utils.rescaleBox([220, 220, 420, 420], frame.shape)] for frame in frames]
+
+
+def makeInferencer(backend):
+    inferencer = MultiInferencer.__new__(MultiInferencer)
+    inferencer.backend = backend
+    return inferencer
+
+
+def test_letterbox_batch_is_contiguous_nchw():
+    frames = [np.full((480, 640, 3), 255, dtype=np.uint8), np.full((720, 1280, 3), 255, dtype=np.uint8)]
+    batch = utils.letterboxBatch(frames, batchSize=4)
+    assert batch.shape == (4, 3, 640, 640) and batch.dtype == np.float32
+    assert batch.flags["C_CONTIGUOUS"]
+
+    # placed like letterbox_image, padding rows stay empty
+    single = utils.letterbox_image(frames[1]).transpose(2, 0, 1) / 255
+    assert np.allclose(batch[1], single)
+    assert batch[0, :, 0].max() == 0 and batch[0, :, 320].min() == 1
+    assert batch[2:].max() == 0
+
+
+def test_run_batch_splits_and_rescales():
+    backend = FakeBatchBackend(maxBatchSize=2)
+    frames = [np.zeros((480, 640, 3), dtype=np.uint8), np.zeros((240, 320, 3), dtype=np.uint8), np.zeros((480, 640, 3), dtype=np.uint8)]
+    results = makeInferencer(backend).runBatch(frames, 0.5)
+
+    # a fixed batch of 2: the last frame runs in a padded batch
+    assert backend.batches == [2, 2]
+    assert len(results) == 3
+    # the same letterboxed box is at half the pixels of the half size frame
+    assert np.allclose(results[0][0], [2 * coord for coord in results[1][0]])
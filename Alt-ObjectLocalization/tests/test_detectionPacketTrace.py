@@ -0,0 +1,45 @@
+import time
+
+import numpy as np
+from Alt.Core.Units.Poses import Transform3d
+from Alt.Core.Utils.frameTrace import FrameTrace, TraceRecorder
+
+from Alt.ObjectLocalization.Detections.DetectionPacket import DetectionPacket
+from Alt.ObjectLocalization.Localization.LocalizationResult import LocalizationResult, DeviceLocalizationResult
+
+
+def test_trace_survives_detection_packet() -> None:
+    trace = FrameTrace()
+    with trace.span("capture"):
+        time.sleep(0.001)
+    trace.mark("send")
+
+    result = DeviceLocalizationResult(
+        [LocalizationResult(Transform3d(1, 2, 3), 0, 0.9, 7, np.array([1.0, 2.0]))], "device"
+    )
+    packet = DetectionPacket.createPacket(result, "Detection", time.time() * 1000, trace=trace)
+
+    received = DetectionPacket.getTrace(DetectionPacket.fromBytes(packet.to_bytes()))
+    assert received is not None
+    assert received.traceId == trace.traceId
+    assert [span.name for span in received.spans] == ["capture", "send"]
+
+    # the receiver keeps adding its own stages
+    received.mark("received")
+    with received.span("probmap"):
+        pass
+
+    recorder = TraceRecorder()
+    recorder.add(received)
+    events = recorder.toChromeTrace()["traceEvents"]
+
+    spans = [event for event in events if event["ph"] != "M"]
+    assert [event["name"] for event in spans] == ["capture", "send", "received", "probmap"]
+    assert spans[0]["ph"] == "X" and spans[0]["dur"] >= 1000  # us
+    assert spans[1]["ph"] == "i"
+    assert all(event["args"]["traceId"] == str(trace.traceId) for event in spans)
+
+
+def test_untraced_packet() -> None:
+    packet = DetectionPacket.createPacket(DeviceLocalizationResult([], "device"), "Detection", 0)
+    assert DetectionPacket.getTrace(DetectionPacket.fromBytes(packet.to_bytes())) is None
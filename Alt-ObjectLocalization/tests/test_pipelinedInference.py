@@ -0,0 +1,91 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from Alt.ObjectLocalization.Inference.MultiInferencer import MultiInferencer
+from Alt.ObjectLocalization.Inference.PipelinedInferencer import PipelinedInferencer
+
+STAGEDELAYS = 0.02
+
+
+class FakeSlowBackend:
+    """Every stage sleeps, the detections are the frame's value. Frames with a value of -1 fail to preprocess"""
+
+    threadBound = False
+
+    def __init__(self):
+        self.threads = set()
+        self.running = 0
+        self.maxConcurrent = 0
+        self.lock = threading.Lock()
+
+    def __stage(self):
+        with self.lock:
+            self.threads.add(threading.current_thread().name)
+            self.running += 1
+            self.maxConcurrent = max(self.maxConcurrent, self.running)
+        time.sleep(STAGEDELAYS)
+        with self.lock:
+            self.running -= 1
+
+    def preprocessFrame(self, frame):
+        self.__stage()
+        return None if frame[0, 0] == -1 else frame[0, 0]
+
+    def runInference(self, inputTensor):
+        self.__stage()
+        return inputTensor
+
+    def postProcessBoxes(self, results, frame, minConf):
+        self.__stage()
+        return [int(results)]
+
+
+@pytest.fixture
+def pipeline():
+    inferencer = MultiInferencer.__new__(MultiInferencer)
+    inferencer.backend = FakeSlowBackend()
+    pipeline = PipelinedInferencer(inferencer, maxInFlight=3)
+    pipeline.start()
+    yield pipeline
+    pipeline.stop()
+
+
+def makeFrame(value):
+    return np.full((4, 4), value, dtype=np.int32)
+
+
+def test_results_are_ordered_and_overlap(pipeline):
+    start = time.perf_counter()
+    values = list(range(9)) + [-1, 9]
+    results = []
+    for value in values:
+        while not pipeline.submit(makeFrame(value), 0.5, tag=value, timeout=0):
+            results.append(pipeline.getResult())
+        assert pipeline.getInFlight() <= 3
+    while len(results) < len(values):
+        results.append(pipeline.getResult(timeout=1))
+    elapsed = time.perf_counter() - start
+
+    assert [result.tag for result in results] == values
+    assert [result.detections for result in results] == [[value] for value in range(9)] + [None, [9]]
+    # stages ran at the same time on their own threads, faster than one stage after another
+    assert len(pipeline.inferencer.backend.threads) == 3
+    assert pipeline.inferencer.backend.maxConcurrent > 1
+    assert elapsed < len(values) * 3 * STAGEDELAYS * 0.8
+
+    stats = pipeline.getStageStats()
+    assert stats["completed"] == len(values)
+    assert stats["inferenceMs"] >= STAGEDELAYS * 1000 * 0.5
+    assert stats["latencyMs"] >= stats["preprocessMs"] + stats["inferenceMs"]
+    assert pipeline.getInFlight() == 0
+
+
+def test_thread_bound_backend_is_refused():
+    inferencer = MultiInferencer.__new__(MultiInferencer)
+    inferencer.backend = FakeSlowBackend()
+    inferencer.backend.threadBound = True
+    with pytest.raises(ValueError):
+        PipelinedInferencer(inferencer)